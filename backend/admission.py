@@ -0,0 +1,249 @@
+"""Request coalescing and admission control for expensive endpoints.
+
+SingleFlight lets concurrent callers of an identical computation share one
+in-progress result. It is used for snapshot rebuilds and uncached rankings,
+so a burst right after data.json is replaced does the work once.
+
+Admission control guards endpoints that start work (/api/update) or fetch
+from upstream (news). Each client gets a token bucket, and each endpoint
+group has a bounded admission queue: at most max_active requests run, at
+most max_waiting wait up to ADMISSION_TIMEOUT seconds for a slot, and
+everything else is refused at once with 429 and a Retry-After header (503
+without one once a zero-rate bucket is empty). A refused request therefore
+never reaches the threadpool.
+"""
+import os
+import math
+import time
+import asyncio
+import threading
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, Hashable, Optional
+
+from fastapi import HTTPException, Request
+
+import metrics
+
+# Seconds a request may wait in an admission queue before it is refused
+ADMISSION_TIMEOUT = float(os.environ.get("ADMISSION_TIMEOUT", "5"))
+# Key clients by the first X-Forwarded-For address (only behind a trusted proxy)
+TRUST_FORWARDED_FOR = os.environ.get("TRUST_FORWARDED_FOR", "0") == "1"
+# Clients whose buckets are remembered; the least recently seen are dropped
+MAX_CLIENTS = 10_000
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Run fn once per key among concurrent callers; the others wait for its result.
+
+    Nothing is cached: once the leading call returns, the next call with the
+    same key runs fn again. Errors are raised to every waiting caller.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def do(self, key: Hashable, fn: Callable):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            metrics.COALESCED.inc(1, self.name)
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+
+class TokenBucket:
+    """rate tokens per second, holding at most burst."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Spend a token; returns 0 if one was available, else seconds until one is."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else math.inf
+
+
+class ClientLimiter:
+    """Per-client token buckets, keeping the MAX_CLIENTS most recently seen clients."""
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def check(self, client: str) -> float:
+        """0 if client may proceed, else seconds until it may retry."""
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = TokenBucket(self.rate, self.burst, now)
+                if len(self._buckets) > MAX_CLIENTS:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+            return bucket.take(now)
+
+
+class AdmissionQueue:
+    """At most max_active holders, at most max_waiting waiters, FIFO hand-over.
+
+    Waiters are futures of whichever event loop they were created on, so the
+    queue can be shared by every loop (and thread) in the process.
+    """
+
+    def __init__(self, max_active: int, max_waiting: int, timeout: float = ADMISSION_TIMEOUT):
+        self.max_active = max_active
+        self.max_waiting = max_waiting
+        self.timeout = timeout
+        self.active = 0
+        self._lock = threading.Lock()
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        """Take a slot, waiting up to timeout; False if the queue is full or the wait timed out."""
+        with self._lock:
+            if self.active < self.max_active:
+                self.active += 1
+                return True
+            if len(self._waiters) >= self.max_waiting:
+                return False
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.timeout)
+            return True
+        except asyncio.TimeoutError:
+            # The slot may have been handed over just as the wait timed out
+            return not self._withdraw(waiter)
+        except asyncio.CancelledError:
+            if not self._withdraw(waiter):
+                self.release()
+            raise
+
+    def _withdraw(self, waiter: asyncio.Future) -> bool:
+        """Leave the queue; False if a slot was already handed to waiter."""
+        with self._lock:
+            try:
+                self._waiters.remove(waiter)
+                return True
+            except ValueError:
+                return False
+
+    def release(self) -> None:
+        with self._lock:
+            if not self._waiters:
+                self.active -= 1
+                return
+            # The slot passes straight to the oldest waiter
+            waiter = self._waiters.popleft()
+        waiter.get_loop().call_soon_threadsafe(_wake, waiter)
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class Policy:
+    """Rate limit and admission queue shared by one group of endpoints."""
+
+    def __init__(self, name: str, rate: float, burst: float, max_active: int, max_waiting: int,
+                 timeout: float = ADMISSION_TIMEOUT, retry_after: float = 1.0):
+        self.name = name
+        self.limiter = ClientLimiter(rate, burst)
+        self.queue = AdmissionQueue(max_active, max_waiting, timeout)
+        # Suggested wait when the queue (not the client's bucket) is full
+        self.retry_after = retry_after
+
+    @classmethod
+    def from_env(cls, name: str, rate: float, burst: float, max_active: int, max_waiting: int) -> "Policy":
+        """Defaults overridable as <NAME>_RATE, <NAME>_BURST, <NAME>_MAX_ACTIVE and <NAME>_MAX_QUEUE."""
+        prefix = name.upper()
+        env = os.environ.get
+        return cls(name, float(env(f"{prefix}_RATE", rate)), float(env(f"{prefix}_BURST", burst)),
+                   int(env(f"{prefix}_MAX_ACTIVE", max_active)), int(env(f"{prefix}_MAX_QUEUE", max_waiting)))
+
+
+def client_key(request: Request) -> str:
+    if TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for", "").split(",")[0].strip()
+        if forwarded:
+            return forwarded
+    return request.client.host if request.client else "unknown"
+
+
+def _reject(policy: Policy, reason: str, retry_after: float, detail: str) -> HTTPException:
+    metrics.ADMISSION_REJECTED.inc(1, policy.name, reason)
+    if math.isinf(retry_after):
+        # A zero-rate bucket never refills: no retry will succeed, so give no hint
+        return HTTPException(status_code=503, detail="Request limit reached for this endpoint")
+    return HTTPException(status_code=429, detail=detail,
+                         headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+
+
+def admit(policy: Policy):
+    """FastAPI dependency enforcing policy around the endpoint it is attached to."""
+
+    async def dependency(request: Request):
+        wait = policy.limiter.check(client_key(request))
+        if wait:
+            raise _reject(policy, "rate", wait, "Too many requests; slow down")
+        if not await policy.queue.acquire():
+            raise _reject(policy, "queue", policy.retry_after, "Server busy; try again shortly")
+        try:
+            yield
+        finally:
+            policy.queue.release()
+
+    return dependency
+
+
+# /api/update starts (or joins) scrapes and may block with wait=true
+UPDATE = Policy.from_env("update", rate=1 / 30, burst=3, max_active=4, max_waiting=8)
+# News is served from cache but a miss waits on an upstream fetch
+NEWS = Policy.from_env("news", rate=5, burst=20, max_active=32, max_waiting=64)
@@ -0,0 +1,141 @@
+"""Tail latency of request bursts: after a data refresh, on custom rankings and on /api/update.
+
+Run from backend/:  python -m benchmarks.bench_burst [--burst 64] [--rounds 5] [--funds 10000]
+
+"refresh" rewrites data.json with a new synthetic dataset, then releases
+--burst clients at once, split between the cached /api/funds/top10, an
+uncached custom-weight ranking and /api/funds. Every request needs the new
+snapshot; identical work should be done once and shared. The row reports
+latency percentiles over all rounds, plus how many snapshots were built and
+how many calls joined a computation already in flight (from /api/metrics).
+
+"ranking" keeps the snapshot warm and releases --burst identical custom
+rankings per round (percentile-normalized, per category), which no cache
+holds: the work is shared only if the calls are coalesced.
+
+"update" releases --burst POST /api/update calls from one client
+(SCRAPE_MODE=external, so admitted calls answer 409 without scraping) and
+reports how they were answered: a burst beyond the client's token bucket is
+refused at once with 429 instead of queueing on the threadpool.
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+from collections import Counter
+
+import storage
+from benchmarks.harness import report
+from benchmarks.bench_load import BACKEND, _free_port, _wait_ready, _percentile
+from benchmarks.synthetic import synthetic_funds
+
+REFRESH_PATHS = ("/api/funds/top10", "/api/funds/top10?cagr_weight=1&three_year_weight=1", "/api/funds")
+RANKING_PATH = "/api/funds/top?normalization=percentile&n=20&cagr_weight={}"
+
+
+def _burst(port: int, requests):
+    """Send every (method, path) at once, each on its own connection; returns [(status, seconds)]."""
+    results = [None] * len(requests)
+    gate = threading.Barrier(len(requests))
+
+    def send(i, method, path):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+        conn.connect()
+        gate.wait()
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, headers={"Accept-Encoding": "gzip"})
+            response = conn.getresponse()
+            response.read()
+            results[i] = (response.status, time.perf_counter() - start)
+        except (OSError, http.client.HTTPException):
+            results[i] = ("error", time.perf_counter() - start)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=send, args=(i, m, p)) for i, (m, p) in enumerate(requests)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def _metric(port: int, name: str) -> float:
+    """Sum of every series of a counter in /api/metrics (0 if the server does not export it)."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.request("GET", "/api/metrics")
+    text = conn.getresponse().read().decode()
+    conn.close()
+    return sum(float(v) for v in re.findall(rf"^{name}(?:{{[^}}]*}})? (\S+)$", text, re.M))
+
+
+def _row(scenario, results, **extra):
+    latencies = sorted(s for status, s in results if status != "error")
+    statuses = Counter(status for status, _ in results)
+    return {
+        "scenario": scenario,
+        "requests": len(results),
+        "p50_ms": f"{_percentile(latencies, 0.5) * 1000:.0f}",
+        "p99_ms": f"{_percentile(latencies, 0.99) * 1000:.0f}",
+        "max_ms": f"{latencies[-1] * 1000:.0f}" if latencies else "nan",
+        "statuses": " ".join(f"{k}x{v}" for k, v in sorted(statuses.items(), key=str)),
+        **extra,
+    }
+
+
+def run(burst=64, rounds=5, funds=10_000):
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, "data.json")
+        storage.write_json_atomic(data_path, synthetic_funds(funds))
+        port = _free_port()
+        env = dict(os.environ, FUNDS_DATA=data_path, FUNDS_STORAGE="json", SCRAPE_MODE="external")
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+             "--log-level", "warning", "--no-access-log"],
+            cwd=BACKEND, env=env,
+        )
+        try:
+            _wait_ready(port, "/api/funds/top10", timeout=300)
+            builds, joined = _metric(port, "funds_snapshot_builds_total"), _metric(port, "coalesced_requests_total")
+            results = []
+            for i in range(rounds):
+                # A different size each round, so the file's fingerprint changes
+                storage.write_json_atomic(data_path, synthetic_funds(funds + i + 1))
+                requests = [("GET", REFRESH_PATHS[j % len(REFRESH_PATHS)]) for j in range(burst)]
+                results += _burst(port, requests)
+            rows.append(_row("refresh", results,
+                             snapshot_builds=int(_metric(port, "funds_snapshot_builds_total") - builds),
+                             coalesced=int(_metric(port, "coalesced_requests_total") - joined)))
+
+            joined = _metric(port, "coalesced_requests_total")
+            results = []
+            for i in range(rounds):
+                results += _burst(port, [("GET", RANKING_PATH.format(i + 1))] * burst)
+            rows.append(_row("ranking", results, snapshot_builds="-",
+                             coalesced=int(_metric(port, "coalesced_requests_total") - joined)))
+
+            results = []
+            for _ in range(rounds):
+                results += _burst(port, [("POST", "/api/update")] * burst)
+            rows.append(_row("update", results, snapshot_builds="-", coalesced="-"))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+    report(rows)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--burst", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--funds", type=int, default=10_000)
+    args = parser.parse_args()
+    run(args.burst, args.rounds, args.funds)
@@ -0,0 +1,65 @@
+"""Benchmark history.db growth per daily snapshot and point-in-time query latency.
+
+Run from backend/:  python -m benchmarks.bench_history [--funds 10000] [--days 30] [--churn 0.05]
+
+Each simulated day re-scrapes the whole universe with `churn` of the funds'
+returns changed, so only those funds should add rows.
+"""
+import os
+import random
+import argparse
+import tempfile
+from datetime import date, timedelta
+
+import history
+from benchmarks.harness import report, measure
+from benchmarks.synthetic import clean_funds
+
+
+def run(funds=10_000, days=30, churn=0.05, seed=7):
+    rng = random.Random(seed)
+    universe = [dict(f, url=f"https://groww.in/mutual-funds/fund-{i}") for i, f in enumerate(clean_funds(funds))]
+    start = date(2026, 1, 1)
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "history.db")
+        store = history.HistoryStore(path)
+        previous_size = first_day_size = 0
+        for d in range(days):
+            if d:
+                for i in rng.sample(range(funds), int(funds * churn)):
+                    universe[i] = dict(universe[i], one_year_return=f"{rng.uniform(-20, 60):.2f}%")
+            result, elapsed, _ = measure(lambda: store.append(universe, day=start + timedelta(days=d)))
+            size = os.path.getsize(path)
+            if d in (0, 1) or d == days - 1 or d % 10 == 0:
+                rows.append({
+                    "day": d + 1,
+                    "changed": result["changed"],
+                    "append_s": f"{elapsed:.3f}",
+                    "db_kib": f"{size / 1024:,.0f}",
+                    "growth_kib": f"{(size - previous_size) / 1024:,.1f}",
+                })
+            previous_size = size
+            if d == 0:
+                first_day_size = size
+        report(rows)
+
+        mid = start + timedelta(days=days // 2)
+        as_of, as_of_t, _ = measure(lambda: store.as_of(mid))
+        one, one_t, _ = measure(lambda: store.history(funds // 2))
+        print(f"\nas_of({mid}): {len(as_of)} funds in {as_of_t * 1000:.1f} ms; "
+              f"history(one fund): {len(one['points'])} points in {one_t * 1000:.2f} ms")
+        if days > 1:
+            growth = (os.path.getsize(path) - first_day_size) / (days - 1)
+            print(f"average growth after day 1: {growth / 1024:,.1f} KiB/day "
+                  f"({growth / max(1, int(funds * churn)):.0f} bytes per changed fund)")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--funds", type=int, default=10_000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--churn", type=float, default=0.05)
+    args = parser.parse_args()
+    run(args.funds, args.days, args.churn)
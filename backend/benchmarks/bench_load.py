@@ -0,0 +1,127 @@
+"""Load-test the API under 1..N uvicorn worker processes.
+
+Run from backend/:  python -m benchmarks.bench_load [--workers 1 2 4] [--funds 5000]
+
+Each run starts `uvicorn main:app --workers N` against a synthetic dataset
+(SCRAPE_MODE=external, so no worker starts Chrome), waits until every path
+answers, then drives it for --seconds with --clients keep-alive client
+processes and reports requests/s and latency percentiles per path.
+"""
+import os
+import sys
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+import http.client
+from concurrent.futures import ProcessPoolExecutor
+
+import storage
+from benchmarks.harness import report
+from benchmarks.synthetic import synthetic_funds
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PATHS = ("/api/funds/top10", "/api/funds?limit=50&sort=-cagr", "/api/funds")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(port: int, path: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+            conn.request("GET", path)
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not answer {path} within {timeout}s")
+
+
+def _client(port: int, path: str, seconds: float):
+    """One keep-alive connection hammering path; returns (ok, errors, latencies)."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+    while True:
+        start = time.perf_counter()
+        if start >= deadline:
+            break
+        try:
+            conn.request("GET", path, headers={"Accept-Encoding": "gzip"})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+                continue
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+    return len(latencies), errors, latencies
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def run(workers=(1, 2, 4), funds=5000, clients=16, seconds=10.0, paths=PATHS, snapshot_processes=0):
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, "data.json")
+        storage.write_json_atomic(data_path, synthetic_funds(funds))
+        for n in workers:
+            port = _free_port()
+            env = dict(os.environ, FUNDS_DATA=data_path, FUNDS_STORAGE="json", SCRAPE_MODE="external",
+                       SNAPSHOT_PROCESSES=str(snapshot_processes))
+            server = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+                 "--workers", str(n), "--log-level", "warning", "--no-access-log"],
+                cwd=BACKEND, env=env,
+            )
+            try:
+                for path in paths:
+                    _wait_ready(port, path, timeout=300)
+                    # Every worker builds its own snapshot; warm them all first
+                    _client(port, path, 1.0)
+                    with ProcessPoolExecutor(max_workers=clients) as pool:
+                        results = list(pool.map(_client, [port] * clients, [path] * clients, [seconds] * clients))
+                    ok = sum(r[0] for r in results)
+                    latencies = sorted(l for r in results for l in r[2])
+                    rows.append({
+                        "workers": n,
+                        "path": path,
+                        "req/s": f"{ok / seconds:,.0f}",
+                        "p50_ms": f"{_percentile(latencies, 0.5) * 1000:.1f}",
+                        "p99_ms": f"{_percentile(latencies, 0.99) * 1000:.1f}",
+                        "errors": sum(r[1] for r in results),
+                    })
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+    report(rows)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--funds", type=int, default=5000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--paths", nargs="+", default=list(PATHS))
+    parser.add_argument("--snapshot-processes", type=int, default=0)
+    args = parser.parse_args()
+    run(args.workers, args.funds, args.clients, args.seconds, args.paths, args.snapshot_processes)
@@ -0,0 +1,52 @@
+"""Benchmark the memory a published FundSnapshot keeps resident.
+
+Run from backend/:  python -m benchmarks.bench_memory [--sizes 1000 10000]
+
+The dataset is parsed from JSON bytes inside the traced region, as
+scraper_adapter does, so anything the snapshot keeps of the raw records is
+counted too. "retained" is what is still allocated once the build's
+temporaries are collected.
+"""
+import gc
+import json
+import time
+import argparse
+import tracemalloc
+
+import snapshot
+from benchmarks.harness import SIZES, report, mib
+from benchmarks.synthetic import clean_funds
+
+
+def run(sizes=SIZES):
+    rows = []
+    for n in sizes:
+        payload = json.dumps([dict(f, url=f"https://groww.in/mutual-funds/fund-{i}-direct-growth")
+                              for i, f in enumerate(clean_funds(n))]).encode("utf-8")
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        snap = snapshot.FundSnapshot((1, None), json.loads(payload))
+        elapsed = time.perf_counter() - start
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        bodies = sum(len(b.body) + sum(map(len, b.encoded.values()))
+                     for b in (snap.funds, snap.top10, snap.top_by_category, snap.top10_csv))
+        rows.append({
+            "funds": n,
+            "build_s": f"{elapsed:.3f}",
+            "peak": mib(peak),
+            "retained": mib(retained),
+            "cached_bodies": mib(bodies),
+            "bytes/fund": f"{(retained - bodies) / n:,.0f}",
+        })
+        del snap
+    report(rows)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    run(parser.parse_args().sizes)
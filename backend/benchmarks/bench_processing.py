@@ -0,0 +1,99 @@
+"""Benchmark processor.clean_df, ranking (global, per category and batched) and peer queries on synthetic fund universes.
+
+clean_df is also timed against the original row-wise implementation
+(benchmarks.legacy.legacy_clean_df); clean_speedup is marked SLOWER at
+sizes where the vectorized version loses. batch500_s and peer_query_ms
+are marked OVER when they exceed BATCH_BUDGET_S and PEER_QUERY_BUDGET_MS.
+
+Run from backend/:  python -m benchmarks.bench_processing [--sizes 1000 10000]
+"""
+import time
+import argparse
+
+import numpy as np
+
+import processor
+from benchmarks.harness import SIZES, measure, report, mib
+from benchmarks.legacy import legacy_clean_df
+from benchmarks.synthetic import synthetic_funds
+
+# Weight vectors of the batch scoring comparison
+SCENARIOS = 500
+# Target time to rank all SCENARIOS in one batch_top call (/api/score/batch)
+BATCH_BUDGET_S = 1.0
+# Target latency of one PeerIndex.nearest query (the /peers endpoint)
+PEER_QUERY_BUDGET_MS = 1.0
+
+
+def _batch_vs_loop(df):
+    """Seconds to rank SCENARIOS weight vectors with one batch_top call and with one top() call each.
+
+    Timed without tracemalloc on scorers built beforehand, so only the
+    scoring and ranking are compared.
+    """
+    weights = np.random.default_rng(0).random((SCENARIOS, 3)).tolist()
+    batch, loop = processor.FundScorer(df), processor.FundScorer(df)
+    start = time.perf_counter()
+    batch.batch_top(weights, top_n=10)
+    batch_t = time.perf_counter() - start
+    start = time.perf_counter()
+    for w in weights:
+        loop.top(10, w)
+    return batch_t, time.perf_counter() - start
+
+
+def _clean_vs_rowwise(raw):
+    """Seconds for processor.clean_df and for the row-wise legacy_clean_df, without tracemalloc."""
+    start = time.perf_counter()
+    processor.clean_df(raw)
+    vectorized_t = time.perf_counter() - start
+    start = time.perf_counter()
+    legacy_clean_df(raw)
+    return vectorized_t, time.perf_counter() - start
+
+
+def _peer_query_ms(peers, n):
+    """Mean milliseconds of nearest(k=10) over ~200 funds spread across the universe, without tracemalloc."""
+    queries = range(0, n, max(1, n // 200))
+    start = time.perf_counter()
+    for pos in queries:
+        peers.nearest(pos, k=10)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def run(sizes=SIZES):
+    rows = []
+    for n in sizes:
+        raw = synthetic_funds(n)
+        df, clean_t, clean_peak = measure(lambda: processor.clean_df(raw))
+        vectorized_t, rowwise_t = _clean_vs_rowwise(raw)
+        _, rank_t, rank_peak = measure(lambda: processor.rank_funds(df, top_n=10))
+        _, grouped_t, _ = measure(lambda: processor.FundScorer(df).grouped_records(
+            5, group_by='category', normalization='percentile'))
+        batch_t, loop_t = _batch_vs_loop(df)
+        peers, peers_t, _ = measure(lambda: processor.PeerIndex(df, processor.df_records(df)))
+        query_ms = _peer_query_ms(peers, len(df))
+        rows.append({
+            "funds": n,
+            "clean_s": f"{clean_t:.3f}",
+            "clean_rows/s": f"{n / clean_t:,.0f}",
+            "clean_peak": mib(clean_peak),
+            "rowwise_clean_s": f"{rowwise_t:.3f}",
+            "clean_speedup": f"{rowwise_t / vectorized_t:.1f}x" + ("" if vectorized_t < rowwise_t else " SLOWER"),
+            "rank_s": f"{rank_t:.4f}",
+            "rank_rows/s": f"{len(df) / rank_t:,.0f}",
+            "rank_peak": mib(rank_peak),
+            "grouped_s": f"{grouped_t:.4f}",
+            f"batch{SCENARIOS}_s": f"{batch_t:.4f}" + ("" if batch_t <= BATCH_BUDGET_S else " OVER"),
+            f"loop{SCENARIOS}_s": f"{loop_t:.4f}",
+            "peers_build_s": f"{peers_t:.3f}",
+            "peer_query_ms": f"{query_ms:.3f}" + ("" if query_ms <= PEER_QUERY_BUDGET_MS else " OVER"),
+        })
+    report(rows)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    run(parser.parse_args().sizes)
@@ -0,0 +1,51 @@
+"""Benchmark the Groww scraper offline by replaying synthetic listing pages.
+
+Run from backend/:  python -m benchmarks.bench_scraper [--sizes 1000 10000] [--browser]
+
+Without --browser only HTML extraction is measured (no Chrome needed).
+With --browser each page is also rendered into headless Chrome and scraped
+with both extraction modes, reporting WebDriver calls per row.
+"""
+import argparse
+import tempfile
+
+from webscrapper import grow
+from benchmarks.harness import SIZES, measure, report, mib
+from benchmarks.synthetic import clean_funds, write_listing_pages
+
+
+def run(sizes=SIZES, browser=False, rows_per_page=100, workers=1):
+    modes = [("html", False)]
+    if browser:
+        modes += [("html", True), ("legacy", True)]
+
+    rows = []
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            write_listing_pages(clean_funds(n), tmp, rows_per_page=rows_per_page)
+            for extraction, use_browser in modes:
+                (funds, _), elapsed, peak = measure(lambda: grow.scrape(
+                    replay=tmp, extraction=extraction, browser=use_browser, workers=workers))
+                stats = grow.last_run_stats
+                rows.append({
+                    "funds": n,
+                    "mode": extraction + ("+chrome" if use_browser else ""),
+                    "rows": len(funds),
+                    "pages": stats["pages_visited"],
+                    "seconds": f"{elapsed:.3f}",
+                    "rows/s": f"{len(funds) / elapsed:,.0f}",
+                    "calls/row": stats["calls_per_row"] if use_browser else 0,
+                    "peak": mib(peak),
+                })
+    report(rows)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--browser", action="store_true", help="also replay pages through Chrome")
+    parser.add_argument("--rows-per-page", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    run(args.sizes, browser=args.browser, rows_per_page=args.rows_per_page, workers=args.workers)
@@ -0,0 +1,98 @@
+"""Benchmark API cold start: import time and time to first byte.
+
+Run from backend/:  python -m benchmarks.bench_startup [--runs 5] [--funds 10000]
+
+"import" runs `import main` in a fresh interpreter and lists which of the
+scraper/feed libraries it loaded. "first byte" starts `uvicorn main:app`
+against a freshly written synthetic dataset (so STARTUP_SCRAPE=auto skips
+the startup scrape) and times, from process spawn, the first answer of
+/api/health and the first 200 of /api/funds/top10, i.e. once the snapshot
+is built. Each figure is the median over --runs.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+import http.client
+
+import storage
+from benchmarks.harness import report
+from benchmarks.bench_load import BACKEND, _free_port
+from benchmarks.synthetic import synthetic_funds
+
+# Modules a process that only serves snapshots should not need
+DEFERRED = ("selenium", "webdriver_manager", "httpx", "feedparser")
+
+_IMPORT_PROBE = (
+    "import sys, time; start = time.perf_counter(); import main; elapsed = time.perf_counter() - start; "
+    "print(elapsed, ','.join(m for m in %r if m in sys.modules))" % (DEFERRED,)
+)
+
+
+def _import_once():
+    out = subprocess.run([sys.executable, "-c", _IMPORT_PROBE], cwd=BACKEND, capture_output=True,
+                         text=True, check=True).stdout.split()
+    return float(out[0]), out[1] if len(out) > 1 else "-"
+
+
+def _first_ok(port: int, path: str, deadline: float) -> float:
+    """Poll path until it answers 200; returns the perf_counter time it did."""
+    while time.perf_counter() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            if response.status == 200:
+                return time.perf_counter()
+        except OSError:
+            pass
+        time.sleep(0.005)
+    raise RuntimeError(f"server on port {port} did not answer {path} in time")
+
+
+def _serve_once(data_path: str, scrape_mode: str):
+    port = _free_port()
+    env = dict(os.environ, FUNDS_DATA=data_path, FUNDS_STORAGE="json", SCRAPE_MODE=scrape_mode)
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND, env=env,
+    )
+    try:
+        health = _first_ok(port, "/api/health", start + 120) - start
+        funds = _first_ok(port, "/api/funds/top10", start + 300) - start
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return health, funds
+
+
+def run(runs=5, funds=10_000, scrape_mode="process"):
+    imports = [_import_once() for _ in range(runs)]
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, "data.json")
+        storage.write_json_atomic(data_path, synthetic_funds(funds))
+        served = [_serve_once(data_path, scrape_mode) for _ in range(runs)]
+    rows = [{
+        "import_main_s": f"{statistics.median(t for t, _ in imports):.3f}",
+        "loaded": imports[0][1] or "-",
+        "first_health_s": f"{statistics.median(h for h, _ in served):.3f}",
+        "first_top10_s": f"{statistics.median(f for _, f in served):.3f}",
+    }]
+    report(rows)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--funds", type=int, default=10_000)
+    parser.add_argument("--scrape-mode", default="process")
+    args = parser.parse_args()
+    run(args.runs, args.funds, args.scrape_mode)
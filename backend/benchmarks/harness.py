@@ -0,0 +1,36 @@
+"""Timing and peak-memory helpers shared by the benchmark scripts."""
+import gc
+import time
+import tracemalloc
+from typing import Callable, Tuple, Any
+
+SIZES = (1_000, 10_000, 100_000)
+
+
+def measure(fn: Callable[[], Any]) -> Tuple[Any, float, int]:
+    """Run fn once; return (result, seconds, peak traced bytes)."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = fn()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def report(rows):
+    """Print benchmark rows (dicts with the same keys) as an aligned table."""
+    if not rows:
+        return
+    keys = list(rows[0])
+    widths = {k: max(len(k), *(len(str(r[k])) for r in rows)) for k in keys}
+    print("  ".join(k.ljust(widths[k]) for k in keys))
+    for r in rows:
+        print("  ".join(str(r[k]).ljust(widths[k]) for k in keys))
+
+
+def mib(n_bytes: int) -> str:
+    return f"{n_bytes / 2**20:.1f} MiB"
@@ -0,0 +1,50 @@
+"""The original row-wise processor.clean_df, kept as a reference for tests and benchmarks."""
+import re
+
+import pandas as pd
+
+import processor
+
+
+def legacy_clean_df(raw):
+    """The original row-wise clean_df, kept as the reference implementation."""
+    df = pd.DataFrame(raw)
+    for col in ['name', 'category', 'one_year_return', 'three_year_return', 'five_year_return', 'expense_ratio', 'aum']:
+        if col not in df.columns:
+            df[col] = pd.NA
+    df['name'] = df['name'].astype(str).str.strip()
+
+    def normalize_category(val):
+        if val is None:
+            return 'Unknown'
+        s = str(val).strip()
+        if not s:
+            return 'Unknown'
+        parts = [p.strip() for p in re.split(r'•|\\u2022', s) if p.strip()]
+        token = parts[0] if len(parts) == 1 else (
+            parts[1] if len(parts) > 1 else parts[0])
+        token_low = token.lower()
+        mapping = {
+            'equity': 'Equity', 'equity - large cap': 'Equity', 'equity - mid cap': 'Equity',
+            'small cap': 'Equity', 'mid cap': 'Equity', 'hybrid': 'Hybrid', 'debt': 'Debt',
+            'commodities': 'Commodities', 'gold': 'Commodities', 'liquid': 'Debt',
+            'tax saver': 'Equity',
+        }
+        token_clean = re.sub(r"\b(fund|direct plan|growth|plan)\b",
+                             '', token_low, flags=re.IGNORECASE).strip()
+        token_clean = re.sub(r'[^a-z0-9\s\-]', '', token_clean)
+        if token_clean in mapping:
+            return mapping[token_clean]
+        return token.strip().title()
+
+    df['category'] = df['category'].apply(normalize_category)
+    df['risk'] = df['category'].apply(processor.assign_risk)
+    df['one_year_return_num'] = df['one_year_return'].apply(processor.parse_percent)
+    df['three_year_return_num'] = df['three_year_return'].apply(processor.parse_percent)
+    df['cagr_num'] = df['five_year_return'].apply(processor.parse_percent)
+    df['expense_ratio_num'] = df['expense_ratio'].apply(processor.parse_number)
+    df['aum_num'] = df['aum'].apply(processor.parse_number)
+    df = df.drop_duplicates(subset=['name'])
+    cols = ['name', 'category', 'risk', 'one_year_return', 'three_year_return', 'five_year_return', 'expense_ratio', 'aum',
+            'one_year_return_num', 'three_year_return_num', 'cagr_num', 'expense_ratio_num', 'aum_num']
+    return df[cols]
@@ -0,0 +1,82 @@
+"""Synthetic fund data and listing pages for tests and benchmarks."""
+import os
+import random
+from html import escape
+from typing import List, Dict
+
+CATEGORIES = ['Small Cap', 'Mid Cap', 'Debt', 'Hybrid', 'Equity - Large Cap', 'Liquid Fund',
+              'Very High Risk • Commodities • 5 ★', 'Flexi Cap', 'Sectoral', 'Gold', '', None]
+
+# Odd return values seen (or plausible) in scraped data
+MESSY_RETURNS = ['NA', 'N/A', '-', '', None, '1Y', '12.5%\n1Y', ' 8.1% ', '1,024.5%', '--', 'abc', 7, 3.5]
+
+
+def synthetic_funds(n: int, seed: int = 7, messy: bool = True) -> List[Dict]:
+    """n raw fund records shaped like scraper output.
+
+    About 2% of names repeat. With messy=True some fields hold the odd
+    values from MESSY_RETURNS and missing categories.
+    """
+    rng = random.Random(seed)
+
+    def ret():
+        if messy and rng.random() < 0.15:
+            return rng.choice(MESSY_RETURNS)
+        return f"{rng.uniform(-20, 60):.1f}%"
+
+    rows = []
+    for i in range(n):
+        rows.append({
+            "name": f" Fund {i % (n - n // 50)} Direct Growth ",
+            "category": rng.choice(CATEGORIES) if messy else rng.choice(CATEGORIES[:10]),
+            "one_year_return": ret(),
+            "three_year_return": ret(),
+            "five_year_return": ret(),
+            "expense_ratio": rng.choice(['0.5%', '1,2', None, 'NA', 0.75]) if messy else f"{rng.uniform(0.1, 2):.2f}",
+        })
+    return rows
+
+
+def _row_html(fund: Dict) -> str:
+    cells = "".join(
+        '<td class="f22YearReturn"><div><div class="contentPrimary">%s</div>'
+        '<div class="contentSecondary">%s</div></div></td>' % (escape(str(fund[key])), label)
+        for key, label in (("one_year_return", "1Y"), ("three_year_return", "3Y"), ("five_year_return", "5Y"))
+    )
+    slug = "-".join(fund["name"].lower().split())
+    return (
+        f'<a class="pos-rel f22Link" href="/mutual-funds/{escape(slug)}"><tr class="f22TableRow">'
+        '<td class="f22SchemeTd"><div class="f22SchemeName valign-wrapper"><div>'
+        f'<div class="contentPrimary bodyLarge">{escape(fund["name"])}</div>'
+        f'<div class="f22ChipRow"><span class="chip chipLabel">{escape(fund["category"])}</span></div>'
+        f'</div></div></td>{cells}</tr></a>\n'
+    )
+
+
+def listing_html(funds: List[Dict]) -> str:
+    """A Groww filter listing page (same markup as the test fixture) for funds."""
+    rows = "".join(_row_html(f) for f in funds)
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Mutual Funds - Filter</title></head>'
+        f'<body><div id="root"><table class="tb10Table"><tbody>\n{rows}</tbody></table></div></body></html>'
+    )
+
+
+def write_listing_pages(funds: List[Dict], directory: str, rows_per_page: int = 100) -> List[str]:
+    """Split funds into listing pages under directory; returns the page paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for page, start in enumerate(range(0, len(funds), rows_per_page)):
+        path = os.path.join(directory, f"page_{page:04d}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(listing_html(funds[start:start + rows_per_page]))
+        paths.append(path)
+    return paths
+
+
+def clean_funds(n: int, seed: int = 7) -> List[Dict]:
+    """n well-formed records (stripped names, string categories) for listing pages."""
+    return [
+        dict(f, name=f["name"].strip())
+        for f in synthetic_funds(n, seed=seed, messy=False)
+    ]
@@ -0,0 +1,57 @@
+"""Pre-serialized response bodies shared by the fund snapshot and the news cache.
+
+A CachedBody is serialized once and keeps its ETag and compressed variants,
+so hot endpoints serve bytes without re-encoding or re-compressing them.
+"""
+import os
+import gzip
+import json
+import hashlib
+from typing import Optional, Dict
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants are produced without it
+    brotli = None
+
+# Bodies smaller than this are not worth compressing (same default as
+# starlette's GZipMiddleware).
+MIN_COMPRESS_SIZE = 500
+
+# Brotli's default quality (11) spends ~10s on a 10k-fund body, and a cold
+# process cannot serve its first snapshot until that finishes; 5 compresses
+# slightly better than gzip in well under a tenth of a second.
+BROTLI_QUALITY = int(os.environ.get("BROTLI_QUALITY", "5"))
+
+
+def dump_json(content) -> bytes:
+    """Serialize content exactly like starlette's JSONResponse does."""
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class CachedBody:
+    """A response body serialized once, with its ETag and compressed variants."""
+
+    def __init__(self, body: bytes, media_type: str):
+        self.body = body
+        self.media_type = media_type
+        self._digest = hashlib.sha256(body).hexdigest()[:32]
+        self.etag = '"%s"' % self._digest
+        self.encoded: Dict[str, bytes] = {}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            if brotli is not None:
+                self.encoded['br'] = brotli.compress(body, quality=BROTLI_QUALITY)
+            self.encoded['gzip'] = gzip.compress(body, mtime=0)
+
+    def etag_for(self, coding: Optional[str] = None) -> str:
+        """Strong ETag of the body as sent with coding (None: uncompressed).
+
+        Each encoding is a different representation, so each gets its own tag.
+        """
+        return self.etag if coding is None else '"%s-%s"' % (self._digest, coding)
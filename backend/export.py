@@ -0,0 +1,113 @@
+"""Streaming fund exports (CSV, NDJSON, Parquet), optionally gzip-compressed.
+
+Each format is a generator of byte chunks over blocks of row positions from
+a FundIndex, so only one block is decoded from the FundTable and serialized
+at a time and memory stays flat however many funds are exported.
+"""
+import io
+import csv
+import json
+import zlib
+from typing import Iterable, Iterator, List
+
+import numpy as np
+
+from processor import FundTable
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: Parquet export is unavailable without it
+    pa = pq = None
+
+# Rows serialized per chunk
+CHUNK_ROWS = 1000
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def iter_csv(table: FundTable, blocks: Iterable[np.ndarray], fields: List[str]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(fields)
+    for block in blocks:
+        writer.writerows(['' if v is None else v for v in row] for row in table.rows(block, fields))
+        yield buf.getvalue().encode('utf-8')
+        buf.seek(0)
+        buf.truncate()
+    # Header-only export when nothing matched
+    if buf.tell():
+        yield buf.getvalue().encode('utf-8')
+
+
+def iter_ndjson(table: FundTable, blocks: Iterable[np.ndarray], fields: List[str]) -> Iterator[bytes]:
+    for block in blocks:
+        yield ''.join(
+            json.dumps(record, ensure_ascii=False) + '\n'
+            for record in table.records(block, fields)
+        ).encode('utf-8')
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object whose contents are drained after each row group."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data, self._chunks = b''.join(self._chunks), []
+        return data
+
+
+def _parquet_schema(fields: List[str]):
+    # float64 for parsed numbers, string for raw text columns
+    return pa.schema([(f, pa.float64() if f.endswith('_num') else pa.string()) for f in fields])
+
+
+def iter_parquet(table: FundTable, blocks: Iterable[np.ndarray], fields: List[str]) -> Iterator[bytes]:
+    """One Parquet row group per block, flushed to the client as it is written."""
+    if pq is None:
+        raise RuntimeError("Parquet export requires pyarrow")
+    schema = _parquet_schema(fields)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    for block in blocks:
+        columns = {
+            f: values if f.endswith('_num') else [None if v is None else str(v) for v in values]
+            for f, values in zip(fields, (table.column(f, block) for f in fields))
+        }
+        writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def gzip_stream(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compress a byte stream into a single gzip member on the fly."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+EXPORTERS = {'csv': iter_csv, 'ndjson': iter_ndjson, 'parquet': iter_parquet}
+
+
+def stream(fmt: str, table: FundTable, blocks: Iterable[np.ndarray], fields: List[str],
+           gzip: bool = False) -> Iterator[bytes]:
+    """Byte chunks of the table's rows at the given block positions in fmt."""
+    chunks = EXPORTERS[fmt](table, blocks, fields)
+    return gzip_stream(chunks) if gzip else chunks
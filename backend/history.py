@@ -0,0 +1,249 @@
+"""Dated history of fund returns for trend charts and point-in-time queries.
+
+history.db stores change points rather than full copies: a fund gets a row
+only on the days its returns differ from its previous row (or it disappears
+from a full scrape, which writes a tombstone). An unchanged daily scrape adds
+just one row to `snapshots`. Returns are kept as integer basis points.
+
+Both query shapes are answered from the (fund_id, day) primary key:
+history() reads one fund's rows, and as_of() picks each fund's latest row on
+or before the day, without touching the other snapshots.
+"""
+import os
+import math
+import sqlite3
+import threading
+from datetime import date, datetime, timezone
+from typing import Optional, List, Dict, Iterable, Union
+
+import processor
+import incremental
+
+RETURN_FIELDS = ("one_year_return", "three_year_return", "five_year_return")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS funds (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    slug TEXT,
+    name TEXT,
+    category TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_history_funds_slug ON funds(slug);
+CREATE INDEX IF NOT EXISTS idx_history_funds_name ON funds(name);
+CREATE TABLE IF NOT EXISTS points (
+    fund_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    present INTEGER NOT NULL,
+    one_year INTEGER,
+    three_year INTEGER,
+    five_year INTEGER,
+    PRIMARY KEY (fund_id, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshots (
+    day TEXT PRIMARY KEY,
+    taken_at TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    changed INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def _latest_sql(inclusive: bool = True) -> str:
+    """Latest row per fund on (or strictly before) a day; one index seek per fund."""
+    return """
+    SELECT f.id, f.key, f.name, f.category, p.day, p.present, p.one_year, p.three_year, p.five_year
+    FROM funds f
+    JOIN points p ON p.fund_id = f.id
+     AND p.day = (SELECT MAX(day) FROM points WHERE fund_id = f.id AND day %s ?)
+    """ % ("<=" if inclusive else "<")
+
+
+def _bps(value) -> Optional[int]:
+    v = processor.parse_percent(value)
+    return None if v is None or math.isnan(v) else int(round(v * 100))
+
+
+def _pct(bps: Optional[int]) -> Optional[float]:
+    return None if bps is None else bps / 100
+
+
+def _slug(key: str) -> Optional[str]:
+    return key.rstrip("/").rsplit("/", 1)[-1] if "/" in key else None
+
+
+def _day(value: Union[str, date, None]) -> str:
+    if value is None:
+        return datetime.now(timezone.utc).date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return date.fromisoformat(value).isoformat()
+
+
+def _point(row: sqlite3.Row) -> Dict:
+    return {
+        "date": row["day"],
+        "one_year": _pct(row["one_year"]),
+        "three_year": _pct(row["three_year"]),
+        "cagr": _pct(row["five_year"]),
+    }
+
+
+class HistoryStore:
+    """history.db next to the dataset; thread-safe via short-lived connections."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        if not self._initialized:
+            conn.executescript(SCHEMA)
+            self._initialized = True
+        return conn
+
+    def append(self, records: Iterable[Dict], day: Union[str, date, None] = None, full: bool = True) -> Dict:
+        """Record the universe as scraped on `day` (today by default).
+
+        Funds whose returns match their latest row are skipped. A second
+        append for the same day replaces that day's rows. With full=False
+        (a partial scrape) funds missing from records are left as they are
+        instead of being marked removed. Returns {"day", "rows", "changed"}.
+        """
+        day = _day(day)
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    ids = {r["key"]: r["id"] for r in conn.execute("SELECT id, key FROM funds")}
+                    # Each fund's latest row before this day
+                    latest = {
+                        r["id"]: (r["present"], r["one_year"], r["three_year"], r["five_year"])
+                        for r in conn.execute(_latest_sql(inclusive=False), (day,))
+                    }
+                    conn.execute("DELETE FROM points WHERE day = ?", (day,))
+
+                    rows, changed, seen = 0, [], set()
+                    for record in records:
+                        key = incremental.fund_key(record)
+                        if not key or key in seen:
+                            continue
+                        seen.add(key)
+                        rows += 1
+                        fund_id = ids.get(key)
+                        if fund_id is None:
+                            fund_id = conn.execute(
+                                "INSERT INTO funds (key, slug, name, category) VALUES (?, ?, ?, ?)",
+                                (key, _slug(key), record.get("name"), record.get("category")),
+                            ).lastrowid
+                            ids[key] = fund_id
+                        values = (1,) + tuple(_bps(record.get(f)) for f in RETURN_FIELDS)
+                        if latest.get(fund_id) != values:
+                            changed.append((fund_id, day) + values)
+
+                    if full:
+                        by_id = {v: k for k, v in ids.items()}
+                        changed.extend(
+                            (fund_id, day, 0, None, None, None)
+                            for fund_id, state in latest.items()
+                            if state[0] and by_id.get(fund_id) not in seen
+                        )
+                    conn.executemany("INSERT INTO points VALUES (?, ?, ?, ?, ?, ?)", changed)
+                    conn.execute(
+                        "INSERT OR REPLACE INTO snapshots (day, taken_at, rows, changed) VALUES (?, ?, ?, ?)",
+                        (day, datetime.now(timezone.utc).isoformat(timespec="seconds"), rows, len(changed)),
+                    )
+            finally:
+                conn.close()
+        return {"day": day, "rows": rows, "changed": len(changed)}
+
+    def _fund(self, conn: sqlite3.Connection, fund: Union[int, str]) -> Optional[sqlite3.Row]:
+        """Look a fund up by history id, key (scheme URL), URL slug or name."""
+        sql = "SELECT id, key, name, category FROM funds WHERE "
+        if isinstance(fund, int) or str(fund).isdigit():
+            row = conn.execute(sql + "id = ?", (int(fund),)).fetchone()
+            if row is not None:
+                return row
+        for column in ("key", "slug", "name"):
+            row = conn.execute(sql + column + " = ? ORDER BY id LIMIT 1", (str(fund),)).fetchone()
+            if row is not None:
+                return row
+        return None
+
+    def history(self, fund: Union[int, str], start: Union[str, date, None] = None,
+                end: Union[str, date, None] = None) -> Optional[Dict]:
+        """A fund's change points between start and end (inclusive); None if unknown.
+
+        The row in effect at `start` is included so a chart can start there.
+        """
+        start = _day(start) if start is not None else None
+        end = _day(end) if end is not None else "9999-12-31"
+        if not os.path.isfile(self.path):
+            return None
+        conn = self._connect()
+        try:
+            row = self._fund(conn, fund)
+            if row is None:
+                return None
+            first = "0000-01-01"
+            if start is not None:
+                anchor = conn.execute("SELECT MAX(day) FROM points WHERE fund_id = ? AND day <= ?",
+                                      (row["id"], start)).fetchone()[0]
+                first = anchor or start
+            points = conn.execute(
+                "SELECT * FROM points WHERE fund_id = ? AND day BETWEEN ? AND ? ORDER BY day",
+                (row["id"], first, end),
+            ).fetchall()
+        finally:
+            conn.close()
+        return {
+            "id": row["id"],
+            "key": row["key"],
+            "name": row["name"],
+            "category": row["category"],
+            "points": [dict(_point(p), present=bool(p["present"])) for p in points],
+        }
+
+    def as_of(self, day: Union[str, date, None] = None) -> List[Dict]:
+        """Every fund present on `day` with the returns in effect then (and since when)."""
+        day = _day(day)
+        if not os.path.isfile(self.path):
+            return []
+        conn = self._connect()
+        try:
+            rows = conn.execute(_latest_sql() + " WHERE p.present = 1 ORDER BY f.id", (day,)).fetchall()
+        finally:
+            conn.close()
+        return [
+            {"id": r["id"], "key": r["key"], "name": r["name"], "category": r["category"],
+             "one_year": _pct(r["one_year"]), "three_year": _pct(r["three_year"]), "cagr": _pct(r["five_year"]),
+             "since": r["day"]}
+            for r in rows
+        ]
+
+    def snapshots(self) -> List[Dict]:
+        """Recorded scrape days, oldest first: [{day, taken_at, rows, changed}]."""
+        if not os.path.isfile(self.path):
+            return []
+        conn = self._connect()
+        try:
+            return [dict(r) for r in conn.execute("SELECT * FROM snapshots ORDER BY day")]
+        finally:
+            conn.close()
+
+
+_stores: Dict[str, HistoryStore] = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(path: str) -> HistoryStore:
+    """Return the (cached) history store at path."""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = HistoryStore(path)
+        return store
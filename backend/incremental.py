@@ -0,0 +1,176 @@
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Optional, List, Dict
+
+# Change log entries kept in data/changes.jsonl (oldest are dropped)
+CHANGE_LOG_MAX_ENTRIES = 500
+
+
+def fund_key(record: Dict) -> str:
+    """Stable identifier for a fund: its scheme URL, falling back to the name."""
+    return record.get("url") or record.get("name") or ""
+
+
+def record_hash(record: Dict) -> str:
+    """Content hash of a raw fund record (key order independent)."""
+    payload = json.dumps(record, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class Delta:
+    """Keys of funds added, changed, removed and unchanged between two scrapes."""
+
+    def __init__(self):
+        self.added: List[str] = []
+        self.changed: List[str] = []
+        self.removed: List[str] = []
+        self.unchanged = 0
+        # new key -> key of the stored record it replaces (differs when a
+        # record stored before URLs were scraped is matched by name)
+        self.replaces: Dict[str, str] = {}
+
+    def is_empty(self) -> bool:
+        return not (self.added or self.changed or self.removed)
+
+    def counts(self) -> Dict[str, int]:
+        return {
+            "added": len(self.added),
+            "changed": len(self.changed),
+            "removed": len(self.removed),
+            "unchanged": self.unchanged,
+        }
+
+
+class DeltaBuilder:
+    """Diffs a scrape against the stored records as rows arrive.
+
+    Only added and changed records are kept (in .records); unchanged rows
+    are counted and dropped, so a streamed scrape never has to be held in
+    memory as a whole.
+    """
+
+    def __init__(self, old: List[Dict]):
+        self.delta = Delta()
+        self.records: List[Dict] = []
+        self.rows = 0
+        self._old = old
+        self._old_by_key = {fund_key(r): r for r in old}
+        # Records stored before URLs were scraped can only be matched by name
+        self._old_by_name = {r.get("name"): r for r in old if not r.get("url")}
+        self._seen = set()
+
+    def add(self, records: List[Dict]) -> None:
+        delta = self.delta
+        for record in records:
+            key = fund_key(record)
+            if key in self._seen:
+                continue
+            self._seen.add(key)
+            self.rows += 1
+
+            previous = self._old_by_key.get(key)
+            if previous is None and record.get("url"):
+                previous = self._old_by_name.get(record.get("name"))
+            if previous is None:
+                delta.added.append(key)
+                self.records.append(record)
+                continue
+
+            delta.replaces[key] = fund_key(previous)
+            if record_hash(previous) == record_hash(record):
+                delta.unchanged += 1
+            else:
+                delta.changed.append(key)
+                self.records.append(record)
+
+    def finish(self, full: bool = True) -> Delta:
+        """The delta so far; removals are only computed for a full scrape."""
+        if full:
+            matched = set(self.delta.replaces.values())
+            self.delta.removed = [k for k in self._old_by_key if k not in matched]
+        return self.delta
+
+
+def diff_funds(old: List[Dict], new: List[Dict], full: bool = True) -> Delta:
+    """Compare a fresh scrape against the stored records.
+
+    Only a full scrape can prove a fund disappeared, so removals are
+    reported only when full is True (not for limit=N runs).
+    """
+    builder = DeltaBuilder(old)
+    builder.add(new)
+    return builder.finish(full)
+
+
+def merge_funds(old: List[Dict], new: List[Dict], delta: Delta) -> List[Dict]:
+    """Apply delta to the stored records, keeping their order.
+
+    Changed funds are replaced in place, removed funds dropped and added
+    funds appended in scrape order.
+    """
+    new_by_key = {}
+    for record in new:
+        new_by_key.setdefault(fund_key(record), record)
+
+    changed_by_old_key = {delta.replaces[k]: new_by_key[k] for k in delta.changed}
+    removed = set(delta.removed)
+
+    merged = []
+    for record in old:
+        key = fund_key(record)
+        if key in removed:
+            continue
+        merged.append(changed_by_old_key.get(key, record))
+    merged.extend(new_by_key[k] for k in delta.added)
+    return merged
+
+
+def append_change_log(path: str, delta: Delta, generation: Optional[int] = None) -> Dict:
+    """Record a delta in the JSON-lines change log and return the entry.
+
+    Entries carry a sequence number that keeps increasing across restarts,
+    so consumers can ask for everything after the last entry they saw.
+    """
+    entries = load_change_log(path)
+    entry = {
+        "seq": entries[-1]["seq"] + 1 if entries else 1,
+        "generation": generation,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "added": delta.added,
+        "changed": delta.changed,
+        "removed": delta.removed,
+    }
+    entries.append(entry)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if len(entries) > CHANGE_LOG_MAX_ENTRIES:
+        with open(path, "w", encoding="utf-8") as f:
+            for e in entries[-CHANGE_LOG_MAX_ENTRIES:]:
+                f.write(json.dumps(e, ensure_ascii=False) + "\n")
+    else:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    return entry
+
+
+def load_change_log(path: str, since: int = 0) -> List[Dict]:
+    """Change log entries with seq greater than since."""
+    if not os.path.isfile(path):
+        return []
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                logging.warning("Skipping malformed change log line in %s", path)
+                continue
+            if entry.get("seq", 0) > since:
+                entries.append(entry)
+    return entries
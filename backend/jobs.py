@@ -0,0 +1,500 @@
+"""Scrape job manager: one in-flight scrape at a time, plus periodic refreshes.
+
+Update requests that arrive while a scrape is queued or running join that
+job instead of starting another browser. A lock file next to the dataset
+extends the guarantee across API worker processes: a job that finds the
+lock held by another process finishes as "skipped". Each finished job's
+outcome is written to data/last_run.json so it survives restarts, and the
+running job's progress to data/current_job.json so every worker can report it.
+
+SCRAPE_MODE picks where scrapes run:
+  process  (default) jobs scrape in a long-lived child process, so Chrome
+           driving and parsing never compete with the API for the GIL and
+           the browser stays warm between jobs
+  thread   in a thread of the calling process
+  external the API never scrapes; run `python -m jobs daemon` (or
+           `python -m jobs run` from cron) alongside it instead
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import signal
+import logging
+import argparse
+import threading
+import multiprocessing
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional, Dict, List, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: the single-flight guard is per process only
+    fcntl = None
+
+import metrics
+import storage
+import scraper_adapter
+
+PROCESS, THREAD, EXTERNAL = "process", "thread", "external"
+SCRAPE_MODE = os.environ.get("SCRAPE_MODE", PROCESS)
+# Seconds between scheduled scrapes (0 disables the scheduler)
+SCRAPE_INTERVAL = float(os.environ.get("SCRAPE_INTERVAL", "0"))
+# Whether the API scrapes when it starts: "auto" skips it while the dataset
+# is younger than STARTUP_SCRAPE_MAX_AGE seconds; "always" or "never"
+STARTUP_SCRAPE = os.environ.get("STARTUP_SCRAPE", "auto")
+STARTUP_SCRAPE_MAX_AGE = float(os.environ.get("STARTUP_SCRAPE_MAX_AGE", str(6 * 3600)))
+# Seconds a scrape may run in the scraper process before it is killed (0 = no limit)
+SCRAPE_TIMEOUT = float(os.environ.get("SCRAPE_TIMEOUT", "3600"))
+# Seconds POST /api/update?wait=true waits before answering 202 with the job's status
+UPDATE_WAIT_TIMEOUT = float(os.environ.get("UPDATE_WAIT_TIMEOUT", "300"))
+# Finished jobs kept for /api/update/{job_id}
+JOB_HISTORY = 20
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, SKIPPED = "queued", "running", "succeeded", "failed", "skipped"
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def last_run_path() -> str:
+    return os.path.join(os.path.dirname(scraper_adapter.BACKEND_DATA), 'last_run.json')
+
+
+def lock_path() -> str:
+    return os.path.join(os.path.dirname(scraper_adapter.BACKEND_DATA), 'scrape.lock')
+
+
+def current_job_path() -> str:
+    return os.path.join(os.path.dirname(scraper_adapter.BACKEND_DATA), 'current_job.json')
+
+
+def _read_json(path: str) -> Optional[Dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _pid_alive(pid) -> bool:
+    try:
+        os.kill(int(pid), 0)
+    except (OSError, TypeError, ValueError):
+        return False
+    return True
+
+
+def _scraper_loop(conn, data_path: str, backend: str) -> None:
+    """Entry point of the scraper process: runs scrapes sent over conn until told to stop.
+
+    The process outlives individual jobs so grow.browsers can keep a warm
+    browser between them.
+    """
+    if hasattr(os, "setsid"):
+        # Own process group, so a timed-out scrape is killed along with its browsers
+        os.setsid()
+    scraper_adapter.BACKEND_DATA = data_path
+    scraper_adapter.STORAGE_BACKEND = backend
+    send_lock = threading.Lock()
+
+    def progress(*args):
+        # grow.scrape reports from its worker threads
+        with send_lock:
+            conn.send(("progress",) + args)
+
+    while True:
+        try:
+            params = conn.recv()
+        except EOFError:
+            break
+        if params is None:
+            break
+        path = scraper_adapter.run_scraper(progress=progress, **params)
+        with send_lock:
+            conn.send(("done", path, dict(scraper_adapter.last_delta), metrics.registry.drain()))
+    conn.close()
+
+
+class ScraperProcess:
+    """A long-lived spawned process that runs one scrape at a time."""
+
+    def __init__(self, target=_scraper_loop):
+        self._target = target
+        self._proc = None
+        self._conn = None
+
+    def _ensure_started(self) -> None:
+        if self._proc is not None and self._proc.is_alive():
+            return
+        ctx = multiprocessing.get_context("spawn")
+        self._conn, child = ctx.Pipe()
+        self._proc = ctx.Process(target=self._target, name="scraper", daemon=True,
+                                 args=(child, scraper_adapter.BACKEND_DATA, scraper_adapter.STORAGE_BACKEND))
+        self._proc.start()
+        child.close()
+
+    def run(self, params: Dict, progress, timeout: float = SCRAPE_TIMEOUT) -> Tuple[Optional[str], Dict]:
+        """Run one scrape in the scraper process; returns (path, delta counts).
+
+        After timeout seconds (0: never) the process is killed and
+        TimeoutError raised; the next run starts a fresh one.
+        """
+        self._ensure_started()
+        self._conn.send(params)
+        deadline = time.monotonic() + timeout if timeout > 0 else None
+        while True:
+            if deadline is not None and not self._conn.poll(max(0.0, deadline - time.monotonic())):
+                self._kill()
+                raise TimeoutError(f"Scrape timed out after {timeout:g}s")
+            try:
+                message = self._conn.recv()
+            except EOFError:
+                self._proc.join()
+                exitcode = self._proc.exitcode
+                self._proc = None
+                raise RuntimeError(f"Scraper process exited with code {exitcode}")
+            if message[0] == "progress":
+                progress(*message[1:])
+            else:
+                _, path, delta, recorded = message
+                metrics.registry.merge(recorded)
+                break
+
+        if path and any(delta.get(k) for k in ("added", "changed", "removed")):
+            # The child bumped its own counter; make this process's caches rebuild too
+            scraper_adapter.bump_generation()
+        return path, delta
+
+    def _kill(self) -> None:
+        proc = self._proc
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except (AttributeError, OSError):
+            # No process groups here, or the child has not started its own yet
+            proc.kill()
+        proc.join(5)
+        self._conn.close()
+        self._proc = self._conn = None
+
+    def close(self) -> None:
+        if self._proc is None:
+            return
+        try:
+            self._conn.send(None)
+        except OSError:
+            pass
+        self._proc.join(timeout=30)
+        if self._proc.is_alive():
+            self._proc.terminate()
+        self._conn.close()
+        self._proc = self._conn = None
+
+
+class ScrapeJob:
+    """One scrape run and its progress."""
+
+    def __init__(self, params: Dict, trigger: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.params = params
+        self.trigger = trigger
+        self.state = QUEUED
+        self.created_at = _now_iso()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.shards_done = 0
+        # Unknown (None) while walking the whole listing
+        self.shards_total = params.get("pages", 1) or None
+        self.rows = 0
+        self.delta: Dict = {}
+        self.error: Optional[str] = None
+        self._started: Optional[float] = None
+        self._elapsed: Optional[float] = None
+        self.done = threading.Event()
+
+    def progress(self, shards_done: int, shards_total: int, rows: int) -> None:
+        self.shards_done, self.shards_total, self.rows = shards_done, shards_total, rows
+
+    def elapsed(self) -> Optional[float]:
+        if self._elapsed is not None:
+            return self._elapsed
+        if self._started is None:
+            return None
+        return time.monotonic() - self._started
+
+    def eta(self) -> Optional[float]:
+        """Seconds left, extrapolated from the shards finished so far."""
+        if self.state != RUNNING or not self.shards_done or not self.shards_total:
+            return None
+        per_shard = self.elapsed() / self.shards_done
+        return max(0.0, per_shard * (self.shards_total - self.shards_done))
+
+    def to_dict(self) -> Dict:
+        elapsed, eta = self.elapsed(), self.eta()
+        return {
+            "id": self.id,
+            "status": self.state,
+            "trigger": self.trigger,
+            "params": dict(self.params),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "shards_done": self.shards_done,
+            "shards_total": self.shards_total,
+            "rows": self.rows,
+            "elapsed": round(elapsed, 1) if elapsed is not None else None,
+            "eta": round(eta, 1) if eta is not None else None,
+            "delta": dict(self.delta),
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """Runs scrape jobs one at a time on a background thread."""
+
+    def __init__(self, interval: float = SCRAPE_INTERVAL, run=None, mode: str = SCRAPE_MODE):
+        self.interval = interval
+        # Injected in tests; runs in a thread instead of the configured mode
+        self._run = run
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, ScrapeJob]" = OrderedDict()
+        self._current: Optional[ScrapeJob] = None
+        self._stop = threading.Event()
+        self._scheduler: Optional[threading.Thread] = None
+        self.next_run_at: Optional[str] = None
+        self._scraper: Optional[ScraperProcess] = None
+
+    def submit(self, trigger: str = "api", **params) -> Tuple[ScrapeJob, bool]:
+        """Start a scrape, or join the one already queued/running.
+
+        Returns (job, coalesced); coalesced is True when an existing job was
+        returned, in which case params are ignored.
+        """
+        with self._lock:
+            if self._current is not None:
+                return self._current, True
+            job = ScrapeJob(params, trigger)
+            self._current = job
+            self._jobs[job.id] = job
+            while len(self._jobs) > JOB_HISTORY:
+                self._jobs.popitem(last=False)
+        threading.Thread(target=self._execute, args=(job,), name=f"scrape-{job.id}", daemon=True).start()
+        return job, False
+
+    def get(self, job_id: str) -> Optional[ScrapeJob]:
+        return self._jobs.get(job_id)
+
+    def current(self) -> Optional[ScrapeJob]:
+        return self._current
+
+    @property
+    def scrapes_here(self) -> bool:
+        """False when scraping is left to a separate daemon (SCRAPE_MODE=external)."""
+        return self.mode != EXTERNAL
+
+    def jobs(self) -> List[ScrapeJob]:
+        return list(self._jobs.values())
+
+    def status(self) -> Dict:
+        current = self._current
+        return {
+            "current": current.to_dict() if current is not None else self.running_elsewhere(),
+            "last_run": self.last_run(),
+            "interval": self.interval or None,
+            "next_run_at": self.next_run_at,
+        }
+
+    def last_run(self) -> Optional[Dict]:
+        """Outcome of the most recent finished job, possibly from an earlier process."""
+        return _read_json(last_run_path())
+
+    def data_age(self) -> Optional[float]:
+        """Seconds since the dataset last changed or a scrape last succeeded; None without a dataset.
+
+        An incremental scrape that finds nothing new leaves the dataset
+        untouched, so the last successful run counts as a refresh too.
+        """
+        updated = scraper_adapter.get_store().updated_at()
+        if updated is None:
+            return None
+        last = self.last_run() or {}
+        if last.get("status") == SUCCEEDED and last.get("finished_at"):
+            try:
+                updated = max(updated, datetime.fromisoformat(last["finished_at"]).timestamp())
+            except ValueError:
+                pass
+        return max(0.0, time.time() - updated)
+
+    def startup_scrape_needed(self, policy: str = STARTUP_SCRAPE, max_age: float = STARTUP_SCRAPE_MAX_AGE) -> bool:
+        """Whether startup should queue a scrape under STARTUP_SCRAPE's policy."""
+        if policy == "always":
+            return True
+        if policy == "never":
+            return False
+        age = self.data_age()
+        return age is None or age > max_age
+
+    def running_elsewhere(self) -> Optional[Dict]:
+        """Progress of a job running in another process (another API worker or the daemon)."""
+        job = _read_json(current_job_path())
+        if job is None or not _pid_alive(job.get("pid")):
+            return None
+        return job
+
+    def _execute(self, job: ScrapeJob) -> None:
+        lock_file = self._acquire_process_lock()
+        try:
+            if lock_file is False:
+                job.state = SKIPPED
+                job.error = "A scrape is already running in another worker process"
+                logging.info("Scrape job %s skipped: %s", job.id, job.error)
+                return
+            job.state = RUNNING
+            job.started_at = _now_iso()
+            job._started = time.monotonic()
+            logging.info("Scrape job %s started (%s, %s, %s)", job.id, job.trigger, self.mode, job.params)
+            self._publish(job)
+
+            def progress(*args):
+                job.progress(*args)
+                self._publish(job)
+
+            try:
+                if self._run is None and self.mode == PROCESS:
+                    if self._scraper is None:
+                        self._scraper = ScraperProcess()
+                    path, delta = self._scraper.run(job.params, progress)
+                else:
+                    path = (self._run or scraper_adapter.run_scraper)(progress=progress, **job.params)
+                    delta = scraper_adapter.last_delta
+            except Exception as e:
+                logging.exception("Scrape job %s crashed", job.id)
+                path, delta, job.error = None, {}, str(e)
+            job.delta = dict(delta) if path else {}
+            if path:
+                job.state = SUCCEEDED
+            else:
+                job.state = FAILED
+                job.error = job.error or "Scraper produced no data"
+        finally:
+            if job._started is not None:
+                self._unpublish()
+            if lock_file:
+                lock_file.close()
+            if job._started is not None:
+                job._elapsed = time.monotonic() - job._started
+            job.finished_at = _now_iso()
+            with self._lock:
+                if self._current is job:
+                    self._current = None
+            if job.state != SKIPPED:
+                self._persist(job)
+            job.done.set()
+            logging.info("Scrape job %s %s", job.id, job.state)
+
+    def _acquire_process_lock(self):
+        """Open file holding the cross-process scrape lock, False if another
+        process holds it, or None where file locking is unavailable."""
+        if fcntl is None:
+            return None
+        path = lock_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        f = open(path, "a")
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        return f
+
+    def _publish(self, job: ScrapeJob) -> None:
+        try:
+            storage.write_json_atomic(current_job_path(), dict(job.to_dict(), pid=os.getpid()))
+        except OSError:
+            logging.warning("Could not record scrape progress", exc_info=True)
+
+    def _unpublish(self) -> None:
+        try:
+            os.remove(current_job_path())
+        except OSError:
+            pass
+
+    def _persist(self, job: ScrapeJob) -> None:
+        try:
+            storage.write_json_atomic(last_run_path(), job.to_dict())
+        except OSError:
+            logging.warning("Could not record last scrape outcome", exc_info=True)
+
+    # ---- periodic refreshes ----
+
+    def start_scheduler(self, **params) -> None:
+        """Submit a scrape every `interval` seconds (no-op when interval is 0)."""
+        if self.interval <= 0 or self._scheduler is not None:
+            return
+        self._stop.clear()
+        self._scheduler = threading.Thread(target=self._schedule_loop, kwargs=params,
+                                           name="scrape-scheduler", daemon=True)
+        self._scheduler.start()
+
+    def close(self) -> None:
+        """Stop the scheduler and the scraper process (its warm browser quits with it)."""
+        self.stop_scheduler()
+        if self._scraper is not None:
+            self._scraper.close()
+            self._scraper = None
+
+    def stop_scheduler(self) -> None:
+        self._stop.set()
+        if self._scheduler is not None:
+            self._scheduler.join(timeout=5)
+            self._scheduler = None
+        self.next_run_at = None
+
+    def _schedule_loop(self, **params) -> None:
+        while True:
+            self.next_run_at = datetime.fromtimestamp(
+                time.time() + self.interval, timezone.utc).isoformat(timespec="seconds")
+            if self._stop.wait(self.interval):
+                return
+            self.submit(trigger="schedule", **params)
+
+
+manager = JobManager()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Groww scrapes outside the API process")
+    sub = parser.add_subparsers(dest="command", required=True)
+    once = sub.add_parser("run", help="scrape once and exit (non-zero unless it succeeded)")
+    daemon = sub.add_parser("daemon", help="scrape now and then every --interval seconds")
+    daemon.add_argument("--interval", type=float, default=SCRAPE_INTERVAL or 6 * 3600)
+    for p in (once, daemon):
+        p.add_argument("--pages", type=int, default=1, help="listing pages (0 = the whole listing)")
+        p.add_argument("--workers", type=int, default=1)
+        p.add_argument("--limit", type=int, default=0)
+        p.add_argument("--headed", action="store_true", help="show the browser window")
+    args = parser.parse_args(argv)
+    params = {"headless": not args.headed, "limit": args.limit, "workers": args.workers, "pages": args.pages}
+
+    if args.command == "run":
+        job, _ = JobManager(interval=0, mode=THREAD).submit(trigger="cli", **params)
+        job.done.wait()
+        print(json.dumps(job.to_dict(), indent=2))
+        return 0 if job.state == SUCCEEDED else 1
+
+    jobs = JobManager(interval=args.interval, mode=THREAD)
+    jobs.submit(trigger="daemon", **params)
+    jobs.start_scheduler(**params)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        jobs.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,23 @@
-import threading
-import requests
-import feedparser
+import asyncio
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.encoders import jsonable_encoder
-from fastapi.responses import StreamingResponse, JSONResponse
-from fastapi import FastAPI, BackgroundTasks, HTTPException, Query, Response
-from typing import Optional
-from io import StringIO
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from fastapi.routing import APIRoute
+from typing import Annotated, Dict, List, Optional, Tuple
+from pydantic import BaseModel, Field
 import logging
 import json
+import base64
 import scraper_adapter
 import processor
+import snapshot
+import bodies
+import incremental
+import export
+import news
+import jobs
+import metrics
+import admission
 import os
 import sys
 
@@ -19,7 +26,18 @@ sys.path.insert(0, os.path.abspath(
 
 logging.basicConfig(level=logging.INFO)
 
+
+class ProfiledRoute(APIRoute):
+    """Route whose sync endpoint is followed onto its threadpool worker by the request profiler."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if not asyncio.iscoroutinefunction(endpoint):
+            endpoint = metrics.follow_thread(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
 app = FastAPI(title="Mutual Fund Ranker API")
+app.router.route_class = ProfiledRoute
 
 # Allow CORS
 app.add_middleware(
@@ -29,26 +47,113 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
-def run_scraper_in_background():
-    """Run scraper in a separate thread."""
-    logging.info("Triggering background scraper update...")
-    scraper_adapter.run_scraper(headless=True, limit=0)
+# Per-route latency histograms for /api/metrics, plus the opt-in X-Profile hook
+app.add_middleware(
+    metrics.MetricsMiddleware,
+    profile_dir=lambda: os.path.join(os.path.dirname(scraper_adapter.BACKEND_DATA), "profiles"),
+)
 
 @app.on_event("startup")
 async def startup_event():
-    """Run scraper on startup in a background thread."""
-    thread = threading.Thread(target=run_scraper_in_background)
-    thread.start()
-
-
-# --------------------------------------------
-# ⚡ Always load latest data.json
-# --------------------------------------------
-def load_fresh():
-    data = scraper_adapter.load_latest_json()
-    # Don't raise error if file not found, just return None
-    return data
+    """Queue a scrape unless the dataset is fresh, start scheduled refreshes and warm the snapshot.
+
+    Nothing here waits: the snapshot is built in the executor, and the
+    scraper and feed libraries are only imported once a scrape or news
+    fetch needs them. Feeds are fetched at startup only with NEWS_PREFETCH=1.
+    """
+    if jobs.manager.scrapes_here:
+        if jobs.manager.startup_scrape_needed():
+            logging.info("Triggering background scraper update...")
+            jobs.manager.submit(trigger="startup", headless=True, limit=0)
+        else:
+            logging.info("Dataset is fresh; skipping the startup scrape (STARTUP_SCRAPE=%s)", jobs.STARTUP_SCRAPE)
+        jobs.manager.start_scheduler(headless=True, limit=0)
+    asyncio.get_running_loop().run_in_executor(None, snapshot.current)
+    if news.NEWS_PREFETCH:
+        asyncio.ensure_future(news.service.refresh_all())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    jobs.manager.close()
+    snapshot.shutdown_pool()
+    await news.service.aclose()
+
+
+def _accepted_encodings(header: str) -> set:
+    """Parse Accept-Encoding into the set of codings the client allows."""
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def serve_cached(request: Request, cached: bodies.CachedBody, headers: Optional[dict] = None) -> Response:
+    """Serve a pre-serialized body, answering If-None-Match with 304.
+
+    The ETag names the representation sent, so it differs per Content-Encoding.
+    """
+    headers = dict(headers or {})
+    accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+    coding = next((c for c in ("br", "gzip") if c in accepted and c in cached.encoded), None)
+    headers["ETag"] = cached.etag_for(coding)
+    headers["Cache-Control"] = "no-cache"
+    headers["Vary"] = "Accept-Encoding"
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        if "*" in tags or headers["ETag"] in tags:
+            return Response(status_code=304, headers=headers)
+
+    if coding is not None:
+        headers["Content-Encoding"] = coding
+        return Response(content=cached.encoded[coding], media_type=cached.media_type, headers=headers)
+    return Response(content=cached.body, media_type=cached.media_type, headers=headers)
+
+
+def json_response(content) -> JSONResponse:
+    """JSONResponse with its rendering recorded as the serialize stage."""
+    with metrics.timer("serialize"):
+        return JSONResponse(content=content)
+
+
+# Concurrent identical uncached rankings (same snapshot and parameters) are
+# computed and serialized once and the body is shared.
+rankings = admission.SingleFlight("ranking")
+# Batch scoring bodies by (snapshot key, request); cleared once this many are kept
+MAX_MEMO_BODIES = 32
+batch_bodies: Dict[Tuple, bytes] = {}
+
+
+def coalesced_json(key, compute, memo: Optional[dict] = None) -> Response:
+    """JSON response for compute(), shared with concurrent calls for the same key.
+
+    With memo, the body is also kept there under key for later calls.
+    """
+    body = memo.get(key) if memo is not None else None
+    if body is None:
+        body = rankings.do(key, lambda: json_response(compute()).body)
+        if memo is not None:
+            if len(memo) >= MAX_MEMO_BODIES:
+                memo.clear()
+            memo[key] = body
+    return Response(content=body, media_type="application/json")
+
+
+@app.get("/api/metrics")
+def get_metrics():
+    """Request, processing and scrape timings in Prometheus text format."""
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
 
 
 @app.get("/api/health")
@@ -69,55 +174,414 @@ def head_root():
 # --------------------------------------------
 # ⭐ UPDATE (scraper trigger)
 # --------------------------------------------
-@app.post("/api/update")
-def update_data(background: BackgroundTasks, headless: bool = True, limit: int = 0):
-    background.add_task(scraper_adapter.run_scraper, headless, limit)
-    return {"status": "update started"}
+@app.post("/api/update", dependencies=[Depends(admission.admit(admission.UPDATE))])
+def update_data(
+    headless: bool = True,
+    limit: int = 0,
+    workers: int = Query(1, ge=1, le=8),
+    pages: int = Query(1, ge=0, le=100, description="Listing pages to scrape; 0 walks the whole listing"),
+    wait: bool = False,
+):
+    """Start a scrape job, or join the one already in flight."""
+    if not jobs.manager.scrapes_here:
+        raise HTTPException(status_code=409, detail="Scraping runs in the scrape daemon (SCRAPE_MODE=external)")
+    job, coalesced = jobs.manager.submit(headless=headless, limit=limit, workers=workers, pages=pages)
+    if wait:
+        # Block until the job finishes and report its delta counts
+        if not job.done.wait(jobs.UPDATE_WAIT_TIMEOUT or None):
+            return JSONResponse(status_code=202, content={"status": job.state, "job": job.to_dict()})
+        return {"status": "updated" if job.state == jobs.SUCCEEDED else job.state,
+                "delta": dict(job.delta), "job": job.to_dict()}
+    # The last finished run is persisted by whichever process ran it (scraper child, daemon, ...)
+    last_run = jobs.manager.last_run() or {}
+    return {"status": "already running" if coalesced else "update started", "job": job.to_dict(),
+            "last_delta": last_run.get("delta", {})}
+
+
+@app.get("/api/update/status")
+def update_status():
+    """The in-flight job (if any), the last finished run and the schedule."""
+    return jobs.manager.status()
+
+
+@app.get("/api/update/{job_id}")
+def update_job(job_id: str):
+    job = jobs.manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job.to_dict()
+
+
+@app.get("/api/versions")
+def get_versions():
+    """Kept dataset versions (oldest first) that can be pinned or restored."""
+    return scraper_adapter.list_versions()
+
+
+@app.post("/api/versions/{version}/rollback")
+def rollback_version(version: int):
+    if not scraper_adapter.rollback(version):
+        raise HTTPException(status_code=404, detail=f"Unknown data version {version}")
+    return {"status": "rolled back", "version": version}
+
+
+@app.get("/api/changes")
+def get_changes(since: int = 0):
+    """Fund change log entries after sequence number `since`."""
+    return incremental.load_change_log(scraper_adapter.change_log_path(), since)
 
 
 # --------------------------------------------
 # ⭐ Return updated list of all funds
 # --------------------------------------------
+def get_snapshot(version: Optional[int] = None) -> snapshot.FundSnapshot:
+    """Latest snapshot, or the pinned data version (404 if it is not kept)."""
+    snap = snapshot.current(version)
+    if snap is None:
+        raise HTTPException(status_code=404, detail=f"Unknown data version {version}")
+    return snap
+
+
+def _cursor_tag(snap: snapshot.FundSnapshot) -> str:
+    return snap.funds.etag.strip('"')[:12]
+
+
+def encode_cursor(snap: snapshot.FundSnapshot, offset: int) -> str:
+    """Opaque page cursor tied to the snapshot it was issued for."""
+    token = f"{offset}:{_cursor_tag(snap)}"
+    return base64.urlsafe_b64encode(token.encode()).decode().rstrip("=")
+
+
+def decode_cursor(snap: snapshot.FundSnapshot, cursor: str) -> int:
+    try:
+        token = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        offset, _, tag = token.partition(":")
+        offset = int(offset)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if offset < 0 or tag != _cursor_tag(snap):
+        raise HTTPException(status_code=400, detail="Cursor is from an older dataset; restart from the first page")
+    return offset
+
+
+class FundFilters:
+    """Selection parameters shared by /api/funds and /api/export."""
+
+    def __init__(
+        self,
+        category: Optional[str] = None,
+        risk: Optional[str] = None,
+        sort: Optional[str] = Query(None, description="Sort key, prefix with '-' for descending (e.g. -cagr)"),
+        fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+        min_cagr: Optional[float] = None,
+        max_cagr: Optional[float] = None,
+        min_three_year: Optional[float] = None,
+        max_three_year: Optional[float] = None,
+        min_one_year: Optional[float] = None,
+        max_one_year: Optional[float] = None,
+        min_expense_ratio: Optional[float] = None,
+        max_expense_ratio: Optional[float] = None,
+        min_aum: Optional[float] = None,
+        max_aum: Optional[float] = None,
+    ):
+        self.category = category
+        self.risk = risk
+        self.sort, self.descending = (sort[1:], True) if sort and sort.startswith("-") else (sort, False)
+        self.fields = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+        self.ranges = {
+            "cagr": (min_cagr, max_cagr),
+            "three_year": (min_three_year, max_three_year),
+            "one_year": (min_one_year, max_one_year),
+            "expense_ratio": (min_expense_ratio, max_expense_ratio),
+            "aum": (min_aum, max_aum),
+        }
+
+    def is_empty(self) -> bool:
+        return not (self.category or self.risk or self.sort or self.fields) and all(
+            bound is None for pair in self.ranges.values() for bound in pair)
+
+    def selection(self) -> dict:
+        """Keyword arguments for FundIndex.page / iter_positions."""
+        return {"category": self.category, "risk": self.risk, "ranges": self.ranges,
+                "sort": self.sort, "descending": self.descending}
+
+
 @app.get("/api/funds")
-def get_funds():
+def get_funds(
+    request: Request,
+    version: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    filters: FundFilters = Depends(),
+):
+    """All cleaned funds, or a filtered page when any paging/filter parameter is given.
+
+    Paged responses are {"items", "next_cursor", "total"}; pass next_cursor
+    back as `cursor` with the same filters to fetch the following page.
+    """
     try:
-        raw = load_fresh()
-        if raw is None:
-            # Return empty list if no data.json exists yet
-            return JSONResponse(content=[])
-        cleaned = processor.clean_and_normalize(raw)
-        return JSONResponse(content=jsonable_encoder(cleaned))
+        snap = get_snapshot(version)
+        if limit is None and cursor is None and filters.is_empty():
+            return serve_cached(request, snap.funds)
+
+        try:
+            items, next_offset, total = snap.index.page(
+                offset=decode_cursor(snap, cursor) if cursor else 0, limit=limit or 50,
+                fields=filters.fields, **filters.selection(),
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return json_response({
+            "items": items,
+            "next_cursor": encode_cursor(snap, next_offset) if next_offset is not None else None,
+            "total": total,
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         logging.exception("Error in /api/funds")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/funds/top10")
-def get_top10():
+def get_top10(
+    request: Request,
+    cagr_weight: float = Query(processor.DEFAULT_WEIGHTS[0], ge=0),
+    three_year_weight: float = Query(processor.DEFAULT_WEIGHTS[1], ge=0),
+    one_year_weight: float = Query(processor.DEFAULT_WEIGHTS[2], ge=0),
+    category: Optional[str] = None,
+    risk: Optional[str] = None,
+    normalization: str = Query("minmax", description="minmax, percentile or robust_z"),
+    group_by: Optional[str] = Query(None, description="Normalize within category or risk buckets"),
+    version: Optional[int] = None,
+):
     try:
-        raw = load_fresh()
-        df = processor.clean_df(raw)
-        ranked = processor.rank_funds(df, top_n=10)
-        return JSONResponse(content=jsonable_encoder(ranked))
+        snap = get_snapshot(version)
+        weights = (cagr_weight, three_year_weight, one_year_weight)
+        if (weights == processor.DEFAULT_WEIGHTS and not category and not risk
+                and normalization == "minmax" and not group_by):
+            return serve_cached(request, snap.top10)
+
+        def rank():
+            with metrics.timer("score"):
+                return snap.scorer.records(top_n=10, weights=weights, category=category, risk=risk,
+                                           normalization=normalization, group_by=group_by)
+        try:
+            return coalesced_json(("top10", snap.key, weights, category, risk, normalization, group_by), rank)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         logging.exception("Error in /api/funds/top10")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/export/csv")
-def export_csv():
+@app.get("/api/funds/top")
+def get_top_per_group(
+    request: Request,
+    n: int = Query(snapshot.TOP_PER_GROUP, ge=1, le=50),
+    group_by: str = Query(snapshot.TOP_GROUP_BY, description="category or risk"),
+    normalization: str = Query(snapshot.TOP_NORMALIZATION, description="minmax, percentile or robust_z"),
+    cagr_weight: float = Query(processor.DEFAULT_WEIGHTS[0], ge=0),
+    three_year_weight: float = Query(processor.DEFAULT_WEIGHTS[1], ge=0),
+    one_year_weight: float = Query(processor.DEFAULT_WEIGHTS[2], ge=0),
+    category: Optional[str] = None,
+    risk: Optional[str] = None,
+    version: Optional[int] = None,
+):
+    """Top n funds of every category (or risk bucket), scored against their own bucket."""
     try:
-        raw = load_fresh()
-        df = processor.clean_df(raw)
-        top = processor.rank_funds_df(df, top_n=10)
+        snap = get_snapshot(version)
+        weights = (cagr_weight, three_year_weight, one_year_weight)
+        if ((n, group_by, normalization, weights) == (snapshot.TOP_PER_GROUP, snapshot.TOP_GROUP_BY,
+                                                      snapshot.TOP_NORMALIZATION, processor.DEFAULT_WEIGHTS)
+                and not category and not risk):
+            return serve_cached(request, snap.top_by_category)
+
+        def rank():
+            with metrics.timer("score"):
+                return snapshot.grouped_top(snap.scorer, n, weights, group_by, normalization, category, risk)
+        try:
+            return coalesced_json(("top", snap.key, n, weights, group_by, normalization, category, risk), rank)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.exception("Error in /api/funds/top")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        csv_io = StringIO()
-        top.to_csv(csv_io, index=False)
-        csv_io.seek(0)
 
-        return StreamingResponse(
-            iter([csv_io.getvalue()]),
-            media_type="text/csv",
+@app.get("/api/funds/{fund_id}/history")
+def get_fund_history(fund_id: str, start: Optional[str] = None, end: Optional[str] = None):
+    """Dated return change points of one fund (history id, URL slug or name)."""
+    try:
+        result = scraper_adapter.history_store().history(fund_id, start, end)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"No history for fund {fund_id}")
+    return result
+
+
+@app.get("/api/funds/{fund_id}/peers")
+def get_fund_peers(fund_id: str, k: int = Query(5, ge=1, le=50), version: Optional[int] = None):
+    """The k funds in the same category with the closest return profile."""
+    try:
+        snap = get_snapshot(version)
+        pos = snap.peers.find(fund_id)
+        if pos is None:
+            raise HTTPException(status_code=404, detail=f"Unknown fund {fund_id}")
+        return json_response({"fund": snap.peers.describe(pos), "peers": snap.peers.peers(pos, k)})
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.exception("Error in /api/funds/{fund_id}/peers")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+MAX_COMPARE = 10
+
+
+@app.get("/api/compare")
+def compare_funds(
+    ids: str = Query(..., description="Comma-separated fund ids (URL slugs) or names"),
+    version: Optional[int] = None,
+):
+    """Side-by-side records with in-category percentiles and pairwise profile distances."""
+    try:
+        wanted = [i.strip() for i in ids.split(",") if i.strip()]
+        if not wanted or len(wanted) > MAX_COMPARE:
+            raise HTTPException(status_code=400, detail=f"Pass between 1 and {MAX_COMPARE} fund ids")
+        snap = get_snapshot(version)
+        positions = [snap.peers.find(i) for i in wanted]
+        unknown = [i for i, pos in zip(wanted, positions) if pos is None]
+        if unknown:
+            raise HTTPException(status_code=404, detail=f"Unknown funds {unknown}")
+        return json_response({
+            "funds": [snap.peers.describe(pos) for pos in positions],
+            # Profile distances are only meaningful within one category
+            "distances": [[round(snap.peers.distance(a, b), 6) if snap.peers.same_category(a, b) else None
+                           for b in positions] for a in positions],
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.exception("Error in /api/compare")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+MAX_BATCH_SCENARIOS = 1000
+
+# cagr, three_year, one_year weights
+Weights = Annotated[List[Annotated[float, Field(ge=0)]], Field(min_length=3, max_length=3)]
+
+
+class ScoreSubset(BaseModel):
+    """Funds a scenario ranks: listed ids/names and/or a category/risk bucket (all funds by default)."""
+    funds: Optional[List[str]] = None
+    category: Optional[str] = None
+    risk: Optional[str] = None
+
+
+class ScoreScenario(ScoreSubset):
+    weights: Weights = list(processor.DEFAULT_WEIGHTS)
+
+
+class BatchScoreRequest(BaseModel):
+    # Explicit scenarios, plus every `weights` vector over every `subsets` entry
+    scenarios: List[ScoreScenario] = []
+    weights: List[Weights] = []
+    subsets: List[ScoreSubset] = []
+    top_n: int = Field(10, ge=1, le=100)
+    normalization: str = "minmax"
+    group_by: Optional[str] = None
+
+    def expand(self) -> List[ScoreScenario]:
+        sweep = [ScoreScenario(weights=w, **subset.model_dump())
+                 for w in self.weights for subset in (self.subsets or [ScoreSubset()])]
+        return self.scenarios + sweep
+
+
+def _subset_positions(snap: snapshot.FundSnapshot, subset: ScoreSubset, unknown: List[str]):
+    """Sorted row positions of a subset (None for the whole universe); unresolved ids go to unknown."""
+    if subset.funds is None and not subset.category and not subset.risk:
+        return None
+    found = None
+    if subset.funds is not None:
+        found = [snap.peers.find(f) for f in subset.funds]
+        unknown.extend(f for f, pos in zip(subset.funds, found) if pos is None)
+        found = [pos for pos in found if pos is not None]
+    return snap.scorer.candidates(subset.category, subset.risk, found)
+
+
+@app.post("/api/score/batch")
+def score_batch(body: BatchScoreRequest, version: Optional[int] = None):
+    """Top funds of many weight vectors and/or fund subsets, scored as one matrix product per subset."""
+    try:
+        scenarios = body.expand()
+        if not scenarios or len(scenarios) > MAX_BATCH_SCENARIOS:
+            raise HTTPException(status_code=400,
+                                detail=f"Pass between 1 and {MAX_BATCH_SCENARIOS} scenarios")
+        snap = get_snapshot(version)
+        unknown: List[str] = []
+        resolved = {}
+        subsets = []
+        for scenario in scenarios:
+            key = (tuple(scenario.funds) if scenario.funds is not None else None, scenario.category, scenario.risk)
+            if key not in resolved:
+                resolved[key] = _subset_positions(snap, scenario, unknown)
+            subsets.append(resolved[key])
+        if unknown:
+            raise HTTPException(status_code=404, detail=f"Unknown funds {sorted(set(unknown))}")
+
+        def score():
+            with metrics.timer("score"):
+                ranked = snap.scorer.batch_top([s.weights for s in scenarios], subsets, body.top_n,
+                                               body.normalization, body.group_by)
+            results = []
+            for scenario, subset, (positions, scores) in zip(scenarios, subsets, ranked):
+                records = snap.scorer.ranked_records(positions, scores)
+                results.append({
+                    "weights": scenario.weights, "category": scenario.category, "risk": scenario.risk,
+                    "candidates": len(snap.table) if subset is None else len(subset),
+                    "top": [dict(record, id=snap.peers.ids[p]) for record, p in zip(records, positions)],
+                })
+            return {"normalization": body.normalization, "group_by": body.group_by, "top_n": body.top_n,
+                    "results": results}
+        try:
+            return coalesced_json(("batch", snap.key, body.model_dump_json()), score, batch_bodies)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.exception("Error in /api/score/batch")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/history")
+def get_history_as_of(as_of: Optional[str] = Query(None, description="YYYY-MM-DD, default today")):
+    """The fund universe with the returns in effect on a given day."""
+    try:
+        return scraper_adapter.history_store().as_of(as_of)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="as_of must be YYYY-MM-DD")
+
+
+@app.get("/api/history/snapshots")
+def get_history_snapshots():
+    """Days with a recorded scrape and how many change points each added."""
+    return scraper_adapter.history_store().snapshots()
+
+
+@app.get("/api/export/csv")
+def export_csv(request: Request):
+    try:
+        return serve_cached(
+            request,
+            snapshot.current().top10_csv,
             headers={
                 "Content-Disposition": "attachment; filename=top10_funds.csv",
                 "Access-control-Allow-Origin": "*"
@@ -128,43 +592,79 @@ def export_csv():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/export")
+def export_funds(
+    format: str = Query("csv", pattern="^(csv|ndjson|parquet)$"),
+    gzip: bool = False,
+    version: Optional[int] = None,
+    filters: FundFilters = Depends(),
+):
+    """Stream any filtered/sorted selection of funds (the whole universe by default)."""
+    try:
+        snap = get_snapshot(version)
+        if format == "parquet" and export.pq is None:
+            raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+        try:
+            fields = snap.index.check_fields(filters.fields)
+            # Validate sort/ranges before the response starts streaming
+            snap.index.ordering(filters.category, filters.risk, filters.sort, filters.descending)
+            blocks = snap.index.iter_positions(chunk=export.CHUNK_ROWS, **filters.selection())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        media_type, extension = export.FORMATS[format]
+        filename = f"funds.{extension}"
+        if gzip:
+            media_type, filename = "application/gzip", filename + ".gz"
+        return StreamingResponse(
+            export.stream(format, snap.index.records, blocks, fields, gzip=gzip),
+            media_type=media_type,
+            headers={"Content-Disposition": f"attachment; filename={filename}"},
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.exception("Error in /api/export")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ---------------------------------------------------------
 # 🌍 RESTORED ORIGINAL RSS NEWS (WORKING)
 # ---------------------------------------------------------
 
-@app.get('/api/news')
-def get_news():
-    try:
-        feed = feedparser.parse('http://feeds.bbci.co.uk/news/rss.xml')
-        news = [{"Title:": e.title, "Link:": e.link} for e in feed.entries]
-        return JSONResponse(content=news)
-    except Exception as e:
-        logging.exception('Error in /api/news')
-        raise HTTPException(status_code=500, detail=str(e))
+news_admission = Depends(admission.admit(admission.NEWS))
 
 
-@app.get('/api/latest_news')
-def get_latest_news():
+async def serve_feed(request: Request, name: str) -> Response:
     try:
-        feed = feedparser.parse(
-            'https://rss.nytimes.com/services/xml/rss/nyt/HomePage.xml')
-        news = [{"Title:": e.title, "Link:": e.link} for e in feed.entries]
-        return JSONResponse(content=news)
+        entry = await news.service.get(name)
+        return serve_cached(request, entry.body)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown news feed {name}")
     except Exception as e:
-        logging.exception('Error in /api/latest_news')
+        logging.exception('Error fetching news feed %s', name)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get('/api/business_news')
-def get_business_news():
-    try:
-        feed = feedparser.parse(
-            'https://rss.nytimes.com/services/xml/rss/nyt/Business.xml')
-        news = [{"Title:": e.title, "Link:": e.link} for e in feed.entries]
-        return JSONResponse(content=news)
-    except Exception as e:
-        logging.exception('Error in /api/business_news')
-        raise HTTPException(status_code=500, detail=str(e))
+@app.get('/api/news', dependencies=[news_admission])
+async def get_news(request: Request):
+    return await serve_feed(request, 'bbc')
+
+
+@app.get('/api/latest_news', dependencies=[news_admission])
+async def get_latest_news(request: Request):
+    return await serve_feed(request, 'latest')
+
+
+@app.get('/api/business_news', dependencies=[news_admission])
+async def get_business_news(request: Request):
+    return await serve_feed(request, 'business')
+
+
+@app.get('/api/news/{name}', dependencies=[news_admission])
+async def get_feed(request: Request, name: str):
+    """Any feed configured in NEWS_FEEDS."""
+    return await serve_feed(request, name)
 
 
 if __name__ == "__main__":
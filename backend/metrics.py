@@ -0,0 +1,388 @@
+"""Low-overhead in-process metrics, exposed in Prometheus text format.
+
+Histograms and counters are plain lists updated under one lock, so timing a
+stage costs two perf_counter() calls and a bisect. /api/metrics renders the
+registry of the serving process. Worker processes (the scraper process and
+the snapshot pool) record into their own registry and ship it back with
+their result via drain()/merge(), so their timings show up in the API
+process too. Each uvicorn worker keeps its own registry.
+
+Request timings are recorded by MetricsMiddleware per route template.
+With PROFILE_REQUESTS=1 a request carrying an `X-Profile: 1` header is also
+sampled by a stack-sampling profiler and the collapsed stacks (flamegraph /
+speedscope format) are written to `<profile id>.txt`, with the id returned in
+the `X-Profile-Id` response header.
+"""
+import os
+import sys
+import time
+import uuid
+import bisect
+import logging
+import functools
+import threading
+from collections import Counter as _Tally
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Seconds; covers sub-millisecond cache hits up to multi-minute scrapes
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+           1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# Opt-in per-request sampling profiler (see module docstring)
+PROFILE_REQUESTS = os.environ.get("PROFILE_REQUESTS", "0") == "1"
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", "0.005"))
+PROFILE_HEADER = b"x-profile"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{%s}" % ",".join(parts) if parts else ""
+
+
+def _number(v: float) -> str:
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values."""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets=BUCKETS, lock=None):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._lock = lock or threading.Lock()
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def state(self) -> Dict[Tuple, list]:
+        with self._lock:
+            return {k: [list(v[0]), v[1]] for k, v in self._series.items()}
+
+    def merge(self, state: Dict[Tuple, list]) -> None:
+        with self._lock:
+            for labels, (counts, total) in state.items():
+                series = self._series.setdefault(tuple(labels), [[0] * (len(self.buckets) + 1), 0.0])
+                series[0] = [a + b for a, b in zip(series[0], counts)]
+                series[1] += total
+
+    def take(self) -> Dict[Tuple, list]:
+        """Current state, resetting the histogram."""
+        with self._lock:
+            state, self._series = self._series, {}
+            return state
+
+    def reset(self) -> None:
+        self.take()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in sorted(self.state().items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="%s"' % ("+Inf" if bound == float("inf") else _number(bound))
+                lines.append(f"{self.name}_bucket{_labels(self.labels, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labels, labels)} {cumulative}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter keyed by label values."""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), lock=None):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = lock or threading.Lock()
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, *labels) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def state(self) -> Dict[Tuple, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def merge(self, state: Dict[Tuple, float]) -> None:
+        with self._lock:
+            for labels, amount in state.items():
+                self._values[tuple(labels)] = self._values.get(tuple(labels), 0) + amount
+
+    def take(self) -> Dict[Tuple, float]:
+        """Current state, resetting the counter."""
+        with self._lock:
+            state, self._values = self._values, {}
+            return state
+
+    def reset(self) -> None:
+        self.take()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.state().items()):
+            lines.append(f"{self.name}{_labels(self.labels, labels)} {_number(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+
+    def histogram(self, name: str, help: str, labels: Iterable[str] = (), buckets=BUCKETS) -> Histogram:
+        metric = self._metrics[name] = Histogram(name, help, labels, buckets, lock=self._lock)
+        return metric
+
+    def counter(self, name: str, help: str, labels: Iterable[str] = ()) -> Counter:
+        metric = self._metrics[name] = Counter(name, help, labels, lock=self._lock)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def drain(self) -> Dict[str, Dict]:
+        """Picklable state of every metric, resetting them (for shipping to another process)."""
+        state = {name: metric.take() for name, metric in self._metrics.items()}
+        return {name: values for name, values in state.items() if values}
+
+    def merge(self, state: Optional[Dict[str, Dict]]) -> None:
+        """Add a drained state from another process."""
+        for name, values in (state or {}).items():
+            metric = self._metrics.get(name)
+            if metric is not None:
+                metric.merge(values)
+
+    def reset(self) -> None:
+        for metric in self._metrics.values():
+            metric.reset()
+
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "Time to serve a request, until its last body chunk was sent.",
+    ("method", "route", "status"))
+STAGE_SECONDS = registry.histogram(
+    "funds_stage_duration_seconds",
+    "Time spent in one data processing stage (load, parse, clean, index, score, serialize).", ("stage",))
+SNAPSHOT_BUILDS = registry.counter("funds_snapshot_builds_total", "Fund snapshots built.")
+SCRAPE_STAGE_SECONDS = registry.histogram(
+    "scraper_stage_duration_seconds",
+    "Time spent in one scraper stage (driver_startup, page_load, extract, extract_row, write).", ("stage",))
+SCRAPE_PAGES = registry.counter("scraper_pages_total", "Listing pages scraped.")
+SCRAPE_ROWS = registry.counter("scraper_rows_total", "Fund rows extracted from listing pages.")
+COALESCED = registry.counter(
+    "coalesced_requests_total", "Calls that joined an identical in-progress computation.", ("name",))
+ADMISSION_REJECTED = registry.counter(
+    "http_admission_rejected_total",
+    "Requests refused by admission control (429, or 503 when a zero-rate limit leaves nothing to retry).",
+    ("policy", "reason"))
+
+
+@contextmanager
+def timer(stage: str, histogram: Histogram = STAGE_SECONDS):
+    """Record the time spent in the with-block under `stage`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - start, stage)
+
+
+def observe_scrape(stats: Dict) -> None:
+    """Record a grow.scrape() run from its last_run_stats."""
+    for stage, durations in (stats.get("stages") or {}).items():
+        for seconds in durations:
+            SCRAPE_STAGE_SECONDS.observe(seconds, stage)
+    SCRAPE_PAGES.inc(stats.get("pages_visited") or 0)
+    SCRAPE_ROWS.inc(stats.get("rows") or 0)
+
+
+# Leaf frames of threads that are idle rather than working
+_IDLE_FRAMES = {("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"),
+                ("selectors.py", "select"), ("queue.py", "get"), ("connection.py", "_recv"),
+                ("connection.py", "poll"), ("thread.py", "_worker")}
+
+
+class SamplingProfiler:
+    """Samples thread stacks at a fixed interval while running.
+
+    With threads, only those threads are sampled: MetricsMiddleware passes
+    the event loop thread serving the profiled request, and follow_thread()
+    swaps in the threadpool worker while it runs the request's sync endpoint,
+    so other requests served meanwhile stay out of the profile. Without
+    threads, every thread is sampled. Threads blocked in a thread/queue/
+    selector wait are left out, so the samples show where work is being
+    spent. Results are collapsed stacks: "thread;outer;...;inner count" per
+    line.
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL, threads: Optional[Iterable[int]] = None):
+        self.interval = interval
+        self.samples = _Tally()
+        self._threads = None if threads is None else frozenset(threads)
+        self._workers: frozenset = frozenset()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def follow(self, ident: int) -> None:
+        """Sample worker thread ident instead of the serving threads until unfollow()."""
+        self._workers = self._workers | {ident}
+
+    def unfollow(self, ident: int) -> None:
+        self._workers = self._workers - {ident}
+
+    def start(self) -> "SamplingProfiler":
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            wanted = self._workers or self._threads
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (wanted is not None and ident not in wanted):
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack.append(names.get(ident, str(ident)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.samples.most_common())
+
+    def write(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+
+
+# Profiler of the request being handled, seen by its threadpool workers too
+_request_profiler: ContextVar[Optional[SamplingProfiler]] = ContextVar("request_profiler", default=None)
+
+
+def follow_thread(fn: Callable) -> Callable:
+    """Wrap a sync endpoint so a profiled request is sampled on the worker thread running it."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        profiler = _request_profiler.get()
+        if profiler is None:
+            return fn(*args, **kwargs)
+        ident = threading.get_ident()
+        profiler.follow(ident)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.unfollow(ident)
+    return wrapper
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per route, plus the profiling hook.
+
+    Requests that match no route are recorded under route="unmatched" so
+    unknown paths cannot grow the label set.
+    """
+
+    def __init__(self, app, profile_dir: Callable[[], str], profile: Optional[bool] = None):
+        self.app = app
+        self.profile_dir = profile_dir
+        self.profile = PROFILE_REQUESTS if profile is None else profile
+        # One profile at a time
+        self._profiling = threading.Lock()
+
+    def _wants_profile(self, scope) -> bool:
+        return self.profile and any(
+            k == PROFILE_HEADER and v not in (b"", b"0") for k, v in scope.get("headers", ()))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+        profiler = profile_id = token = None
+        if self._wants_profile(scope) and self._profiling.acquire(blocking=False):
+            profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+            profiler = SamplingProfiler(threads=[threading.get_ident()]).start()
+            token = _request_profiler.set(profiler)
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if profile_id is not None:
+                    message = dict(message, headers=list(message.get("headers", [])) + [
+                        (b"x-profile-id", profile_id.encode())])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            REQUEST_SECONDS.observe(time.perf_counter() - start, scope["method"], route, str(status[0]))
+            if profiler is not None:
+                _request_profiler.reset(token)
+                # starlette is only imported here, by the API process
+                from starlette.concurrency import run_in_threadpool
+                try:
+                    await run_in_threadpool(self._save_profile, profiler, profile_id)
+                finally:
+                    self._profiling.release()
+
+    def _save_profile(self, profiler: SamplingProfiler, profile_id: str) -> None:
+        """Stop profiler and write its stacks (blocking, so run off the event loop)."""
+        path = os.path.join(self.profile_dir(), f"{profile_id}.txt")
+        try:
+            profiler.stop().write(path)
+            logging.info("Wrote request profile %s (%d samples)", path, sum(profiler.samples.values()))
+        except OSError:
+            logging.warning("Could not write request profile %s", path, exc_info=True)
@@ -0,0 +1,168 @@
+"""Async news aggregation with conditional GET and a stale-while-revalidate cache.
+
+Feeds are fetched concurrently through one pooled httpx.AsyncClient. Each
+parsed feed is kept in memory as a pre-serialized body. Requests are served
+from that cache: a fresh entry is returned as is, and a stale entry (older
+than NEWS_TTL but younger than NEWS_MAX_STALE) is returned immediately while
+one background refresh runs. Refreshes send If-None-Match/If-Modified-Since,
+so unchanged feeds cost a 304.
+"""
+import os
+import time
+import asyncio
+import logging
+from typing import Optional, Dict, List, Callable, TYPE_CHECKING
+
+import bodies
+
+# httpx and feedparser are imported on the first fetch, so a process that
+# never serves news does not load them
+if TYPE_CHECKING:
+    import httpx
+
+DEFAULT_FEEDS = {
+    'bbc': 'http://feeds.bbci.co.uk/news/rss.xml',
+    'latest': 'https://rss.nytimes.com/services/xml/rss/nyt/HomePage.xml',
+    'business': 'https://rss.nytimes.com/services/xml/rss/nyt/Business.xml',
+}
+
+# Seconds a fetched feed is served without revalidating
+NEWS_TTL = float(os.environ.get("NEWS_TTL", "300"))
+# Seconds past which a stale feed is no longer served while refreshing
+NEWS_MAX_STALE = float(os.environ.get("NEWS_MAX_STALE", "3600"))
+# Fetch every feed at startup instead of on the first news request
+NEWS_PREFETCH = os.environ.get("NEWS_PREFETCH", "0") == "1"
+FETCH_TIMEOUT = 10.0
+
+
+def configured_feeds() -> Dict[str, str]:
+    """Feeds from NEWS_FEEDS ("name=url,name=url"), else the defaults."""
+    spec = os.environ.get("NEWS_FEEDS", "").strip()
+    if not spec:
+        return dict(DEFAULT_FEEDS)
+    feeds = {}
+    for item in spec.split(","):
+        name, _, url = item.strip().partition("=")
+        if name and url:
+            feeds[name.strip()] = url.strip()
+    return feeds
+
+
+def parse_entries(content: bytes) -> List[Dict]:
+    """Feed entries in the shape the news endpoints have always returned."""
+    import feedparser
+    feed = feedparser.parse(content)
+    return [{"Title:": e.get("title"), "Link:": e.get("link")} for e in feed.entries]
+
+
+class FeedEntry:
+    """Parsed entries of one feed plus the validators for the next fetch."""
+
+    def __init__(self, entries: List[Dict], etag: Optional[str], last_modified: Optional[str], fetched_at: float):
+        self.entries = entries
+        self.body = bodies.CachedBody(bodies.dump_json(entries), "application/json")
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+
+class NewsService:
+    """Concurrent, cached fetching of a fixed set of feeds."""
+
+    def __init__(self, feeds: Optional[Dict[str, str]] = None, ttl: float = NEWS_TTL,
+                 max_stale: float = NEWS_MAX_STALE, transport: Optional["httpx.AsyncBaseTransport"] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.feeds = configured_feeds() if feeds is None else dict(feeds)
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._transport = transport
+        self._clock = clock
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._cache: Dict[str, FeedEntry] = {}
+        # name -> in-flight refresh, shared by every caller that needs it
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.fetches = 0
+
+    def _http(self) -> "httpx.AsyncClient":
+        if self._client is None:
+            import httpx
+            self._client = httpx.AsyncClient(
+                transport=self._transport, timeout=FETCH_TIMEOUT, follow_redirects=True,
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+                headers={"User-Agent": "mutual-fund-ranker/1.0"},
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _fetch(self, name: str) -> FeedEntry:
+        previous = self._cache.get(name)
+        headers = {}
+        if previous is not None:
+            if previous.etag:
+                headers["If-None-Match"] = previous.etag
+            if previous.last_modified:
+                headers["If-Modified-Since"] = previous.last_modified
+
+        self.fetches += 1
+        response = await self._http().get(self.feeds[name], headers=headers)
+        now = self._clock()
+        if response.status_code == 304 and previous is not None:
+            previous.fetched_at = now
+            return previous
+        response.raise_for_status()
+
+        # feedparser is CPU-bound; keep it off the event loop
+        entries = await asyncio.to_thread(parse_entries, response.content)
+        entry = FeedEntry(entries, response.headers.get("etag"), response.headers.get("last-modified"), now)
+        self._cache[name] = entry
+        return entry
+
+    def _refresh(self, name: str) -> asyncio.Task:
+        """Start (or join) the single in-flight refresh of a feed."""
+        task = self._inflight.get(name)
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(self._fetch(name))
+            task.add_done_callback(lambda t, n=name: self._done(n, t))
+            self._inflight[name] = task
+        return task
+
+    def _done(self, name: str, task: asyncio.Task) -> None:
+        if self._inflight.get(name) is task:
+            del self._inflight[name]
+        if not task.cancelled() and task.exception() is not None:
+            logging.warning("News feed %s refresh failed: %s", name, task.exception())
+
+    async def get(self, name: str) -> FeedEntry:
+        """Cached entry for a feed, refreshing it according to its age.
+
+        Raises KeyError for unknown feeds, and the fetch error when nothing
+        usable is cached.
+        """
+        if name not in self.feeds:
+            raise KeyError(name)
+        entry = self._cache.get(name)
+        if entry is not None:
+            age = self._clock() - entry.fetched_at
+            if age < self.ttl:
+                return entry
+            if age < self.ttl + self.max_stale:
+                self._refresh(name)
+                return entry
+        try:
+            return await asyncio.shield(self._refresh(name))
+        except Exception:
+            if entry is not None:
+                logging.warning("Serving expired news feed %s after failed refresh", name)
+                return entry
+            raise
+
+    async def refresh_all(self) -> None:
+        """Fetch every configured feed concurrently (failures are logged)."""
+        await asyncio.gather(*(self._refresh(name) for name in self.feeds), return_exceptions=True)
+
+
+service = NewsService()
@@ -1,7 +1,11 @@
 import re
+import sys
+from collections import OrderedDict
+from collections.abc import Mapping
+
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional, Iterator
 
 
 def parse_percent(v):
@@ -39,6 +43,160 @@ def assign_risk(category: str) -> str:
     return 'Unknown'
 
 
+# Canonical category names for common scraper tokens
+CATEGORY_MAPPING = {
+    'equity': 'Equity',
+    'equity - large cap': 'Equity',
+    'equity - mid cap': 'Equity',
+    'small cap': 'Equity',
+    'mid cap': 'Equity',
+    'hybrid': 'Hybrid',
+    'debt': 'Debt',
+    'commodities': 'Commodities',
+    'gold': 'Commodities',
+    'liquid': 'Debt',
+    'tax saver': 'Equity',
+}
+
+_CATEGORY_SEP_RE = re.compile(r'•|\\u2022')
+_CATEGORY_NOISE_RE = re.compile(r"\b(fund|direct plan|growth|plan)\b", flags=re.IGNORECASE)
+_CATEGORY_STRIP_RE = re.compile(r'[^a-z0-9\s\-]')
+
+_NA_TOKENS = ['NA', 'N/A', '-']
+
+
+def normalize_category(val) -> str:
+    """Map a raw scraped category field to a canonical category name."""
+    if val is None:
+        return 'Unknown'
+    s = str(val).strip()
+    if not s:
+        return 'Unknown'
+    # If field contains separators (from scraper), take the main token
+    # e.g. 'Very High Risk • Commodities • 5 ★' -> 'Commodities'
+    parts = [p.strip() for p in _CATEGORY_SEP_RE.split(s) if p.strip()]
+    token = parts[0] if len(parts) == 1 else (
+        parts[1] if len(parts) > 1 else parts[0])
+    token_low = token.lower()
+    # normalize common patterns
+    token_clean = _CATEGORY_NOISE_RE.sub('', token_low).strip()
+    token_clean = _CATEGORY_STRIP_RE.sub('', token_clean)
+    # try mapping
+    if token_clean in CATEGORY_MAPPING:
+        return CATEGORY_MAPPING[token_clean]
+    # title case fallback
+    return token.strip().title()
+
+
+def parse_number(x):
+    if pd.isna(x):
+        return np.nan
+    try:
+        s = str(x).replace(',', '').replace('%', '').strip()
+        return float(s)
+    except Exception:
+        return np.nan
+
+
+# Below this many distinct values _parse_unique parses them one by one
+VECTORIZE_MIN_UNIQUES = 2000
+
+
+def _map_unique(s: pd.Series, func) -> pd.Series:
+    """Apply func once per distinct value of s instead of once per row."""
+    values = s.astype(object)
+    codes, uniques = pd.factorize(values)
+    mapped = np.empty(len(uniques) + 1, dtype=object)
+    mapped[:-1] = [func(v) for v in uniques]
+    out = mapped[codes]
+    missing = codes == -1
+    if missing.any():
+        # None, NaN and pd.NA are all "missing" to factorize but may map
+        # differently, so resolve them per distinct null type.
+        by_type = {}
+        for pos in np.flatnonzero(missing):
+            v = values.iat[pos]
+            if type(v) not in by_type:
+                by_type[type(v)] = func(v)
+            out[pos] = by_type[type(v)]
+    # Inferred like Series.apply would, so strings get pandas' string dtype
+    return pd.Series(out.tolist(), index=s.index)
+
+
+def _value_types(s: pd.Series) -> pd.Series:
+    return s.astype(object).map(type, na_action='ignore')
+
+
+def _parse_series(s: pd.Series, text: pd.Series, scalar) -> np.ndarray:
+    """Vectorized float parse of prepared text, falling back to scalar for odd values.
+
+    text holds the cleaned string for string cells and NaN elsewhere. Plain
+    ints/floats are converted directly; anything pd.to_numeric rejects but
+    float() may accept (e.g. '1_000') and other objects are re-parsed with the
+    scalar function so results are identical to the row-wise path.
+    """
+    types = _value_types(s)
+    is_str = types.eq(str)
+    is_plain_number = types.isin([int, float])
+
+    out = pd.to_numeric(text, errors='coerce').astype(float)
+    numeric = pd.to_numeric(s.astype(object).where(is_plain_number), errors='coerce').astype(float)
+    out = out.where(is_str, numeric).to_numpy(dtype=float, copy=True)
+
+    skip = is_plain_number | ~s.notna() | (is_str & (text.isin(_NA_TOKENS) | text.eq('')))
+    retry = np.isnan(out) & ~skip.to_numpy(dtype=bool)
+    if retry.any():
+        values = s.to_numpy(dtype=object)
+        idx = np.flatnonzero(retry)
+        out[idx] = [scalar(v) for v in values[idx]]
+    return out
+
+
+def _parse_unique(s: pd.Series, prepare, scalar) -> pd.Series:
+    """Parse each distinct value of s once and broadcast back to every row.
+
+    Scraped return strings repeat heavily ('12.3%', 'NA', ...), so the string
+    work runs over the much smaller set of uniques. Missing values always
+    parse to NaN.
+    """
+    codes, uniques = pd.factorize(s.astype(object))
+    if len(uniques) < VECTORIZE_MIN_UNIQUES:
+        # Fixed pandas overhead outweighs a plain loop over few distinct values
+        parsed = np.fromiter((scalar(v) for v in uniques), dtype=float, count=len(uniques))
+    else:
+        uniques = pd.Series(uniques, dtype=object)
+        parsed = _parse_series(uniques, prepare(_string_values(uniques)), scalar)
+    return pd.Series(np.append(parsed, np.nan)[codes], index=s.index)
+
+
+def _string_values(s: pd.Series) -> pd.Series:
+    """Return s as object dtype with non-string cells replaced by NaN."""
+    obj = s.astype(object)
+    return obj.where(_value_types(s).eq(str), np.nan)
+
+
+def _prepare_percent(text: pd.Series) -> pd.Series:
+    text = text.str.strip()
+    na_token = text.str.upper().isin(_NA_TOKENS)
+    for token in ('%', ',', '\n', '1Y', '3Y', '5Y'):
+        text = text.str.replace(token, '', regex=False)
+    return text.mask(na_token, 'NA')
+
+
+def _prepare_number(text: pd.Series) -> pd.Series:
+    return text.str.replace(',', '', regex=False).str.replace('%', '', regex=False).str.strip()
+
+
+def parse_percent_series(s: pd.Series) -> pd.Series:
+    """Vectorized equivalent of s.apply(parse_percent)."""
+    return _parse_unique(s, _prepare_percent, parse_percent)
+
+
+def parse_number_series(s: pd.Series) -> pd.Series:
+    """Vectorized equivalent of s.apply(parse_number)."""
+    return _parse_unique(s, _prepare_number, parse_number)
+
+
 def clean_df(raw: List[Dict]) -> pd.DataFrame:
     """Convert raw list of dicts (from scrapers) into a cleaned DataFrame with standard columns."""
     df = pd.DataFrame(raw)
@@ -51,64 +209,18 @@ def clean_df(raw: List[Dict]) -> pd.DataFrame:
     # Normalize names
     df['name'] = df['name'].astype(str).str.strip()
 
-    # Standardize category
-    # Normalize category values: fill missing, strip, and map common variants
-    def normalize_category(val):
-        if val is None:
-            return 'Unknown'
-        s = str(val).strip()
-        if not s:
-            return 'Unknown'
-        # If field contains separators (from scraper), take the main token
-        # e.g. 'Very High Risk • Commodities • 5 ★' -> 'Commodities'
-        parts = [p.strip() for p in re.split(r'•|\\u2022', s) if p.strip()]
-        token = parts[0] if len(parts) == 1 else (
-            parts[1] if len(parts) > 1 else parts[0])
-        token_low = token.lower()
-        # canonical mapping
-        mapping = {
-            'equity': 'Equity',
-            'equity - large cap': 'Equity',
-            'equity - mid cap': 'Equity',
-            'small cap': 'Equity',
-            'mid cap': 'Equity',
-            'hybrid': 'Hybrid',
-            'debt': 'Debt',
-            'commodities': 'Commodities',
-            'gold': 'Commodities',
-            'liquid': 'Debt',
-            'tax saver': 'Equity',
-        }
-        # normalize common patterns
-        token_clean = re.sub(r"\b(fund|direct plan|growth|plan)\b",
-                             '', token_low, flags=re.IGNORECASE).strip()
-        token_clean = re.sub(r'[^a-z0-9\s\-]', '', token_clean)
-        # try mapping
-        if token_clean in mapping:
-            return mapping[token_clean]
-        # title case fallback
-        return token.strip().title()
-
-    df['category'] = df['category'].apply(normalize_category)
-    df['risk'] = df['category'].apply(assign_risk)
+    # Standardize category (computed once per distinct raw value)
+    df['category'] = _map_unique(df['category'], normalize_category)
+    df['risk'] = _map_unique(df['category'], assign_risk)
 
     # Parse numeric returns
-    df['one_year_return_num'] = df['one_year_return'].apply(parse_percent)
-    df['three_year_return_num'] = df['three_year_return'].apply(parse_percent)
-    df['cagr_num'] = df['five_year_return'].apply(parse_percent)
+    df['one_year_return_num'] = parse_percent_series(df['one_year_return'])
+    df['three_year_return_num'] = parse_percent_series(df['three_year_return'])
+    df['cagr_num'] = parse_percent_series(df['five_year_return'])
 
     # Expense ratio and AUM cleanup
-    def parse_number(x):
-        if pd.isna(x):
-            return np.nan
-        try:
-            s = str(x).replace(',', '').replace('%', '').strip()
-            return float(s)
-        except Exception:
-            return np.nan
-
-    df['expense_ratio_num'] = df['expense_ratio'].apply(parse_number)
-    df['aum_num'] = df['aum'].apply(parse_number)
+    df['expense_ratio_num'] = parse_number_series(df['expense_ratio'])
+    df['aum_num'] = parse_number_series(df['aum'])
 
     # Remove duplicates by name (keep first)
     df = df.drop_duplicates(subset=['name'])
@@ -119,87 +231,833 @@ def clean_df(raw: List[Dict]) -> pd.DataFrame:
     return df[cols]
 
 
-def _minmax_series(s: pd.Series) -> pd.Series:
-    if s.isna().all():
-        return pd.Series(np.zeros(len(s)), index=s.index)
-    
-    # Penalize missing values by filling them with the minimum
-    s_filled = s.fillna(s.min())
-    
-    minv = s_filled.min()
-    maxv = s_filled.max()
-    
-    if pd.isna(minv) or pd.isna(maxv) or maxv == minv:
-        return pd.Series(np.zeros(len(s)), index=s.index)
-    
-    return (s_filled - minv) / (maxv - minv)
+# Ranking weights applied to the min-max normalized return columns
+SCORE_COLUMNS = ('cagr_num', 'three_year_return_num', 'one_year_return_num')
+DEFAULT_WEIGHTS = (0.5, 0.3, 0.2)
+
+# Most scores (funds x scenarios) FundScorer.batch_top computes per matrix product
+BATCH_BLOCK = 4_000_000
+# Entries each FundScorer cache keeps; the least recently used are dropped beyond this
+MAX_CACHED = 32
+
+# Output field -> cleaned DataFrame column for ranked records
+RANK_FIELDS = [('name', 'name'), ('category', 'category'), ('risk', 'risk'),
+               ('one_year_return', 'one_year_return'), ('three_year_return', 'three_year_return'),
+               ('cagr', 'five_year_return'), ('expense_ratio', 'expense_ratio'), ('aum', 'aum')]
+
+
+def _minmax_array(values: np.ndarray) -> np.ndarray:
+    """Min-max scale to [0, 1]; missing values are penalized with the minimum."""
+    values = np.asarray(values, dtype=float)
+    missing = np.isnan(values)
+    if missing.all():
+        return np.zeros(len(values))
+
+    minv = values[~missing].min()
+    maxv = values[~missing].max()
+    if maxv == minv:
+        return np.zeros(len(values))
+
+    return (np.where(missing, minv, values) - minv) / (maxv - minv)
+
+
+# Score normalizations and the buckets they can be computed within
+NORMALIZATIONS = ('minmax', 'percentile', 'robust_z')
+GROUP_KEYS = ('category', 'risk')
+
+# Scales the median absolute deviation to a standard deviation for normal data
+_MAD_SCALE = 1.4826
+
+
+def normalize_columns(values: np.ndarray, groups: Optional[np.ndarray] = None,
+                      method: str = 'minmax') -> np.ndarray:
+    """Normalize each column of values within groups (the whole column when groups is None).
+
+    Missing values are penalized with their group's minimum, as in
+    _minmax_array, before one groupby pass computes:
+
+    - minmax: (x - min) / (max - min), 0 for constant groups
+    - percentile: rank / count in (0, 1], ties averaged
+    - robust_z: (x - median) / (1.4826 * MAD), clipped to [-3, 3]
+
+    Groups with no values normalize to 0.
+    """
+    if method not in NORMALIZATIONS:
+        raise ValueError(f"Unknown normalization {method!r}; choose from {list(NORMALIZATIONS)}")
+    frame = pd.DataFrame(np.asarray(values, dtype=float))
+    groups = np.zeros(len(frame), dtype=np.int64) if groups is None else groups
+    filled = frame.fillna(frame.groupby(groups).transform('min'))
+    grouped = filled.groupby(groups)
+    if method == 'minmax':
+        low = grouped.transform('min')
+        span = grouped.transform('max') - low
+        out = (filled - low) / span.where(span > 0)
+        out = out.mask(span.eq(0), 0.0)
+    elif method == 'percentile':
+        out = grouped.rank(pct=True)
+    else:
+        median = grouped.transform('median')
+        mad = (filled - median).abs().groupby(groups).transform('median') * _MAD_SCALE
+        out = ((filled - median) / mad.where(mad > 0)).mask(mad.eq(0), 0.0).clip(-3, 3)
+    return out.fillna(0.0).to_numpy(dtype=float)
+
+
+def _json_value(v):
+    """Convert pandas/numpy missing markers to None for JSON output."""
+    if v is None or v is pd.NA:
+        return None
+    if isinstance(v, float) and np.isnan(v):
+        return None
+    if isinstance(v, np.generic):
+        return v.item()
+    return v
+
+
+# Parsed columns, and the scraped text column each one was parsed from
+NUMERIC_COLUMNS = ('one_year_return_num', 'three_year_return_num', 'cagr_num', 'expense_ratio_num', 'aum_num')
+DISPLAY_COLUMNS = {'one_year_return': 'one_year_return_num', 'three_year_return': 'three_year_return_num',
+                   'five_year_return': 'cagr_num', 'expense_ratio': 'expense_ratio_num', 'aum': 'aum_num'}
+CATEGORICAL_COLUMNS = ('category', 'risk')
+
+# (decimals, suffix) spellings a scraped text column can be rebuilt with;
+# None decimals means the shortest repr
+_TEXT_STYLES = [(digits, suffix) for suffix in ('%', '') for digits in (None, 2, 1)]
+# Rows the spelling is picked from
+_STYLE_SAMPLE = 500
+
+_MISSING = object()
+
+
+def _format_values(values: List[Optional[float]], digits: Optional[int], suffix: str) -> List[Optional[str]]:
+    if digits is None:
+        return [None if v is None else repr(v) + suffix for v in values]
+    return [None if v is None else f"{v:.{digits}f}{suffix}" for v in values]
+
+
+class FundRecord(Mapping):
+    """Read-only view of one FundTable row; values are decoded on access."""
+
+    __slots__ = ('_table', '_pos')
+
+    def __init__(self, table: 'FundTable', pos: int):
+        self._table = table
+        self._pos = pos
+
+    def __getitem__(self, field: str):
+        return self._table.column(field, [self._pos])[0]
+
+    def __iter__(self):
+        return iter(self._table.fields)
+
+    def __len__(self):
+        return len(self._table.fields)
+
+    def to_dict(self) -> Dict:
+        return self._table.records([self._pos])[0]
+
+
+class FundTable:
+    """Compact column store for the rows of one cleaned DataFrame.
+
+    Names are interned strings, category/risk are categoricals and the
+    parsed `_num` columns are float32. Values float32 cannot round-trip
+    (shortest repr) are kept exactly on the side. The scraped text columns
+    are not stored: they are rebuilt from the parsed value ('12.5' -> '12.5%')
+    and only rows where that differs from the scraped text keep their
+    original value. Indexing returns FundRecord views; column(), records()
+    and rows() decode whole blocks of positions at once.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        n = len(df)
+        self.fields = list(df.columns)
+        self._names = np.array([sys.intern(str(v)) for v in df['name'].tolist()], dtype=object)
+        self._categories = {col: pd.Categorical(df[col].to_numpy(dtype=object)) for col in CATEGORICAL_COLUMNS}
+        self._numbers: Dict[str, np.ndarray] = {}
+        self._exact: Dict[str, Dict[int, float]] = {}
+        for col in NUMERIC_COLUMNS:
+            values = df[col].to_numpy(dtype=float) if col in df.columns else np.full(n, np.nan)
+            packed = values.astype(np.float32)
+            decoded = packed.astype(str).astype(float)
+            lossy = np.flatnonzero((decoded != values) & ~(np.isnan(decoded) & np.isnan(values)))
+            self._numbers[col] = packed
+            self._exact[col] = {int(p): float(values[p]) for p in lossy}
+        self._display: Dict[str, Tuple[Tuple[Optional[int], str], Dict[int, object]]] = {}
+        everything = np.arange(n)
+        for col, num_col in DISPLAY_COLUMNS.items():
+            scraped = [_json_value(v) for v in df[col].tolist()]
+            values = self._decoded(num_col, everything)
+            # Keep the spelling most rows were scraped with ('12.5%', '0.50', ...)
+            sample = values[:_STYLE_SAMPLE], scraped[:_STYLE_SAMPLE]
+            style = max(_TEXT_STYLES, key=lambda st: sum(
+                t == v for t, v in zip(_format_values(sample[0], *st), sample[1])))
+            rebuilt = _format_values(values, *style)
+            self._display[col] = (style, {pos: v for pos, (v, r) in enumerate(zip(scraped, rebuilt))
+                                          if v != r or type(v) is not type(r)})
+        # Anything else clean_df may grow is kept as is
+        known = {'name', *CATEGORICAL_COLUMNS, *NUMERIC_COLUMNS, *DISPLAY_COLUMNS}
+        self._other = {col: df[col].to_numpy(dtype=object) for col in self.fields if col not in known}
+        self._groups: Dict[str, Tuple[np.ndarray, List[str], Dict[str, int]]] = {}
+
+    def __len__(self):
+        return len(self._names)
+
+    def __getitem__(self, pos: int) -> FundRecord:
+        if not -len(self) <= pos < len(self):
+            raise IndexError(pos)
+        return FundRecord(self, int(pos) % len(self))
+
+    def __iter__(self) -> Iterator[FundRecord]:
+        return (FundRecord(self, pos) for pos in range(len(self)))
+
+    def numbers(self, col: str) -> np.ndarray:
+        """A parsed column as stored (float32, NaN for missing)."""
+        return self._numbers[col]
+
+    def exact(self, col: str) -> np.ndarray:
+        """A parsed column as float64 with the values clean_df produced."""
+        values = self._numbers[col].astype(str).astype(float)
+        for pos, v in self._exact[col].items():
+            values[pos] = v
+        return values
+
+    def _decoded(self, col: str, positions) -> List[Optional[float]]:
+        texts = self._numbers[col][positions].astype(str).tolist()
+        out = [None if t == 'nan' else float(t) for t in texts]
+        exact = self._exact[col]
+        if exact:
+            for i, pos in enumerate(np.asarray(positions).tolist()):
+                v = exact.get(pos, _MISSING)
+                if v is not _MISSING:
+                    out[i] = v
+        return out
+
+    def column(self, field: str, positions=None) -> List:
+        """JSON-safe values of one field at positions (every row when None)."""
+        positions = np.arange(len(self)) if positions is None else positions
+        if field == 'name':
+            return self._names[positions].tolist()
+        if field in self._categories:
+            cat = self._categories[field]
+            labels = np.append(np.asarray(cat.categories, dtype=object), None)
+            return labels[cat.codes[positions]].tolist()
+        if field in self._numbers:
+            return self._decoded(field, positions)
+        if field in self._display:
+            style, scraped = self._display[field]
+            out = _format_values(self._decoded(DISPLAY_COLUMNS[field], positions), *style)
+            if scraped:
+                for i, pos in enumerate(np.asarray(positions).tolist()):
+                    v = scraped.get(pos, _MISSING)
+                    if v is not _MISSING:
+                        out[i] = v
+            return out
+        if field in self._other:
+            return [_json_value(v) for v in self._other[field][positions]]
+        raise KeyError(field)
+
+    def rows(self, positions, fields: List[str]) -> List[Tuple]:
+        """Value tuples (in fields order) for the rows at positions."""
+        return list(zip(*[self.column(f, positions) for f in fields])) if len(positions) else []
+
+    def records(self, positions=None, fields: Optional[List[str]] = None) -> List[Dict]:
+        """Rows at positions as JSON-serializable dicts, like df_records."""
+        positions = np.arange(len(self)) if positions is None else positions
+        fields = self.fields if fields is None else fields
+        return [dict(zip(fields, row)) for row in self.rows(positions, fields)]
+
+    def frame(self, positions=None) -> pd.DataFrame:
+        """Rows at positions as a DataFrame with the cleaned columns."""
+        return pd.DataFrame(self.records(positions), columns=self.fields)
+
+    def groups(self, col: str) -> Tuple[np.ndarray, List[str], Dict[str, int]]:
+        """Case-insensitive buckets of a categorical column.
+
+        Returns each row's bucket code, each bucket's name as spelled by its
+        first row, and the lowercased name -> code mapping.
+        """
+        cached = self._groups.get(col)
+        if cached is None:
+            cat = self._categories[col]
+            lower, merged = pd.factorize(pd.Index(np.asarray(cat.categories, dtype=str)).str.lower())
+            codes = lower[cat.codes].astype(np.int64) if len(self) else np.zeros(0, dtype=np.int64)
+            first = np.unique(codes, return_index=True)[1]
+            labels = [str(cat.categories[cat.codes[p]]) for p in first]
+            cached = (codes, labels, {str(key): code for code, key in enumerate(merged)})
+            self._groups[col] = cached
+        return cached
+
+
+def as_table(data) -> FundTable:
+    """A FundTable for a cleaned DataFrame (FundTables are returned as is)."""
+    return data if isinstance(data, FundTable) else FundTable(data)
+
 
+class _LRUCache:
+    """Dict-like cache holding at most maxsize entries, least recently used dropped first.
 
-def rank_funds(df: pd.DataFrame, top_n: int = 10) -> List[Dict]:
+    Used without a lock: a race can only evict an entry early or compute
+    it twice, never return a wrong value.
+    """
+
+    def __init__(self, maxsize: int = MAX_CACHED):
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        try:
+            value = self._entries[key]
+            self._entries.move_to_end(key)
+        except KeyError:
+            return None
+        return value
+
+    def __setitem__(self, key, value):
+        self._entries[key] = value
+        while len(self._entries) > self.maxsize:
+            try:
+                self._entries.popitem(last=False)
+            except KeyError:
+                break
+
+
+def _top_positions(scores: np.ndarray, candidates: np.ndarray, top_n: int) -> np.ndarray:
+    """Positions of the top_n highest scores among candidates.
+
+    Uses argpartition so only the selected slice is sorted. Ties are broken
+    by original row order, so the result is deterministic.
+    """
+    if top_n <= 0 or len(candidates) == 0:
+        return candidates[:0]
+    cand_scores = scores[candidates]
+    if top_n < len(candidates):
+        kth = np.partition(cand_scores, len(cand_scores) - top_n)[len(cand_scores) - top_n]
+        keep = cand_scores >= kth
+        candidates, cand_scores = candidates[keep], cand_scores[keep]
+    order = np.lexsort((candidates, -cand_scores))
+    return candidates[order[:top_n]]
+
+
+def weighted_scores(values: np.ndarray, weights) -> np.ndarray:
+    """values (rows x SCORE_COLUMNS) weighted and summed one column at a time.
+
+    weights holds one weight per column, each a scalar or one per row.
+
+    Elementwise arithmetic rounds the same way for any subset of rows,
+    unlike a BLAS product, so scores of the same fund always agree.
+    """
+    scores = values[:, 0] * weights[0]
+    for j in range(1, values.shape[1]):
+        scores = scores + values[:, j] * weights[j]
+    return scores
+
+
+# Weight directions whose top funds seed FundScorer.batch_top's score floor
+_POOL_DIRECTIONS = np.array([(1, 0, 0), (0, 1, 0), (0, 0, 1), (1, 1, 0), (1, 0, 1), (0, 1, 1),
+                             (1, 1, 1), DEFAULT_WEIGHTS], dtype=float)
+# Relative margin covering the rounding difference of a BLAS product and weighted_scores
+_FLOOR_SLACK = 1e-9
+
+
+def _top_rows(values: np.ndarray, weights: np.ndarray, pool: np.ndarray,
+              top_n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Top_n rows of values for every weight vector: (positions, scores), each weights x top_n, best first.
+
+    One matrix product scores every row; pool is at least top_n rows likely
+    to score well, and the top_n-th best pool score is a floor no top_n
+    score can fall below. Rows at or above it are rescored with
+    weighted_scores and sorted, ties by row order as in _top_positions.
+    """
+    count = min(top_n, len(values))
+    if count <= 0:
+        empty = np.zeros((len(weights), 0))
+        return empty.astype(np.int64), empty
+    approx = weights @ values.T
+    pooled = approx[:, pool]
+    floor = np.partition(pooled, len(pool) - count, axis=1)[:, len(pool) - count]
+    floor -= _FLOOR_SLACK * (1 + np.abs(weights).sum(axis=1) * max(1.0, np.abs(values).max()))
+    # 1-D flatnonzero is ~10x faster than a 2-D nonzero
+    scenario, row = np.divmod(np.flatnonzero(approx >= floor[:, None]), len(values))
+    exact = weighted_scores(values[row], weights[scenario].T)
+    order = np.lexsort((row, -exact, scenario))
+    scenario, row, exact = scenario[order], row[order], exact[order]
+    rank = np.arange(len(row)) - np.searchsorted(scenario, np.arange(len(weights)))[scenario]
+    keep = rank < count
+    return row[keep].reshape(-1, count), exact[keep].reshape(-1, count)
+
+
+class FundScorer:
+    """Weighted scoring over one cleaned DataFrame or FundTable.
+
+    Return columns are normalized once per (normalization, group_by) either
+    across the universe or within each category/risk bucket. Scores are
+    cached per weight vector and ranked positions per query, so repeated
+    queries only pay for building the records they return. Weights and
+    filters come from clients, so each cache keeps only the MAX_CACHED most
+    recently used entries.
+    """
+
+    def __init__(self, data):
+        self.table = table = as_table(data)
+        n = len(table)
+        self._values = np.column_stack([table.exact(col) for col in SCORE_COLUMNS]) \
+            if n else np.zeros((0, len(SCORE_COLUMNS)))
+        self.normalized = np.column_stack([_minmax_array(col) for col in self._values.T]) if n else self._values
+        self._normalized = _LRUCache()
+        self._normalized[('minmax', None)] = self.normalized
+        self._scores = _LRUCache()
+        self._ranked = _LRUCache()
+        self._grouped = _LRUCache()
+
+    @staticmethod
+    def _weights_key(weights) -> Tuple[float, ...]:
+        weights = DEFAULT_WEIGHTS if weights is None else weights
+        if len(weights) != len(SCORE_COLUMNS):
+            raise ValueError(f"Expected {len(SCORE_COLUMNS)} weights, got {len(weights)}")
+        return tuple(float(w) for w in weights)
+
+    def group_codes(self, group_by: str) -> Tuple[np.ndarray, List[str]]:
+        """Bucket code of every row and each bucket's display name (case-insensitive buckets)."""
+        if group_by not in GROUP_KEYS:
+            raise ValueError(f"Cannot group by {group_by!r}; choose from {list(GROUP_KEYS)}")
+        codes, labels, _ = self.table.groups(group_by)
+        return codes, labels
+
+    def normalized_columns(self, normalization: str = 'minmax', group_by: Optional[str] = None) -> np.ndarray:
+        """SCORE_COLUMNS normalized across the universe or within group_by buckets."""
+        key = (normalization, group_by or None)
+        normalized = self._normalized.get(key)
+        if normalized is None:
+            groups = self.group_codes(group_by)[0] if group_by else None
+            normalized = normalize_columns(self._values, groups, normalization)
+            self._normalized[key] = normalized
+        return normalized
+
+    def scores(self, weights=None, normalization: str = 'minmax', group_by: Optional[str] = None) -> np.ndarray:
+        """Score for every row (cagr, three_year, one_year weight order)."""
+        key = (self._weights_key(weights), normalization, group_by or None)
+        scores = self._scores.get(key)
+        if scores is None:
+            scores = weighted_scores(self.normalized_columns(normalization, group_by), key[0])
+            self._scores[key] = scores
+        return scores
+
+    def candidates(self, category: Optional[str] = None, risk: Optional[str] = None,
+                   positions: Optional[List[int]] = None) -> np.ndarray:
+        """Sorted row positions in category and risk (case-insensitive; None matches all).
+
+        With positions, only those rows are considered.
+        """
+        if positions is None:
+            mask = np.ones(len(self.table), dtype=bool)
+        else:
+            mask = np.zeros(len(self.table), dtype=bool)
+            mask[np.asarray(positions, dtype=np.int64)] = True
+        for col, value in (('category', category), ('risk', risk)):
+            if value:
+                codes, _, keys = self.table.groups(col)
+                mask &= codes == keys.get(value.strip().lower(), -1)
+        return np.flatnonzero(mask)
+
+    def top(self, top_n: int = 10, weights=None, category: Optional[str] = None,
+            risk: Optional[str] = None, normalization: str = 'minmax', group_by: Optional[str] = None) -> np.ndarray:
+        """Row positions of the top_n funds, best first."""
+        key = (self._weights_key(weights), (category or '').strip().lower(), (risk or '').strip().lower(),
+               normalization, group_by or None)
+        cached = self._ranked.get(key)
+        if cached is None or cached[0] < top_n:
+            scores = self.scores(weights, normalization, group_by)
+            positions = _top_positions(scores, self.candidates(category, risk), top_n)
+            cached = (top_n, positions)
+            self._ranked[key] = cached
+        return cached[1][:top_n]
+
+    def top_by_group(self, top_n: int = 5, weights=None, group_by: str = 'category',
+                     normalization: str = 'percentile', category: Optional[str] = None,
+                     risk: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """Row positions of the top_n funds in every group_by bucket, best first.
+
+        Scores are normalized within the same buckets. One sort by
+        (bucket, -score, row) ranks every bucket at once.
+        """
+        key = (self._weights_key(weights), group_by, normalization,
+               (category or '').strip().lower(), (risk or '').strip().lower())
+        cached = self._grouped.get(key)
+        if cached is None or cached[0] < top_n:
+            codes, labels = self.group_codes(group_by)
+            scores = self.scores(weights, normalization, group_by)
+            candidates = self.candidates(category, risk)
+            order = candidates[np.lexsort((candidates, -scores[candidates], codes[candidates]))]
+            buckets = codes[order]
+            starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]]) if len(order) else order[:0]
+            rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+            kept = order[rank < top_n]
+            bounds = np.searchsorted(codes[kept], np.arange(len(labels) + 1))
+            cached = (top_n, {labels[c]: kept[bounds[c]:bounds[c + 1]]
+                              for c in range(len(labels)) if bounds[c + 1] > bounds[c]})
+            self._grouped[key] = cached
+        return {label: positions[:top_n] for label, positions in cached[1].items()}
+
+    def batch_top(self, weights, subsets: Optional[List[Optional[np.ndarray]]] = None, top_n: int = 10,
+                  normalization: str = 'minmax',
+                  group_by: Optional[str] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Top funds of many scenarios: (positions best first, their scores) per weight vector.
+
+        weights is one vector per scenario (cagr, three_year, one_year);
+        subsets optionally restricts each scenario to sorted row positions
+        (None for the whole universe). Scenarios over the same subset are
+        scored with one product of the weight matrix and its normalized
+        rows (see _top_rows). Scores equal those of scores(): they use the
+        universe-wide (or group_by) normalization, so a fund scores the
+        same in every subset.
+        """
+        if any(len(w) != len(SCORE_COLUMNS) for w in weights):
+            raise ValueError(f"Expected {len(SCORE_COLUMNS)} weights per scenario")
+        matrix = np.array(weights, dtype=float).reshape(len(weights), len(SCORE_COLUMNS))
+        subsets = [None] * len(matrix) if subsets is None else \
+            [None if s is None else np.asarray(s, dtype=np.int64) for s in subsets]
+        if len(subsets) != len(matrix):
+            raise ValueError("Pass one subset (or None) per weight vector")
+        normalized = self.normalized_columns(normalization, group_by)
+        by_subset: Dict[Optional[bytes], List[int]] = {}
+        for i, subset in enumerate(subsets):
+            by_subset.setdefault(None if subset is None else subset.tobytes(), []).append(i)
+
+        results: List[Optional[Tuple[np.ndarray, np.ndarray]]] = [None] * len(matrix)
+        for scenarios in by_subset.values():
+            subset = subsets[scenarios[0]]
+            rows = normalized if subset is None else normalized[subset]
+            everyone = np.arange(len(rows))
+            pool = np.unique(np.concatenate(
+                [_top_positions(rows @ direction, everyone, top_n) for direction in _POOL_DIRECTIONS]))
+            # Bound the score matrix to ~BATCH_BLOCK values at a time
+            step = max(1, BATCH_BLOCK // max(1, len(rows)))
+            for start in range(0, len(scenarios), step):
+                block = scenarios[start:start + step]
+                top, top_scores = _top_rows(rows, matrix[block], pool, top_n)
+                for j, i in enumerate(block):
+                    results[i] = (top[j] if subset is None else subset[top[j]], top_scores[j])
+        return results
+
+    def _records(self, positions: np.ndarray, scores: np.ndarray) -> List[Dict]:
+        return self.ranked_records(positions, scores[positions])
+
+    def ranked_records(self, positions: np.ndarray, scores: np.ndarray) -> List[Dict]:
+        """Records of ranked positions with their scores (one score per position)."""
+        rows = self.table.rows(positions, [col for _, col in RANK_FIELDS])
+        names = [field for field, _ in RANK_FIELDS] + ['score']
+        return [dict(zip(names, row + (float(score),))) for row, score in zip(rows, scores)]
+
+    def records(self, top_n: int = 10, weights=None, category: Optional[str] = None,
+                risk: Optional[str] = None, normalization: str = 'minmax',
+                group_by: Optional[str] = None) -> List[Dict]:
+        """Top funds as JSON-serializable dicts."""
+        positions = self.top(top_n, weights, category, risk, normalization, group_by)
+        return self._records(positions, self.scores(weights, normalization, group_by))
+
+    def grouped_records(self, top_n: int = 5, weights=None, group_by: str = 'category',
+                        normalization: str = 'percentile', category: Optional[str] = None,
+                        risk: Optional[str] = None) -> Dict[str, List[Dict]]:
+        """Top funds per bucket as {bucket name: records}, buckets in name order."""
+        groups = self.top_by_group(top_n, weights, group_by, normalization, category, risk)
+        scores = self.scores(weights, normalization, group_by)
+        return {label: self._records(groups[label], scores) for label in sorted(groups)}
+
+    def frame(self, top_n: int = 10, weights=None) -> pd.DataFrame:
+        """Top funds as a DataFrame of the cleaned columns with a score column."""
+        positions = self.top(top_n, weights)
+        return self.table.frame(positions).assign(score=self.scores(weights)[positions])
+
+
+# Public sort/filter names for /api/funds -> cleaned DataFrame column
+SORT_KEYS = {'name': 'name', 'category': 'category', 'risk': 'risk',
+             'one_year': 'one_year_return_num', 'three_year': 'three_year_return_num',
+             'cagr': 'cagr_num', 'expense_ratio': 'expense_ratio_num', 'aum': 'aum_num'}
+RANGE_KEYS = {k: v for k, v in SORT_KEYS.items() if v.endswith('_num')}
+
+
+class FundIndex:
+    """Pre-indexed view of one cleaned DataFrame or FundTable for paged listing queries.
+
+    records is the FundTable, so rows are only decoded when a page or export
+    returns them. Category/risk groups are kept as position arrays and
+    sorted orderings are cached per (group, sort key, direction), so a page
+    only touches the rows it returns (plus rows skipped by range filters).
+    Groups come from the query string, so only the MAX_CACHED most recently
+    used orderings are kept.
+    """
+
+    def __init__(self, data):
+        self.records = table = as_table(data)
+        self.fields = list(table.fields)
+        n = len(table)
+        self._all = np.arange(n)
+        self._groups: Dict[str, Dict[str, np.ndarray]] = {}
+        for col in ('category', 'risk'):
+            codes, _, keys = table.groups(col)
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(keys) + 1))
+            self._groups[col] = {key: order[bounds[c]:bounds[c + 1]] for key, c in keys.items()}
+        # float32 as stored; range bounds are compared at the same precision
+        self._numeric = {col: table.numbers(col) for col in RANGE_KEYS.values()}
+        self._orders = _LRUCache()
+
+    def _sort_key(self, col: str) -> np.ndarray:
+        if col in self._numeric:
+            return self._numeric[col]
+        # Text columns sort case-insensitively via their rank among distinct values
+        if col == 'name':
+            values = np.array([v.lower() for v in self.records.column('name')], dtype=object)
+            return np.unique(values, return_inverse=True)[1].astype(float)
+        codes, _, keys = self.records.groups(col)
+        rank = np.empty(len(keys))
+        rank[[keys[k] for k in sorted(keys)]] = np.arange(len(keys))
+        return rank[codes]
+
+    def candidates(self, category: Optional[str] = None, risk: Optional[str] = None) -> np.ndarray:
+        """Positions (in row order) matching the category/risk filters."""
+        positions = self._all
+        for col, value in (('category', category), ('risk', risk)):
+            if value:
+                group = self._groups[col].get(value.strip().lower(), self._all[:0])
+                positions = group if positions is self._all else np.intersect1d(positions, group)
+        return positions
+
+    def ordering(self, category: Optional[str] = None, risk: Optional[str] = None,
+                 sort: Optional[str] = None, descending: bool = False) -> np.ndarray:
+        """Candidate positions in sort order (missing values last, ties by row order)."""
+        key = ((category or '').strip().lower(), (risk or '').strip().lower(), sort, descending)
+        order = self._orders.get(key)
+        if order is None:
+            positions = self.candidates(category, risk)
+            if sort:
+                if sort not in SORT_KEYS:
+                    raise ValueError(f"Cannot sort by {sort!r}; choose from {sorted(SORT_KEYS)}")
+                values = self._sort_key(SORT_KEYS[sort])[positions]
+                order = positions[np.lexsort((positions, -values if descending else values, np.isnan(values)))]
+            else:
+                order = positions
+            self._orders[key] = order
+        return order
+
+    def _bounds(self, ranges) -> List[Tuple[np.ndarray, Optional[float], Optional[float]]]:
+        unknown = [name for name in (ranges or {}) if name not in RANGE_KEYS]
+        if unknown:
+            raise ValueError(f"Unknown range filters {unknown}; choose from {sorted(RANGE_KEYS)}")
+        return [(self._numeric[RANGE_KEYS[name]], lo, hi) for name, (lo, hi) in (ranges or {}).items()
+                if lo is not None or hi is not None]
+
+    @staticmethod
+    def _range_mask(block: np.ndarray, bounds) -> np.ndarray:
+        mask = np.ones(len(block), dtype=bool)
+        for values, lo, hi in bounds:
+            if lo is not None:
+                mask &= values[block] >= lo
+            if hi is not None:
+                mask &= values[block] <= hi
+        return mask
+
+    def check_fields(self, fields: Optional[List[str]]) -> List[str]:
+        """Validate a projection; None means every field."""
+        if not fields:
+            return list(self.fields)
+        unknown = [f for f in fields if f not in self.fields]
+        if unknown:
+            raise ValueError(f"Unknown fields {unknown}; choose from {self.fields}")
+        return list(fields)
+
+    def iter_positions(self, category: Optional[str] = None, risk: Optional[str] = None,
+                       ranges=None, sort: Optional[str] = None, descending: bool = False,
+                       chunk: int = 1000) -> Iterator[np.ndarray]:
+        """Matching row positions in sort order, in blocks of at most chunk rows."""
+        order = self.ordering(category, risk, sort, descending)
+        bounds = self._bounds(ranges)
+        for start in range(0, len(order), chunk):
+            block = order[start:start + chunk]
+            if bounds:
+                block = block[self._range_mask(block, bounds)]
+            if len(block):
+                yield block
+
+    def page(self, category: Optional[str] = None, risk: Optional[str] = None,
+             ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+             sort: Optional[str] = None, descending: bool = False, offset: int = 0,
+             limit: int = 50, fields: Optional[List[str]] = None) -> Tuple[List[Dict], Optional[int], Optional[int]]:
+        """One page of funds as (records, next_offset, total).
+
+        ranges maps RANGE_KEYS names to inclusive (min, max) bounds (either
+        may be None); rows missing the value never match. offset indexes the
+        filtered ordering, so next_offset is only valid for the same query.
+        total is None when range filters make counting cost a full scan.
+        """
+        if fields:
+            fields = self.check_fields(fields)
+        order = self.ordering(category, risk, sort, descending)
+        bounds = self._bounds(ranges)
+
+        if not bounds:
+            positions = order[offset:offset + limit]
+            end = offset + len(positions)
+            total = len(order)
+        else:
+            # Scan forward in chunks until the page is full
+            taken, end, total = [], offset, None
+            need, chunk = limit, max(limit * 4, 256)
+            while need and end < len(order):
+                block = order[end:end + chunk]
+                hits = np.flatnonzero(self._range_mask(block, bounds))[:need]
+                taken.append(block[hits])
+                need -= len(hits)
+                # Resume right after the last returned row once the page is full
+                end += int(hits[-1]) + 1 if not need else len(block)
+            positions = np.concatenate(taken) if taken else order[:0]
+
+        records = self.records.records(positions, fields or None)
+        return records, (end if end < len(order) else None), total
+
+
+# Return columns compared by PeerIndex, with their public names
+PEER_COLUMNS = (('one_year', 'one_year_return_num'), ('three_year', 'three_year_return_num'),
+                ('cagr', 'cagr_num'))
+
+
+def category_percentiles(values: np.ndarray, groups: np.ndarray) -> np.ndarray:
+    """Percentile rank in (0, 1] of each value among its group (ties averaged); NaN stays NaN."""
+    return pd.Series(values, dtype=float).groupby(groups).rank(pct=True).to_numpy(dtype=float)
+
+
+def category_zscores(values: np.ndarray, groups: np.ndarray) -> np.ndarray:
+    """(value - group mean) / group std; NaN stays NaN and constant groups give 0."""
+    s = pd.Series(values, dtype=float)
+    grouped = s.groupby(groups)
+    std = grouped.transform('std', ddof=0).to_numpy(dtype=float)
+    centered = (s - grouped.transform('mean')).to_numpy(dtype=float)
+    # centered * 0 keeps NaN for missing values in constant groups
+    return np.where(std > 0, centered / np.where(std > 0, std, 1), centered * 0)
+
+
+def _lookup_key(value) -> str:
+    text = str(value)
+    key = text.strip().lower()
+    # Slugs are usually keys already; share the string instead of a lowercased copy
+    return text if key == text else key
+
+
+class PeerIndex:
+    """Nearest funds by return profile within each category.
+
+    Every fund gets a feature vector built once per snapshot: its in-category
+    z-score and percentile rank for each PEER_COLUMNS return, with missing
+    values imputed at the category median. Members of each category are kept
+    contiguous, so a peer query is one distance pass over that category's
+    rows plus an argpartition.
+    """
+
+    def __init__(self, data, records=None, ids: Optional[List[str]] = None):
+        table = as_table(data)
+        n = len(table)
+        names = table.column('name')
+        self.records = table if records is None else records
+        self.ids = [sys.intern(str(i)) for i in ids] if ids is not None else names
+        self._codes = table.groups('category')[0]
+
+        self.percentiles: Dict[str, np.ndarray] = {}
+        features = []
+        for field, col in PEER_COLUMNS:
+            values = table.exact(col)
+            pct = category_percentiles(values, self._codes)
+            self.percentiles[field] = pct
+            features.append(np.nan_to_num(np.clip(category_zscores(values, self._codes), -3, 3)))
+            # Uniform [0, 1] ranks rescaled to unit variance, like the z-scores
+            features.append(np.nan_to_num((pct - 0.5) * np.sqrt(12)))
+
+        # Category members are contiguous rows of the feature matrix
+        self._order = np.argsort(self._codes, kind='stable')
+        self.features = np.ascontiguousarray(np.column_stack(features)[self._order])
+        self._slot = np.empty(n, dtype=np.int64)
+        self._slot[self._order] = np.arange(n)
+        groups = int(self._codes.max()) + 1 if n else 0
+        self._bounds = np.searchsorted(self._codes[self._order], np.arange(groups + 1))
+
+        self._lookup: Dict[str, int] = {}
+        for pos, name in enumerate(names):
+            self._lookup.setdefault(_lookup_key(name), pos)
+        for pos, fund_id in enumerate(self.ids):
+            self._lookup[_lookup_key(fund_id)] = pos
+
+    def find(self, fund: str) -> Optional[int]:
+        """Row position of a fund by id or name (case-insensitive); None if unknown."""
+        return self._lookup.get(_lookup_key(fund))
+
+    def describe(self, pos: int) -> Dict:
+        """A fund's record plus its id and in-category percentile ranks."""
+        percentiles = {field: _json_value(float(pct[pos])) for field, pct in self.percentiles.items()}
+        return dict(self._records([pos])[0], id=self.ids[pos], percentiles=percentiles)
+
+    def same_category(self, a: int, b: int) -> bool:
+        return bool(self._codes[a] == self._codes[b])
+
+    def distance(self, a: int, b: int) -> float:
+        """Euclidean distance between two funds' feature vectors."""
+        return float(np.linalg.norm(self.features[self._slot[a]] - self.features[self._slot[b]]))
+
+    def nearest(self, pos: int, k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """Positions and distances of the k closest other funds in pos's category, closest first.
+
+        Ties are broken by row order so results are deterministic.
+        """
+        code = self._codes[pos]
+        start, end = self._bounds[code], self._bounds[code + 1]
+        block = self.features[start:end]
+        diff = block - self.features[self._slot[pos]]
+        dist = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+        members = self._order[start:end]
+        others = np.flatnonzero(members != pos)
+        if k <= 0 or len(others) == 0:
+            return members[:0], dist[:0]
+        if k < len(others):
+            kth = np.partition(dist[others], k - 1)[k - 1]
+            others = others[dist[others] <= kth]
+        ranked = others[np.lexsort((members[others], dist[others]))][:k]
+        return members[ranked], dist[ranked]
+
+    def peers(self, pos: int, k: int = 5) -> List[Dict]:
+        """The k nearest funds as records with id and distance."""
+        positions, dist = self.nearest(pos, k)
+        return [dict(record, id=self.ids[p], distance=round(float(d), 6))
+                for record, p, d in zip(self._records(positions), positions, dist)]
+
+    def _records(self, positions) -> List[Dict]:
+        if isinstance(self.records, FundTable):
+            return self.records.records(positions)
+        return [dict(self.records[p]) for p in positions]
+
+
+def rank_funds(df: pd.DataFrame, top_n: int = 10, normalization: str = 'minmax',
+               group_by: Optional[str] = None, weights=None) -> List[Dict]:
     """Return top_n funds as list of dicts (JSON-serializable).
 
-    Weighted scoring: cagr (0.5), three_year (0.3), one_year (0.2)
-    Missing values treated as low scores.
+    Weighted scoring: cagr, three_year, one_year (DEFAULT_WEIGHTS 0.5, 0.3,
+    0.2 unless weights is given). Missing values treated as low scores. Returns are normalized with
+    `normalization` (minmax, percentile or robust_z) across all funds, or
+    within each category/risk bucket when group_by is given.
     """
     if df.empty:
         return []
+    return FundScorer(df).records(top_n, weights, normalization=normalization, group_by=group_by)
 
-    # Work on numeric columns
-    numeric_df = df.copy()
-    numeric_df['one_year_return_num'] = numeric_df.get(
-        'one_year_return_num', pd.Series([np.nan]*len(numeric_df)))
-    numeric_df['three_year_return_num'] = numeric_df.get(
-        'three_year_return_num', pd.Series([np.nan]*len(numeric_df)))
-    numeric_df['cagr_num'] = numeric_df.get(
-        'cagr_num', pd.Series([np.nan]*len(numeric_df)))
-
-    s1 = _minmax_series(numeric_df['cagr_num'])
-    s2 = _minmax_series(numeric_df['three_year_return_num'])
-    s3 = _minmax_series(numeric_df['one_year_return_num'])
-
-    score = 0.5 * s1 + 0.3 * s2 + 0.2 * s3
-    numeric_df['score'] = score
-
-    ranked = numeric_df.sort_values('score', ascending=False).head(top_n)
-
-    # Prepare output
-    out = []
-    for _, row in ranked.iterrows():
-        out.append({
-            'name': row['name'],
-            'category': row['category'],
-            'risk': row['risk'],
-            'one_year_return': row['one_year_return'],
-            'three_year_return': row['three_year_return'],
-            'cagr': row['five_year_return'],
-            'expense_ratio': row.get('expense_ratio', None),
-            'aum': row.get('aum', None),
-            'score': float(row['score']) if not pd.isna(row['score']) else None
-        })
-    return out
-		
-def rank_funds_df(df: pd.DataFrame, top_n: int = 10) -> pd.DataFrame:
+
+def rank_funds_df(df: pd.DataFrame, top_n: int = 10, weights=None) -> pd.DataFrame:
     if df.empty:
         return df
-    numeric_df = df.copy()
-    numeric_df['one_year_return_num'] = numeric_df.get(
-        'one_year_return_num', pd.Series([np.nan]*len(numeric_df)))
-    numeric_df['three_year_return_num'] = numeric_df.get(
-        'three_year_return_num', pd.Series([np.nan]*len(numeric_df)))
-    numeric_df['cagr_num'] = numeric_df.get(
-        'cagr_num', pd.Series([np.nan]*len(numeric_df)))
-
-    s1 = _minmax_series(numeric_df['cagr_num'])
-    s2 = _minmax_series(numeric_df['three_year_return_num'])
-    s3 = _minmax_series(numeric_df['one_year_return_num'])
+    return FundScorer(df).frame(top_n, weights)
 
-    numeric_df['score'] = 0.5 * s1 + 0.3 * s2 + 0.2 * s3
-    ranked = numeric_df.sort_values('score', ascending=False).head(top_n)
-    return ranked
 
-
-def clean_and_normalize(raw: List[Dict]) -> List[Dict]:
-    df = clean_df(raw)
+def df_records(df: pd.DataFrame) -> List[Dict]:
+    """Cleaned DataFrame rows as JSON-serializable dicts."""
     # Replace pandas/numpy NA/NaN with None so JSON serialization works.
     # Convert to object dtype first so None values are preserved (otherwise float
     # columns will coerce None back to NaN).
@@ -207,3 +1065,7 @@ def clean_and_normalize(raw: List[Dict]) -> List[Dict]:
     # Return list of cleaned dicts
     out = df.to_dict(orient='records')
     return out
+
+
+def clean_and_normalize(raw: List[Dict]) -> List[Dict]:
+    return df_records(clean_df(raw))
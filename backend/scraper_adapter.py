@@ -1,48 +1,195 @@
 import os
-import json
 import logging
-from typing import Optional, List
+import threading
+from typing import Optional, List, Dict
 
-# ✅ Correct import path based on your folder structure
-from webscrapper.grow import scrape
+import history
+import incremental
+import metrics
+import storage
 
 
 # ✅ Correct JSON output location
 ROOT = os.path.abspath(os.path.dirname(__file__))
-BACKEND_DATA = os.path.join(ROOT, 'data', 'data.json')
+BACKEND_DATA = os.environ.get("FUNDS_DATA") or os.path.join(ROOT, 'data', 'data.json')
+
+# Storage backend for the fund dataset: "json" (data.json) or "sqlite" (funds.db)
+STORAGE_BACKEND = os.environ.get("FUNDS_STORAGE", "json")
 
 logging.basicConfig(level=logging.INFO)
 
 
-def load_latest_json() -> Optional[List[dict]]:
-    """Load the backend data.json used by the frontend."""
-    if not os.path.isfile(BACKEND_DATA):
-        logging.warning("No backend data.json found at %s", BACKEND_DATA)
-        return None
+# grow.scrape stop reasons that mean the whole listing was walked
+LISTING_END = ("empty_page", "no_new_rows")
+
+
+def _grow():
+    """The Groww scraper module, imported on first use.
+
+    It pulls in Selenium and webdriver_manager, which an API process that
+    only serves snapshots (or scrapes in a child process) never needs.
+    """
+    from webscrapper import grow
+    return grow
+
+
+def scrape(**kwargs):
+    """grow.scrape (see there for the parameters)."""
+    return _grow().scrape(**kwargs)
+
+
+# Delta counts of the most recent run_scraper() call
+last_delta: Dict = {}
+
+# Bumped after every successful write so in-process caches can invalidate
+# even when the file's mtime/size happen to match the previous version.
+_generation = 0
+_generation_lock = threading.Lock()
+
+# Serializes dataset publishes
+_write_lock = threading.Lock()
+
+
+def data_generation() -> int:
+    """Return the current dataset generation counter."""
+    return _generation
+
+
+def bump_generation() -> int:
+    """Mark data.json as replaced and return the new generation."""
+    global _generation
+    with _generation_lock:
+        _generation += 1
+        return _generation
+
+
+def get_store() -> storage.FundStore:
+    """The configured dataset store, rooted next to BACKEND_DATA."""
+    return storage.open_store(STORAGE_BACKEND, os.path.dirname(BACKEND_DATA), json_path=BACKEND_DATA)
+
+
+def data_fingerprint():
+    """Changes whenever the published dataset changes (None when there is none)."""
+    return get_store().fingerprint()
+
+
+def versions_dir() -> str:
+    return os.path.join(os.path.dirname(BACKEND_DATA), 'versions')
 
+
+def list_versions() -> List[Dict]:
+    """Versioned snapshots, oldest first: [{version, timestamp, rows, ...}]."""
+    return get_store().versions()
+
+
+def save_dataset(fund_data: List[dict]) -> int:
+    """Atomically publish fund_data and keep a versioned copy.
+
+    Returns the new version number. Only the newest storage.KEEP_VERSIONS
+    copies are retained.
+    """
+    with _write_lock:
+        version = get_store().save(fund_data)
+        bump_generation()
+        return version
+
+
+def load_latest_json(version: Optional[int] = None, columns: Optional[List[str]] = None) -> Optional[List[dict]]:
+    """Load the dataset used by the frontend, or a pinned version of it.
+
+    columns (see storage.RAW_FIELDS) limits each record to those fields.
+    """
+    return get_store().load(version, columns)
+
+
+def rollback(version: int) -> bool:
+    """Republish a kept version. Returns False if it is unknown."""
+    with _write_lock:
+        if not get_store().rollback(version):
+            return False
+        bump_generation()
+    logging.info("Rolled dataset back to version %s", version)
+    return True
+
+
+def change_log_path() -> str:
+    """JSON-lines log of per-run fund deltas, next to data.json."""
+    return os.path.join(os.path.dirname(BACKEND_DATA), 'changes.jsonl')
+
+
+def history_store() -> history.HistoryStore:
+    """Dated return history (history.db), next to the dataset."""
+    return history.open_store(os.path.join(os.path.dirname(BACKEND_DATA), 'history.db'))
+
+
+def record_history(records: List[dict], full: bool) -> None:
+    """Append today's values to the history store (failures only logged)."""
     try:
-        with open(BACKEND_DATA, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception as e:
-        logging.error("Failed to load backend data.json: %s", e)
-        return None
+        result = history_store().append(records, full=full)
+        logging.info("History %(day)s: %(rows)d funds, %(changed)d change points", result)
+    except Exception:
+        logging.warning("Could not record fund history", exc_info=True)
+
 
+def run_scraper(headless: bool = True, limit: int = 0, workers: int = 1, pages: int = 1,
+                incremental_merge: bool = True, progress=None) -> Optional[str]:
+    """Run the scraper and write to backend/data/data.json
 
-def run_scraper(headless: bool = True, limit: int = 0) -> Optional[str]:
-    """Run the scraper and write to backend/data/data.json"""
+    `pages` listing pages (0 = every page of the listing) are scraped
+    concurrently by up to `workers` browser instances. With
+    incremental_merge rows are diffed against the stored funds as they
+    arrive, keeping only new/changed ones, and merged in at the end; when
+    nothing changed data.json is left untouched so caches stay valid.
+    progress is passed through to grow.scrape.
+    """
     logging.info("▶ Running scraper...")
 
     try:
-        fund_data, skipped = scrape(headless=headless, limit=limit)
-        logging.info("Scraper finished (scraped: %d, skipped: %d)",
-                     len(fund_data), skipped)
+        old = (load_latest_json() or []) if incremental_merge else None
+        builder = incremental.DeltaBuilder(old) if incremental_merge else None
+        fund_data, skipped = scrape(headless=headless, limit=limit, workers=workers, pages=pages,
+                                     progress=progress, sink=builder.add if builder else None)
+        stats = _grow().last_run_stats
+        metrics.observe_scrape(stats)
+        if builder is not None:
+            builder.add(fund_data)
+        rows = builder.rows if builder is not None else len(fund_data)
+        logging.info("Scraper finished (scraped: %d, skipped: %d, pages: %s, failed: %s, stopped: %s)",
+                     rows, skipped, stats.get("pages_visited"), stats.get("failed_shards", 0),
+                     stats.get("stop_reason"))
+        for timing in stats.get("shards", []):
+            logging.info("  shard %(url)s: %(rows)d rows in %(seconds).2fs", timing)
+
+        if not rows:
+            logging.warning("Scraper returned no funds; keeping existing %s", BACKEND_DATA)
+            return None
+
+        # Only a walk that reached the end of the listing (a page that loaded
+        # empty, or the site repeating its last page) with no page lost to
+        # errors or timeouts has seen every fund and can prove removals
+        full = (pages <= 0 and not limit and stats.get("stop_reason") in LISTING_END
+                and not stats.get("failed_shards"))
+        if builder is not None:
+            delta = builder.finish(full=full)
+        else:
+            delta = incremental.diff_funds(load_latest_json() or [], fund_data, full=full)
+        last_delta.clear()
+        last_delta.update(delta.counts())
+        logging.info("Fund delta: %s", last_delta)
 
-        os.makedirs(os.path.dirname(BACKEND_DATA), exist_ok=True)
+        if incremental_merge:
+            if delta.is_empty():
+                record_history(old, full)
+                logging.info("✔ No fund changes; %s left as is", BACKEND_DATA)
+                return BACKEND_DATA
+            fund_data = incremental.merge_funds(old, builder.records, delta)
 
-        with open(BACKEND_DATA, "w", encoding="utf-8") as f:
-            json.dump(fund_data, f, indent=4)
+        with metrics.timer("write", metrics.SCRAPE_STAGE_SECONDS):
+            version = save_dataset(fund_data)
+        record_history(fund_data, full)
+        incremental.append_change_log(change_log_path(), delta, data_generation())
 
-        logging.info("✔ Updated %s", BACKEND_DATA)
+        logging.info("✔ Updated %s (version %d)", BACKEND_DATA, version)
         return BACKEND_DATA
 
     except Exception as e:
@@ -0,0 +1,235 @@
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import StringIO
+from typing import Optional, List, Dict, Tuple
+
+import bodies
+import metrics
+import admission
+import storage
+import processor
+import scraper_adapter
+
+# Worker processes that parse/rank new datasets (0 builds snapshots in the
+# calling thread). Building in a separate process keeps the pandas work from
+# holding the API process's GIL; only the finished snapshot is unpickled here.
+SNAPSHOT_PROCESSES = int(os.environ.get("SNAPSHOT_PROCESSES", "0"))
+
+# Defaults of /api/funds/top, whose response is serialized with the snapshot
+TOP_PER_GROUP = 5
+TOP_GROUP_BY = "category"
+TOP_NORMALIZATION = "percentile"
+
+
+def grouped_top(scorer: processor.FundScorer, top_n: int = TOP_PER_GROUP, weights=None,
+                group_by: str = TOP_GROUP_BY, normalization: str = TOP_NORMALIZATION,
+                category: Optional[str] = None, risk: Optional[str] = None) -> Dict:
+    """Body of /api/funds/top: the best funds of every bucket, scored within their bucket."""
+    return {
+        "group_by": group_by,
+        "normalization": normalization,
+        "groups": scorer.grouped_records(top_n, weights, group_by, normalization, category, risk),
+    }
+
+
+def fund_id(record: Dict) -> str:
+    """Public id of a fund: its scheme URL slug, or its name when there is no URL."""
+    url = record.get("url")
+    if url:
+        return url.rstrip("/").rsplit("/", 1)[-1]
+    return str(record.get("name") or "").strip()
+
+
+class FundSnapshot:
+    """One parsed generation of the dataset and everything derived from it.
+
+    Snapshots are fully built before they are published and never mutated
+    afterwards, so request handlers can use them without locking.
+    """
+
+    def __init__(self, key: Tuple, raw: Optional[List[Dict]], version: Optional[int] = None):
+        self.key = key
+        # Set for snapshots of a pinned data version rather than the current dataset
+        self.version = version
+        # Only the compact table is kept: neither raw nor the cleaned
+        # DataFrame outlive the build
+        self._has_data = raw is not None
+        with metrics.timer("clean"):
+            df = processor.clean_df(raw)
+            # Cleaned rows keep their position in raw, so ids come from the raw records
+            ids = [fund_id(raw[i]) for i in df.index] if raw else None
+            self.table = processor.FundTable(df)
+            del df
+        with metrics.timer("index"):
+            self.index = processor.FundIndex(self.table)
+            self.peers = processor.PeerIndex(self.table, ids=ids)
+        with metrics.timer("score"):
+            self.scorer = processor.FundScorer(self.table)
+            top10 = self.scorer.records(top_n=10)
+            top_by_category = grouped_top(self.scorer)
+            top10_frame = self.scorer.frame(top_n=10)
+
+        with metrics.timer("serialize"):
+            self.funds = bodies.CachedBody(bodies.dump_json(self.table.records()), "application/json")
+            self.top10 = bodies.CachedBody(bodies.dump_json(top10), "application/json")
+            self.top_by_category = bodies.CachedBody(bodies.dump_json(top_by_category), "application/json")
+            csv_io = StringIO()
+            top10_frame.to_csv(csv_io, index=False)
+            self.top10_csv = bodies.CachedBody(csv_io.getvalue().encode("utf-8"), "text/csv")
+
+    @property
+    def raw(self) -> Optional[List[Dict]]:
+        """The cleaned rows as dicts, rebuilt on each access (None without a dataset)."""
+        return self.table.records() if self._has_data else None
+
+    @property
+    def generation(self) -> Optional[int]:
+        return self.key[0] if self.version is None else None
+
+
+def _build(key: Tuple, version: Optional[int]) -> Optional[FundSnapshot]:
+    """Load the dataset (or a kept version) and build its snapshot; None if unreadable."""
+    # Cleaning and fund ids only use the scraped columns, so nothing else is read
+    raw = scraper_adapter.load_latest_json(version, columns=storage.RAW_FIELDS)
+    if raw is None:
+        return None
+    return FundSnapshot(key, raw, version=version)
+
+
+def _build_in_worker(key: Tuple, version: Optional[int], data_path: str,
+                     backend: str) -> Tuple[Optional[FundSnapshot], Dict]:
+    # Worker processes are spawned, so point them at the parent's dataset
+    scraper_adapter.BACKEND_DATA = data_path
+    scraper_adapter.STORAGE_BACKEND = backend
+    snap = _build(key, version)
+    # Stage timings were recorded in this process; send them back with the result
+    return snap, metrics.registry.drain()
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _process_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=SNAPSHOT_PROCESSES,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def build_snapshot(key: Tuple, version: Optional[int] = None) -> Optional[FundSnapshot]:
+    """Build a snapshot in the process pool when SNAPSHOT_PROCESSES is set, else inline."""
+    metrics.SNAPSHOT_BUILDS.inc()
+    if SNAPSHOT_PROCESSES > 0:
+        try:
+            snap, recorded = _process_pool().submit(
+                _build_in_worker, key, version, scraper_adapter.BACKEND_DATA, scraper_adapter.STORAGE_BACKEND,
+            ).result()
+            metrics.registry.merge(recorded)
+            return snap
+        except BrokenProcessPool:
+            logging.warning("Snapshot worker died; building in-process", exc_info=True)
+            shutdown_pool()
+    return _build(key, version)
+
+
+class SnapshotCache:
+    """Process-wide cache that rebuilds the snapshot only when the stored dataset changes."""
+
+    def __init__(self):
+        # Guards the fields below; builds run outside it so that a pinned
+        # version and the current dataset can be built at the same time.
+        self._lock = threading.Lock()
+        # Concurrent requests for the same snapshot share one build.
+        self._builds = admission.SingleFlight("snapshot")
+        self._snapshot: Optional[FundSnapshot] = None
+        # Versioned files never change, so pinned snapshots are kept as long
+        # as their version is still retained.
+        self._pinned: Dict[int, FundSnapshot] = {}
+
+    @staticmethod
+    def _current_key() -> Tuple:
+        return (scraper_adapter.data_generation(), scraper_adapter.data_fingerprint())
+
+    def get_version(self, version: int) -> Optional[FundSnapshot]:
+        """Snapshot of a kept data version, or None if it is unknown."""
+        snap = self._pinned.get(version)
+        if snap is not None:
+            return snap
+        return self._builds.do(("version", version), lambda: self._build_version(version))
+
+    def _build_version(self, version: int) -> Optional[FundSnapshot]:
+        snap = self._pinned.get(version)
+        if snap is not None:
+            return snap
+        snap = build_snapshot(("version", version), version)
+        if snap is None:
+            return None
+        kept = {v["version"] for v in scraper_adapter.list_versions()}
+        with self._lock:
+            self._pinned = {v: s for v, s in self._pinned.items() if v in kept}
+            self._pinned[version] = snap
+        return snap
+
+    def get(self) -> FundSnapshot:
+        snap = self._snapshot
+        key = self._current_key()
+        if snap is not None and snap.key == key:
+            return snap
+        # Only one thread rebuilds a given dataset; the others wait and reuse its result.
+        return self._builds.do(key, lambda: self._build_current(key))
+
+    def _build_current(self, key: Tuple) -> FundSnapshot:
+        snap = self._snapshot
+        if snap is not None and snap.key == key:
+            return snap
+
+        built = build_snapshot(key)
+        if built is None and snap is not None and key[1] is not None:
+            # Stored data exists but could not be read (e.g. mid-write):
+            # keep serving the last good snapshot.
+            logging.warning("Keeping previous fund snapshot; dataset unreadable")
+            return snap
+
+        snap = built if built is not None else FundSnapshot(key, None)
+        with self._lock:
+            # A build for an older dataset must not replace a newer snapshot
+            current = self._snapshot
+            if current is None or current.generation is None or snap.generation is None \
+                    or current.generation <= snap.generation:
+                self._snapshot = snap
+        logging.info("Built fund snapshot (generation %s, %d funds)",
+                     snap.generation, len(snap.table))
+        return snap
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshot = None
+            self._pinned = {}
+
+
+snapshots = SnapshotCache()
+
+
+def current(version: Optional[int] = None) -> Optional[FundSnapshot]:
+    """Return the latest fund snapshot, rebuilding it if the dataset changed.
+
+    With a version, return that kept snapshot instead (None if unknown).
+    """
+    if version is not None:
+        return snapshots.get_version(version)
+    return snapshots.get()
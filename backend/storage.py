@@ -0,0 +1,435 @@
+"""Pluggable storage for the scraped fund dataset.
+
+Two backends share one interface:
+
+- ``json``: data.json plus versioned copies under ``versions/`` (the original
+  format).
+- ``sqlite``: ``funds.db`` with one row per fund, indexed on name, category
+  and risk. Plain scraped rows are stored as columns only and rebuilt from
+  them on load; rows with other fields keep a JSON copy of the record.
+
+Both can load a column projection (``load(columns=...)``); SQLite then
+reads only those columns. Filtering, sorting and pagination are not pushed
+down to storage: the API answers them from the snapshot's in-memory
+FundIndex (see snapshot.py), which also covers pinned versions and range
+filters, so the store only ever loads whole datasets.
+
+Run ``python -m storage migrate --from json --to sqlite`` from backend/ to
+convert an existing data.json.
+"""
+import os
+import json
+import zlib
+import sqlite3
+import logging
+import tempfile
+import argparse
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Tuple
+
+import metrics
+import processor
+
+
+def _keep_versions(value: str) -> int:
+    keep = int(value)
+    if keep < 1:
+        raise ValueError(f"DATA_VERSIONS_KEEP must be at least 1 (the published version), got {keep}")
+    return keep
+
+
+# Number of versioned snapshots kept for rollback
+KEEP_VERSIONS = _keep_versions(os.environ.get("DATA_VERSIONS_KEEP", "5"))
+
+# Raw fields stored as their own columns (everything else lives in `record`)
+RAW_FIELDS = ['name', 'category', 'url', 'one_year_return', 'three_year_return', 'five_year_return',
+              'expense_ratio', 'aum']
+# Derived columns computed at write time, for ad-hoc SQL over funds.db
+DERIVED_FIELDS = ['category_norm', 'risk', 'one_year_return_num', 'three_year_return_num', 'cagr_num']
+# Key order of scraped records; rows in this order with only text values are rebuilt from columns
+SCRAPED_ORDER = ['name', 'category', 'one_year_return', 'three_year_return', 'five_year_return', 'url',
+                 'expense_ratio', 'aum']
+
+
+def write_json_atomic(path: str, data) -> None:
+    """Write compact JSON to a temp file in the same directory, then rename it over path.
+
+    Readers see either the old file or the complete new one, never a
+    partially written file, and a crash mid-write leaves the old file intact.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _file_fingerprint(path: str) -> Optional[Tuple]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _derived(record: Dict) -> Dict:
+    category = processor.normalize_category(record.get('category'))
+    return {
+        'category_norm': category,
+        'risk': processor.assign_risk(category),
+        'one_year_return_num': processor.parse_percent(record.get('one_year_return')),
+        'three_year_return_num': processor.parse_percent(record.get('three_year_return')),
+        'cagr_num': processor.parse_percent(record.get('five_year_return')),
+    }
+
+
+def _columnar(record: Dict) -> bool:
+    """True if record can be rebuilt exactly from its RAW_FIELDS columns."""
+    return (all(type(v) is str for v in record.values())
+            and list(record) == [f for f in SCRAPED_ORDER if f in record])
+
+
+def _check_columns(columns: Optional[List[str]]) -> None:
+    unknown = set(columns or ()) - set(RAW_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown columns: {sorted(unknown)}")
+
+
+def _project(records: List[Dict], columns: Optional[List[str]]) -> List[Dict]:
+    if not columns:
+        return records
+    return [{c: r[c] for c in columns if c in r} for r in records]
+
+
+class FundStore(ABC):
+    """Interface shared by the storage backends."""
+
+    name = ''
+
+    @abstractmethod
+    def fingerprint(self) -> Optional[Tuple]:
+        """Changes whenever the published dataset changes (None if there is none)."""
+
+    def updated_at(self) -> Optional[float]:
+        """When the published dataset last changed (epoch seconds); None if there is none."""
+        fingerprint = self.fingerprint()
+        return fingerprint[0] / 1e9 if fingerprint else None
+
+    @abstractmethod
+    def load(self, version: Optional[int] = None, columns: Optional[List[str]] = None) -> Optional[List[Dict]]:
+        """All raw fund records (or those of a kept version); None if missing.
+
+        With columns (a subset of RAW_FIELDS), each record holds only those
+        of its fields.
+        """
+
+    @abstractmethod
+    def save(self, records: List[Dict]) -> int:
+        """Atomically publish records as a new version; returns the version number."""
+
+    @abstractmethod
+    def versions(self) -> List[Dict]:
+        """Kept versions, oldest first: [{version, timestamp, rows, ...}]."""
+
+    @abstractmethod
+    def rollback(self, version: int) -> bool:
+        """Republish a kept version. Returns False if it is unknown."""
+
+
+class JsonStore(FundStore):
+    """data.json plus versioned copies and a manifest under versions/."""
+
+    name = 'json'
+
+    def __init__(self, path: str):
+        self.path = path
+        self.versions_dir = os.path.join(os.path.dirname(path), 'versions')
+        self._lock = threading.Lock()
+
+    @property
+    def _manifest_path(self) -> str:
+        return os.path.join(self.versions_dir, 'manifest.json')
+
+    def fingerprint(self) -> Optional[Tuple]:
+        return _file_fingerprint(self.path)
+
+    def versions(self) -> List[Dict]:
+        try:
+            with open(self._manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+        except Exception as e:
+            logging.error("Failed to load versions manifest: %s", e)
+            return []
+
+    def load(self, version: Optional[int] = None, columns: Optional[List[str]] = None) -> Optional[List[Dict]]:
+        _check_columns(columns)
+        path = self.path
+        if version is not None:
+            entry = next((v for v in self.versions() if v["version"] == version), None)
+            if entry is None:
+                logging.warning("No data version %s", version)
+                return None
+            path = os.path.join(self.versions_dir, entry["file"])
+
+        if not os.path.isfile(path):
+            logging.warning("No backend data.json found at %s", path)
+            return None
+
+        try:
+            with metrics.timer("load"):
+                with open(path, "rb") as f:
+                    data = f.read()
+            with metrics.timer("parse"):
+                return _project(json.loads(data), columns)
+        except Exception as e:
+            logging.error("Failed to load backend data.json: %s", e)
+            return None
+
+    def save(self, records: List[Dict]) -> int:
+        with self._lock:
+            versions = self.versions()
+            version = versions[-1]["version"] + 1 if versions else 1
+            now = _now()
+            filename = f"data-{version:06d}-{now.strftime('%Y%m%dT%H%M%SZ')}.json"
+
+            write_json_atomic(os.path.join(self.versions_dir, filename), records)
+            write_json_atomic(self.path, records)
+
+            versions.append({
+                "version": version,
+                "timestamp": now.isoformat(timespec="seconds"),
+                "rows": len(records),
+                "file": filename,
+            })
+            expired, versions = versions[:-KEEP_VERSIONS], versions[-KEEP_VERSIONS:]
+            write_json_atomic(self._manifest_path, versions)
+            for entry in expired:
+                try:
+                    os.remove(os.path.join(self.versions_dir, entry["file"]))
+                except OSError:
+                    pass
+            return version
+
+    def rollback(self, version: int) -> bool:
+        records = self.load(version)
+        if records is None:
+            return False
+        with self._lock:
+            write_json_atomic(self.path, records)
+        return True
+
+
+class SqliteStore(FundStore):
+    """funds.db: one indexed row per fund, versions kept as compressed blobs."""
+
+    name = 'sqlite'
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS funds (
+        pos INTEGER PRIMARY KEY,
+        name TEXT, category TEXT, url TEXT,
+        one_year_return TEXT, three_year_return TEXT, five_year_return TEXT,
+        expense_ratio TEXT, aum TEXT,
+        category_norm TEXT, risk TEXT,
+        one_year_return_num REAL, three_year_return_num REAL, cagr_num REAL,
+        record TEXT NOT NULL  -- JSON of the record, or '' if the columns hold all of it
+    );
+    CREATE INDEX IF NOT EXISTS idx_funds_name ON funds(name);
+    CREATE INDEX IF NOT EXISTS idx_funds_category ON funds(category_norm);
+    CREATE INDEX IF NOT EXISTS idx_funds_risk ON funds(risk);
+    CREATE TABLE IF NOT EXISTS versions (
+        version INTEGER PRIMARY KEY,
+        timestamp TEXT NOT NULL,
+        rows INTEGER NOT NULL,
+        data BLOB NOT NULL
+    );
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        # A short-lived connection per call keeps the store thread-safe
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        if not self._initialized:
+            conn.executescript(self.SCHEMA)
+            self._initialized = True
+        return conn
+
+    def fingerprint(self) -> Optional[Tuple]:
+        if not os.path.isfile(self.path):
+            return None
+        return _file_fingerprint(self.path)
+
+    def versions(self) -> List[Dict]:
+        if not os.path.isfile(self.path):
+            return []
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT version, timestamp, rows FROM versions ORDER BY version").fetchall()
+        finally:
+            conn.close()
+        return [dict(r) for r in rows]
+
+    def load(self, version: Optional[int] = None, columns: Optional[List[str]] = None) -> Optional[List[Dict]]:
+        _check_columns(columns)
+        fields = columns or SCRAPED_ORDER
+        if not os.path.isfile(self.path):
+            logging.warning("No fund database found at %s", self.path)
+            return None
+        try:
+            conn = self._connect()
+            try:
+                if version is not None:
+                    row = conn.execute("SELECT data FROM versions WHERE version = ?", (version,)).fetchone()
+                    if row is None:
+                        logging.warning("No data version %s", version)
+                        return None
+                    with metrics.timer("parse"):
+                        return _project(json.loads(zlib.decompress(row["data"])), columns)
+                if conn.execute("SELECT 1 FROM versions LIMIT 1").fetchone() is None:
+                    return None
+                conn.row_factory = None
+                with metrics.timer("load"):
+                    # The JSON record is only read for rows its columns do not fully hold
+                    rows = conn.execute("SELECT NULLIF(record, ''), %s FROM funds ORDER BY pos"
+                                        % ", ".join(fields)).fetchall()
+                with metrics.timer("parse"):
+                    return [_project([json.loads(r[0])], columns)[0] if r[0] else
+                            {f: v for f, v in zip(fields, r[1:]) if v is not None}
+                            for r in rows]
+            finally:
+                conn.close()
+        except Exception as e:
+            logging.error("Failed to load fund database: %s", e)
+            return None
+
+    def _publish(self, conn: sqlite3.Connection, records: List[Dict]) -> None:
+        conn.execute("DELETE FROM funds")
+        conn.executemany(
+            "INSERT INTO funds (pos, %s, %s, record) VALUES (?, %s, %s, ?)" % (
+                ", ".join(RAW_FIELDS), ", ".join(DERIVED_FIELDS),
+                ", ".join("?" * len(RAW_FIELDS)), ", ".join("?" * len(DERIVED_FIELDS))),
+            (
+                [pos]
+                + [None if r.get(f) is None else str(r.get(f)) for f in RAW_FIELDS]
+                + [None if v != v else v for v in _derived(r).values()]
+                + ['' if _columnar(r) else json.dumps(r, ensure_ascii=False, separators=(",", ":"))]
+                for pos, r in enumerate(records)
+            ),
+        )
+
+    def save(self, records: List[Dict]) -> int:
+        blob = zlib.compress(json.dumps(records, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        with self._lock:
+            conn = self._connect()
+            try:
+                # One transaction: readers see the old dataset or the new one
+                with conn:
+                    row = conn.execute("SELECT MAX(version) FROM versions").fetchone()
+                    version = (row[0] or 0) + 1
+                    self._publish(conn, records)
+                    conn.execute("INSERT INTO versions (version, timestamp, rows, data) VALUES (?, ?, ?, ?)",
+                                 (version, _now().isoformat(timespec="seconds"), len(records), blob))
+                    conn.execute("DELETE FROM versions WHERE version <= ?", (version - KEEP_VERSIONS,))
+            finally:
+                conn.close()
+            return version
+
+    def rollback(self, version: int) -> bool:
+        records = self.load(version)
+        if records is None:
+            return False
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    self._publish(conn, records)
+            finally:
+                conn.close()
+        return True
+
+
+BACKENDS = {
+    'json': (JsonStore, 'data.json'),
+    'sqlite': (SqliteStore, 'funds.db'),
+}
+
+_stores: Dict[Tuple[str, str], FundStore] = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(backend: str, data_dir: str, json_path: Optional[str] = None) -> FundStore:
+    """Return the (cached) store for backend under data_dir."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown storage backend {backend!r} (choose from {sorted(BACKENDS)})")
+    cls, filename = BACKENDS[backend]
+    path = json_path if backend == 'json' and json_path else os.path.join(data_dir, filename)
+    with _stores_lock:
+        store = _stores.get((backend, path))
+        if store is None:
+            store = _stores[(backend, path)] = cls(path)
+        return store
+
+
+def migrate(source: FundStore, target: FundStore) -> int:
+    """Copy kept versions and the current dataset from source to target.
+
+    Returns the number of versions written to target.
+    """
+    written = 0
+    last = None
+    for entry in source.versions():
+        records = source.load(entry["version"])
+        if records is None:
+            continue
+        target.save(records)
+        last = records
+        written += 1
+    current = source.load()
+    if current is not None and current != last:
+        target.save(current)
+        written += 1
+    return written
+
+
+def main(argv=None):
+    default_dir = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'data')
+    parser = argparse.ArgumentParser(description="Fund dataset storage tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    mig = sub.add_parser("migrate", help="copy the dataset between storage backends")
+    mig.add_argument("--from", dest="source", default="json", choices=sorted(BACKENDS))
+    mig.add_argument("--to", dest="target", required=True, choices=sorted(BACKENDS))
+    mig.add_argument("--data-dir", default=default_dir)
+    args = parser.parse_args(argv)
+
+    if args.source == args.target:
+        parser.error("--from and --to must differ")
+    written = migrate(open_store(args.source, args.data_dir), open_store(args.target, args.data_dir))
+    print(f"Migrated {written} version(s) from {args.source} to {args.target} in {args.data_dir}")
+
+
+if __name__ == "__main__":
+    main()
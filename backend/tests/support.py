@@ -0,0 +1,32 @@
+"""Shared base for tests that run against their own dataset directory."""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+import scraper_adapter  # noqa: E402
+import snapshot  # noqa: E402
+
+
+class DataDirTestCase(unittest.TestCase):
+    """Points scraper_adapter.BACKEND_DATA at a fresh temp dir with an empty snapshot cache.
+
+    Everything is restored by cleanups, which run after the subclass's
+    tearDown, so a tearDown can still use the directory.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.swap(scraper_adapter, 'BACKEND_DATA', os.path.join(self.tmp, 'data.json'))
+        snapshot.snapshots.invalidate()
+        self.addCleanup(snapshot.snapshots.invalidate)
+
+    def swap(self, owner, name, value):
+        """Set owner.name to value until the test finishes."""
+        self.addCleanup(setattr, owner, name, getattr(owner, name))
+        setattr(owner, name, value)
@@ -0,0 +1,215 @@
+import os
+import sys
+import asyncio
+import time
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+import admission  # noqa: E402
+import jobs  # noqa: E402
+import metrics  # noqa: E402
+from test_api import APITestCase  # noqa: E402
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self):
+        self.flight = admission.SingleFlight("test")
+        self.release = threading.Event()
+        self.calls = 0
+        self.joined = metrics.COALESCED.value("test")
+
+    def slow(self):
+        self.calls += 1
+        self.release.wait(5)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+    def run_concurrently(self, n):
+        results = [None] * n
+
+        def call(i):
+            try:
+                results[i] = self.flight.do("key", self.slow)
+            except Exception as e:
+                results[i] = e
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(n)]
+        for t in threads:
+            t.start()
+        # Let every thread join the flight before the leader finishes
+        wait_until(lambda: metrics.COALESCED.value("test") >= self.joined + n - 1)
+        self.release.set()
+        for t in threads:
+            t.join(5)
+        return results
+
+    def test_concurrent_calls_share_one_result(self):
+        self.result = {"ranked": 1}
+        results = self.run_concurrently(5)
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertEqual(self.flight.in_flight(), 0)
+
+        # Finished flights are not cached
+        self.flight.do("key", self.slow)
+        self.assertEqual(self.calls, 2)
+
+    def test_error_reaches_every_caller(self):
+        self.result = ValueError("bad weights")
+        results = self.run_concurrently(3)
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_rate(self):
+        now = [0.0]
+        limiter = admission.ClientLimiter(rate=2, burst=3, clock=lambda: now[0])
+        self.assertEqual([limiter.check("a") for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(limiter.check("a"), 0.5)
+        # Other clients have their own bucket
+        self.assertEqual(limiter.check("b"), 0)
+
+        now[0] = 0.5
+        self.assertEqual(limiter.check("a"), 0)
+        self.assertAlmostEqual(limiter.check("a"), 0.5)
+
+    def test_zero_rate_never_refills(self):
+        bucket = admission.TokenBucket(rate=0, burst=1, now=0)
+        self.assertEqual(bucket.take(0), 0)
+        self.assertEqual(bucket.take(1000), float("inf"))
+
+    def test_least_recently_seen_clients_are_dropped(self):
+        limiter = admission.ClientLimiter(rate=0, burst=1)
+        with mock.patch.object(admission, "MAX_CLIENTS", 2):
+            for client in ("a", "b", "a", "c"):
+                limiter.check(client)
+        self.assertEqual(list(limiter._buckets), ["a", "c"])
+
+
+class TestAdmissionQueue(unittest.TestCase):
+    def test_waiters_are_admitted_in_order_and_overflow_refused(self):
+        async def scenario():
+            queue = admission.AdmissionQueue(max_active=1, max_waiting=2, timeout=5)
+            self.assertTrue(await queue.acquire())
+            order = []
+
+            async def wait(name):
+                admitted = await queue.acquire()
+                order.append((name, admitted))
+
+            waiters = [asyncio.create_task(wait(name)) for name in ("first", "second")]
+            await asyncio.sleep(0)
+            self.assertEqual(queue.waiting, 2)
+            # No room left to wait
+            self.assertFalse(await queue.acquire())
+
+            queue.release()
+            await asyncio.sleep(0.01)
+            self.assertEqual(order, [("first", True)])
+            self.assertEqual(queue.active, 1)
+            queue.release()
+            queue.release()
+            await asyncio.gather(*waiters)
+            self.assertEqual(order, [("first", True), ("second", True)])
+            self.assertEqual((queue.active, queue.waiting), (0, 0))
+
+        asyncio.run(scenario())
+
+    def test_wait_times_out(self):
+        async def scenario():
+            queue = admission.AdmissionQueue(max_active=1, max_waiting=1, timeout=0.01)
+            await queue.acquire()
+            self.assertFalse(await queue.acquire())
+            self.assertEqual(queue.waiting, 0)
+            queue.release()
+            self.assertEqual(queue.active, 0)
+
+        asyncio.run(scenario())
+
+    def test_cancelled_waiter_gives_back_a_handed_over_slot(self):
+        async def scenario():
+            queue = admission.AdmissionQueue(max_active=1, max_waiting=1, timeout=5)
+            await queue.acquire()
+            waiter = asyncio.create_task(queue.acquire())
+            await asyncio.sleep(0)
+            queue.release()
+            waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+            self.assertEqual((queue.active, queue.waiting), (0, 0))
+
+        asyncio.run(scenario())
+
+
+class TestAdmissionAPI(APITestCase):
+    def test_rate_limited_update_gets_retry_after(self):
+        limiter = admission.ClientLimiter(rate=0.1, burst=1)
+        rejected = metrics.ADMISSION_REJECTED.value("update", "rate")
+        with mock.patch.object(admission.UPDATE, "limiter", limiter), \
+                mock.patch.object(jobs.manager, "mode", jobs.EXTERNAL):
+            self.assertEqual(self.client.post('/api/update').status_code, 409)
+            r = self.client.post('/api/update')
+        self.assertEqual(r.status_code, 429)
+        self.assertEqual(r.headers['retry-after'], '10')
+        self.assertEqual(metrics.ADMISSION_REJECTED.value("update", "rate"), rejected + 1)
+
+    def test_zero_rate_client_gets_503_without_retry_after(self):
+        limiter = admission.ClientLimiter(rate=0, burst=1)
+        with mock.patch.object(admission.UPDATE, "limiter", limiter), \
+                mock.patch.object(jobs.manager, "mode", jobs.EXTERNAL):
+            self.assertEqual(self.client.post('/api/update').status_code, 409)
+            r = self.client.post('/api/update')
+        self.assertEqual(r.status_code, 503)
+        self.assertNotIn('retry-after', r.headers)
+
+    def test_full_news_queue_is_refused(self):
+        queue = admission.AdmissionQueue(max_active=0, max_waiting=0)
+        with mock.patch.object(admission.NEWS, "queue", queue):
+            r = self.client.get('/api/news')
+        self.assertEqual(r.status_code, 429)
+        self.assertEqual(r.headers['retry-after'], '1')
+
+    def test_identical_rankings_are_computed_once(self):
+        snap = self.client.get('/api/funds/top10')
+        self.assertEqual(snap.status_code, 200)
+        release = threading.Event()
+        calls = []
+        original = admission.SingleFlight.do
+
+        def do(flight, key, fn):
+            def slow():
+                calls.append(key)
+                release.wait(5)
+                return fn()
+            return original(flight, key, slow)
+
+        joined = metrics.COALESCED.value("ranking")
+        results = []
+        with mock.patch.object(admission.SingleFlight, "do", do):
+            threads = [threading.Thread(target=lambda: results.append(
+                self.client.get('/api/funds/top10?cagr_weight=1&risk=High'))) for _ in range(4)]
+            for t in threads:
+                t.start()
+            wait_until(lambda: metrics.COALESCED.value("ranking") >= joined + 3)
+            release.set()
+            for t in threads:
+                t.join(5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual({r.status_code for r in results}, {200})
+        self.assertEqual(len({r.content for r in results}), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,252 @@
+import os
+import sys
+import gzip
+import json
+import unittest
+import subprocess
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+import scraper_adapter  # noqa: E402
+import snapshot  # noqa: E402
+from tests.support import DataDirTestCase  # noqa: E402
+
+
+def sample_funds(n=40):
+    return [
+        {"name": f"Fund {i}", "category": "Small Cap" if i % 2 else "Debt",
+         "one_year_return": f"{i * 1.5:.1f}%", "three_year_return": f"{i:.1f}%",
+         "five_year_return": f"{i * 0.5:.1f}%"}
+        for i in range(n)
+    ]
+
+
+class APITestCase(DataDirTestCase):
+    """Runs the app against a temporary data.json (without the startup scrape)."""
+
+    def setUp(self):
+        super().setUp()
+        self.write(sample_funds())
+        self.client = TestClient(main.app)
+
+    def write(self, data):
+        with open(scraper_adapter.BACKEND_DATA, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+
+class TestConditionalRequests(APITestCase):
+    def test_etag_and_304(self):
+        for path in ('/api/funds', '/api/funds/top10', '/api/export/csv'):
+            r = self.client.get(path)
+            self.assertEqual(r.status_code, 200, path)
+            etag = r.headers['etag']
+            r2 = self.client.get(path, headers={'If-None-Match': etag})
+            self.assertEqual(r2.status_code, 304, path)
+            self.assertEqual(r2.content, b'')
+
+    def test_each_encoding_has_its_own_etag(self):
+        tags = {}
+        for coding in ('gzip', 'br', 'identity'):
+            r = self.client.get('/api/funds', headers={'Accept-Encoding': coding})
+            tags[r.headers.get('content-encoding', 'identity')] = r.headers['etag']
+        self.assertEqual(len(set(tags.values())), len(tags))
+        # A cached gzip body does not validate an uncompressed response
+        r = self.client.get('/api/funds', headers={'Accept-Encoding': 'identity', 'If-None-Match': tags['gzip']})
+        self.assertEqual(r.status_code, 200)
+        r = self.client.get('/api/funds', headers={'Accept-Encoding': 'gzip', 'If-None-Match': tags['gzip']})
+        self.assertEqual(r.status_code, 304)
+        self.assertEqual(r.headers['etag'], tags['gzip'])
+
+    def test_etag_changes_with_data(self):
+        etag = self.client.get('/api/funds').headers['etag']
+        self.write(sample_funds(10))
+        r = self.client.get('/api/funds', headers={'If-None-Match': etag})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(len(r.json()), 10)
+
+    def test_gzip_variant(self):
+        r = self.client.get('/api/funds', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(r.headers.get('content-encoding'), 'gzip')
+        self.assertEqual(len(r.json()), 40)
+        raw = snapshot.current().funds
+        self.assertEqual(gzip.decompress(raw.encoded['gzip']), raw.body)
+
+    def test_identity_when_not_accepted(self):
+        r = self.client.get('/api/funds', headers={'Accept-Encoding': 'identity'})
+        self.assertNotIn('content-encoding', r.headers)
+        self.assertEqual(len(r.json()), 40)
+
+
+class TestTop10(APITestCase):
+    def test_default_top10(self):
+        ranked = self.client.get('/api/funds/top10').json()
+        self.assertEqual(len(ranked), 10)
+        self.assertEqual(ranked[0]['name'], 'Fund 39')
+
+    def test_weights_and_filters(self):
+        ranked = self.client.get('/api/funds/top10', params={
+            'category': 'Debt', 'one_year_weight': 1, 'cagr_weight': 0, 'three_year_weight': 0}).json()
+        self.assertEqual(len(ranked), 10)
+        self.assertTrue(all(r['category'] == 'Debt' for r in ranked))
+        self.assertEqual(ranked[0]['name'], 'Fund 38')
+
+    def test_negative_weight_rejected(self):
+        r = self.client.get('/api/funds/top10', params={'cagr_weight': -1})
+        self.assertEqual(r.status_code, 422)
+
+
+class TestTopPerGroup(APITestCase):
+    def test_default_is_served_from_the_snapshot(self):
+        r = self.client.get('/api/funds/top')
+        self.assertEqual(r.status_code, 200)
+        self.assertIn('etag', r.headers)
+        body = r.json()
+        self.assertEqual((body['group_by'], body['normalization']), ('category', 'percentile'))
+        self.assertEqual(sorted(body['groups']), ['Debt', 'Equity'])
+        self.assertEqual([f['name'] for f in body['groups']['Debt'][:2]], ['Fund 38', 'Fund 36'])
+        self.assertEqual(len(body['groups']['Equity']), 5)
+
+    def test_parameters(self):
+        body = self.client.get('/api/funds/top', params={
+            'n': 2, 'group_by': 'risk', 'normalization': 'robust_z', 'category': 'Debt'}).json()
+        self.assertEqual(body['groups'], {'Low Risk': body['groups']['Low Risk']})
+        self.assertEqual([f['name'] for f in body['groups']['Low Risk']], ['Fund 38', 'Fund 36'])
+        ranked = self.client.get('/api/funds/top10', params={'normalization': 'percentile',
+                                                             'group_by': 'category'}).json()
+        self.assertEqual({r['name'] for r in ranked[:2]}, {'Fund 38', 'Fund 39'})
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.client.get('/api/funds/top', params={'group_by': 'name'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/funds/top', params={'normalization': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/funds/top10', params={'normalization': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/funds/top', params={'n': 0}).status_code, 422)
+
+
+class TestFundsPaging(APITestCase):
+    def test_unpaged_request_serves_full_list(self):
+        self.assertEqual(len(self.client.get('/api/funds').json()), 40)
+
+    def test_cursor_walks_filtered_sorted_pages(self):
+        params = {'category': 'Debt', 'sort': '-one_year', 'limit': 7, 'fields': 'name,one_year_return_num'}
+        page = self.client.get('/api/funds', params=params).json()
+        self.assertEqual(page['total'], 20)
+        names = [r['name'] for r in page['items']]
+        while page['next_cursor']:
+            page = self.client.get('/api/funds', params=dict(params, cursor=page['next_cursor'])).json()
+            names += [r['name'] for r in page['items']]
+        self.assertEqual(names, [f'Fund {i}' for i in range(38, -1, -2)])
+        self.assertEqual(set(page['items'][0]), {'name', 'one_year_return_num'})
+
+    def test_range_filter(self):
+        page = self.client.get('/api/funds', params={'min_cagr': 10, 'max_cagr': 12}).json()
+        self.assertEqual([r['name'] for r in page['items']], ['Fund 20', 'Fund 21', 'Fund 22', 'Fund 23', 'Fund 24'])
+        self.assertIsNone(page['total'])
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.client.get('/api/funds', params={'sort': 'bogus'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/funds', params={'fields': 'bogus'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/funds', params={'cursor': '!!'}).status_code, 400)
+
+    def test_cursor_rejected_after_data_changes(self):
+        cursor = self.client.get('/api/funds', params={'limit': 5}).json()['next_cursor']
+        self.write(sample_funds(10))
+        r = self.client.get('/api/funds', params={'limit': 5, 'cursor': cursor})
+        self.assertEqual(r.status_code, 400)
+
+
+class TestBatchScoring(APITestCase):
+    def test_scenarios_match_top10(self):
+        body = self.client.post('/api/score/batch', json={
+            'scenarios': [{}, {'weights': [0, 0, 1], 'category': 'Debt'}],
+            'weights': [[1, 0, 0]], 'subsets': [{'funds': ['Fund 1', 'Fund 2', 'Fund 3']}, {'risk': 'Low Risk'}],
+            'top_n': 3,
+        }).json()
+        results = body['results']
+        self.assertEqual(len(results), 4)
+        top10 = self.client.get('/api/funds/top10').json()
+        self.assertEqual([r['name'] for r in results[0]['top']], [r['name'] for r in top10[:3]])
+        self.assertEqual(results[0]['top'][0]['score'], top10[0]['score'])
+        self.assertEqual([r['name'] for r in results[1]['top']], ['Fund 38', 'Fund 36', 'Fund 34'])
+        self.assertEqual(results[2]['candidates'], 3)
+        self.assertEqual([r['id'] for r in results[2]['top']], ['Fund 3', 'Fund 2', 'Fund 1'])
+        self.assertEqual(results[3]['weights'], [1, 0, 0])
+        self.assertTrue(all(r['risk'] == 'Low Risk' for r in results[3]['top']))
+
+    def test_results_are_memoized_per_snapshot(self):
+        main.batch_bodies.clear()
+        request = {'weights': [[0.2, 0.2, 0.6]]}
+        first = self.client.post('/api/score/batch', json=request).json()
+        self.assertEqual(self.client.post('/api/score/batch', json=request).json(), first)
+        self.assertEqual(len(main.batch_bodies), 1)
+        self.write(sample_funds(5))
+        second = self.client.post('/api/score/batch', json=request).json()
+        self.assertNotEqual(first, second)
+        self.assertEqual(len(main.batch_bodies), 2)
+
+    def test_errors(self):
+        post = self.client.post
+        self.assertEqual(post('/api/score/batch', json={}).status_code, 400)
+        self.assertEqual(post('/api/score/batch', json={'weights': [[1, 2]]}).status_code, 422)
+        self.assertEqual(post('/api/score/batch', json={'weights': [[-1, 0, 0]]}).status_code, 422)
+        self.assertEqual(post('/api/score/batch', json={'weights': [[1, 1, 1]], 'group_by': 'name'}).status_code,
+                         400)
+        r = post('/api/score/batch', json={'scenarios': [{'funds': ['Fund 1', 'nope']}]})
+        self.assertEqual(r.status_code, 404)
+        self.assertIn('nope', r.json()['detail'])
+
+
+class TestPeersAndCompare(APITestCase):
+    def test_peers_stay_in_category(self):
+        r = self.client.get('/api/funds/Fund 10/peers', params={'k': 3})
+        self.assertEqual(r.status_code, 200)
+        body = r.json()
+        self.assertEqual(body['fund']['name'], 'Fund 10')
+        self.assertEqual([p['name'] for p in body['peers']], ['Fund 8', 'Fund 12', 'Fund 6'])
+        self.assertTrue(all(p['category'] == 'Debt' for p in body['peers']))
+
+    def test_url_slug_is_the_fund_id(self):
+        funds = sample_funds(4)
+        for i, f in enumerate(funds):
+            f['url'] = f'https://groww.in/mutual-funds/fund-{i}-direct-growth'
+        self.write(funds)
+        r = self.client.get('/api/funds/fund-1-direct-growth/peers')
+        self.assertEqual(r.json()['peers'][0]['id'], 'fund-3-direct-growth')
+
+    def test_compare(self):
+        r = self.client.get('/api/compare', params={'ids': 'Fund 39,Fund 1,Fund 2'})
+        self.assertEqual(r.status_code, 200)
+        body = r.json()
+        self.assertEqual([f['name'] for f in body['funds']], ['Fund 39', 'Fund 1', 'Fund 2'])
+        self.assertEqual(body['funds'][0]['percentiles']['cagr'], 1.0)
+        self.assertEqual(body['distances'][0][0], 0)
+        self.assertIsNone(body['distances'][0][2])
+        self.assertGreater(body['distances'][0][1], 0)
+
+    def test_errors(self):
+        self.assertEqual(self.client.get('/api/funds/nope/peers').status_code, 404)
+        self.assertEqual(self.client.get('/api/funds/Fund 1/peers', params={'k': 0}).status_code, 422)
+        self.assertEqual(self.client.get('/api/compare', params={'ids': 'Fund 1,nope'}).status_code, 404)
+        self.assertEqual(self.client.get('/api/compare', params={'ids': ' , '}).status_code, 400)
+
+
+class TestColdStart(unittest.TestCase):
+    def test_api_import_defers_scraper_and_feed_libraries(self):
+        probe = ("import sys, main; print(','.join(m for m in ('selenium', 'webdriver_manager', 'httpx', "
+                 "'feedparser') if m in sys.modules))")
+        backend = os.path.join(os.path.dirname(__file__), '..')
+        out = subprocess.run([sys.executable, '-c', probe], cwd=backend, capture_output=True, text=True, check=True)
+        self.assertEqual(out.stdout.strip(), '')
+
+    def test_news_does_not_import_the_fund_snapshot(self):
+        probe = "import sys, news; print(','.join(m for m in ('snapshot', 'pandas') if m in sys.modules))"
+        backend = os.path.join(os.path.dirname(__file__), '..')
+        out = subprocess.run([sys.executable, '-c', probe], cwd=backend, capture_output=True, text=True, check=True)
+        self.assertEqual(out.stdout.strip(), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import io
+import os
+import sys
+import csv
+import gzip
+import json
+import unittest
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+import export  # noqa: E402
+import processor  # noqa: E402
+from benchmarks.synthetic import synthetic_funds  # noqa: E402
+from tests.test_api import APITestCase  # noqa: E402
+
+
+class TestStreams(unittest.TestCase):
+    def setUp(self):
+        self.index = processor.FundIndex(processor.clean_df(synthetic_funds(2500)))
+
+    def blocks(self, **query):
+        return self.index.iter_positions(chunk=export.CHUNK_ROWS, **query)
+
+    def test_csv_streams_one_chunk_per_block(self):
+        fields = ['name', 'category', 'cagr_num']
+        chunks = list(export.stream('csv', self.index.records, self.blocks(), fields))
+        self.assertEqual(len(chunks), 3)
+        rows = list(csv.reader(io.StringIO(b''.join(chunks).decode('utf-8'))))
+        self.assertEqual(rows[0], fields)
+        self.assertEqual(len(rows), len(self.index.records) + 1)
+        first = self.index.records[0]
+        self.assertEqual(rows[1], [first['name'], first['category'],
+                                   '' if first['cagr_num'] is None else str(first['cagr_num'])])
+
+    def test_empty_selection_still_has_header(self):
+        body = b''.join(export.stream('csv', self.index.records, self.blocks(category='none'), ['name']))
+        self.assertEqual(body, b'name\r\n')
+
+    def test_gzip_ndjson_round_trip(self):
+        query = {'category': 'debt', 'sort': 'one_year', 'descending': True}
+        body = gzip.decompress(b''.join(export.stream(
+            'ndjson', self.index.records, self.blocks(**query), self.index.fields, gzip=True)))
+        lines = [json.loads(line) for line in body.decode('utf-8').splitlines()]
+        records, _, total = self.index.page(limit=5000, **query)
+        self.assertEqual(len(lines), total)
+        self.assertEqual(lines, records)
+
+    @unittest.skipIf(export.pq is None, "pyarrow not installed")
+    def test_parquet_round_trip(self):
+        fields = ['name', 'cagr_num']
+        body = b''.join(export.stream('parquet', self.index.records, self.blocks(), fields))
+        table = export.pq.read_table(io.BytesIO(body))
+        self.assertEqual(table.num_rows, len(self.index.records))
+        self.assertEqual(table.column_names, fields)
+
+
+class TestExportEndpoint(APITestCase):
+    def test_filtered_csv_download(self):
+        r = self.client.get('/api/export', params={'category': 'Debt', 'sort': '-one_year', 'fields': 'name'})
+        self.assertEqual(r.status_code, 200)
+        self.assertIn('funds.csv', r.headers['content-disposition'])
+        self.assertEqual(r.text.split('\r\n')[:3], ['name', 'Fund 38', 'Fund 36'])
+
+    def test_gzip_ndjson_download(self):
+        r = self.client.get('/api/export', params={'format': 'ndjson', 'gzip': 'true'})
+        self.assertEqual(r.headers['content-type'], 'application/gzip')
+        self.assertIn('funds.ndjson.gz', r.headers['content-disposition'])
+        self.assertEqual(len(gzip.decompress(r.content).splitlines()), 40)
+
+    def test_bad_selection_rejected_before_streaming(self):
+        self.assertEqual(self.client.get('/api/export', params={'fields': 'bogus'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/export', params={'sort': 'bogus'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/export', params={'format': 'xml'}).status_code, 422)
+
+
+if __name__ == '__main__':
+    unittest.main()
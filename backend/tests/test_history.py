@@ -0,0 +1,125 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import history  # noqa: E402
+import main  # noqa: E402
+import scraper_adapter  # noqa: E402
+from tests.support import DataDirTestCase  # noqa: E402
+
+
+def fund(slug, one_year="10%", three_year="8%", five_year="NA"):
+    return {"name": slug.title() + " Fund", "category": "Debt", "url": f"https://groww.in/mutual-funds/{slug}",
+            "one_year_return": one_year, "three_year_return": three_year, "five_year_return": five_year}
+
+
+class TestHistoryStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.store = history.HistoryStore(os.path.join(self.tmp, 'history.db'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def point_count(self):
+        conn = self.store._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM points").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_unchanged_days_add_no_points(self):
+        self.store.append([fund("a"), fund("b")], day="2026-01-01")
+        result = self.store.append([fund("a"), fund("b")], day="2026-01-02")
+        self.assertEqual(result, {"day": "2026-01-02", "rows": 2, "changed": 0})
+        self.assertEqual(self.point_count(), 2)
+        self.assertEqual([s["day"] for s in self.store.snapshots()], ["2026-01-01", "2026-01-02"])
+
+    def test_fund_history_and_lookup(self):
+        self.store.append([fund("a")], day="2026-01-01")
+        self.store.append([fund("a")], day="2026-01-02")
+        self.store.append([fund("a", one_year="12.5%")], day="2026-01-03")
+
+        result = self.store.history("a")
+        self.assertEqual(result["name"], "A Fund")
+        self.assertEqual([(p["date"], p["one_year"]) for p in result["points"]],
+                         [("2026-01-01", 10.0), ("2026-01-03", 12.5)])
+        self.assertIsNone(result["points"][0]["cagr"])
+        self.assertEqual(self.store.history(result["id"])["key"], result["key"])
+        self.assertEqual(self.store.history("A Fund")["id"], result["id"])
+        self.assertIsNone(self.store.history("missing"))
+
+        # The value in effect at `start` anchors the window
+        window = self.store.history("a", start="2026-01-02", end="2026-01-02")
+        self.assertEqual([p["date"] for p in window["points"]], ["2026-01-01"])
+
+    def test_as_of_uses_values_in_effect(self):
+        self.store.append([fund("a"), fund("b")], day="2026-01-01")
+        self.store.append([fund("a", one_year="11%")], day="2026-01-05")
+
+        self.assertEqual(self.store.as_of("2025-12-31"), [])
+        jan3 = {f["name"]: f for f in self.store.as_of("2026-01-03")}
+        self.assertEqual(jan3["A Fund"]["one_year"], 10.0)
+        self.assertIn("B Fund", jan3)
+
+        # b was missing from the full scrape on the 5th, so it is gone from then on
+        jan6 = self.store.as_of("2026-01-06")
+        self.assertEqual([(f["name"], f["one_year"], f["since"]) for f in jan6],
+                         [("A Fund", 11.0, "2026-01-05")])
+        self.assertFalse(self.store.history("b")["points"][-1]["present"])
+
+    def test_partial_scrape_keeps_missing_funds(self):
+        self.store.append([fund("a"), fund("b")], day="2026-01-01")
+        self.store.append([fund("a", one_year="11%")], day="2026-01-02", full=False)
+        self.assertEqual(len(self.store.as_of("2026-01-02")), 2)
+
+    def test_same_day_append_replaces_that_day(self):
+        self.store.append([fund("a")], day="2026-01-01")
+        self.store.append([fund("a", one_year="9%")], day="2026-01-02")
+        self.store.append([fund("a", one_year="9.5%")], day="2026-01-02")
+        self.assertEqual([p["one_year"] for p in self.store.history("a")["points"]], [10.0, 9.5])
+        self.store.append([fund("a")], day="2026-01-02")
+        self.assertEqual(len(self.store.history("a")["points"]), 1)
+
+
+class TestHistoryAPI(DataDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.swap(scraper_adapter, 'scrape', scraper_adapter.scrape)
+        self.client = TestClient(main.app)
+
+    def test_scrape_records_history(self):
+        scraper_adapter.scrape = lambda **kwargs: ([fund("a"), fund("b")], 0)
+        scraper_adapter.run_scraper()
+        # An unchanged scrape still records the day
+        scraper_adapter.run_scraper()
+
+        res = self.client.get('/api/funds/a/history')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.json()["points"]), 1)
+        self.assertEqual(len(self.client.get('/api/history').json()), 2)
+        self.assertEqual(len(self.client.get('/api/history/snapshots').json()), 1)
+
+    def test_errors(self):
+        self.assertEqual(self.client.get('/api/funds/nope/history').status_code, 404)
+        self.assertEqual(self.client.get('/api/history?as_of=yesterday').status_code, 400)
+        self.assertEqual(self.client.get('/api/history').json(), [])
+        # Reads never create history.db
+        self.assertFalse(os.path.exists(scraper_adapter.history_store().path))
+
+    def test_one_store_per_path(self):
+        store = scraper_adapter.history_store()
+        self.assertIs(scraper_adapter.history_store(), store)
+        scraper_adapter.BACKEND_DATA = os.path.join(self.tmp, 'other', 'data.json')
+        self.assertIsNot(scraper_adapter.history_store(), store)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+import os
+import sys
+import json
+import unittest
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+import incremental  # noqa: E402
+import scraper_adapter  # noqa: E402
+from tests.support import DataDirTestCase  # noqa: E402
+
+
+def fund(slug, one_year="10%", url=True, **extra):
+    record = {"name": slug.title(), "category": "Debt", "one_year_return": one_year,
+              "three_year_return": "NA", "five_year_return": "NA"}
+    if url:
+        record["url"] = f"https://groww.in/mutual-funds/{slug}"
+    record.update(extra)
+    return record
+
+
+class TestDiffAndMerge(unittest.TestCase):
+    def test_delta_counts(self):
+        old = [fund("a"), fund("b"), fund("c")]
+        new = [fund("a"), fund("b", one_year="11%"), fund("d")]
+        delta = incremental.diff_funds(old, new)
+        self.assertEqual(delta.counts(), {"added": 1, "changed": 1, "removed": 1, "unchanged": 1})
+
+        merged = incremental.merge_funds(old, new, delta)
+        self.assertEqual([r["name"] for r in merged], ["A", "B", "D"])
+        self.assertEqual(merged[1]["one_year_return"], "11%")
+
+    def test_partial_scrape_never_removes(self):
+        old = [fund("a"), fund("b")]
+        delta = incremental.diff_funds(old, [fund("a", one_year="1%")], full=False)
+        self.assertEqual(delta.removed, [])
+        merged = incremental.merge_funds(old, [fund("a", one_year="1%")], delta)
+        self.assertEqual(len(merged), 2)
+
+    def test_records_without_url_match_by_name(self):
+        old = [fund("a", url=False)]
+        new = [fund("a")]
+        delta = incremental.diff_funds(old, new)
+        self.assertEqual(delta.counts(), {"added": 0, "changed": 1, "removed": 0, "unchanged": 0})
+        self.assertEqual(incremental.merge_funds(old, new, delta), new)
+
+    def test_builder_keeps_only_added_and_changed_rows(self):
+        old = [fund("a"), fund("b"), fund("c")]
+        builder = incremental.DeltaBuilder(old)
+        builder.add([fund("a"), fund("b", one_year="11%")])
+        builder.add([fund("a"), fund("d")])
+        self.assertEqual(builder.rows, 3)
+        self.assertEqual([r["name"] for r in builder.records], ["B", "D"])
+
+        delta = builder.finish()
+        self.assertEqual(delta.counts(), {"added": 1, "changed": 1, "removed": 1, "unchanged": 1})
+        merged = incremental.merge_funds(old, builder.records, delta)
+        self.assertEqual([r["name"] for r in merged], ["A", "B", "D"])
+
+    def test_hash_ignores_key_order(self):
+        a = {"name": "x", "url": "u"}
+        b = {"url": "u", "name": "x"}
+        self.assertEqual(incremental.record_hash(a), incremental.record_hash(b))
+
+
+class TestIncrementalRunScraper(DataDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.scraped = []
+        # Stats of the fake run, as grow.scrape leaves them in last_run_stats
+        self.stats = {"stop_reason": "pages"}
+        self.grow_stats = scraper_adapter._grow().last_run_stats
+        self._orig_stats = dict(self.grow_stats)
+
+        def fake_scrape(**kwargs):
+            self.grow_stats.clear()
+            self.grow_stats.update(self.stats)
+            return list(self.scraped), 0
+
+        self.swap(scraper_adapter, 'scrape', fake_scrape)
+
+    def tearDown(self):
+        self.grow_stats.clear()
+        self.grow_stats.update(self._orig_stats)
+
+    def read(self):
+        with open(scraper_adapter.BACKEND_DATA, encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_runs_merge_and_log_changes(self):
+        self.scraped = [fund("a"), fund("b")]
+        scraper_adapter.run_scraper()
+        self.assertEqual(scraper_adapter.last_delta["added"], 2)
+
+        mtime = os.stat(scraper_adapter.BACKEND_DATA).st_mtime_ns
+        generation = scraper_adapter.data_generation()
+        scraper_adapter.run_scraper()
+        self.assertEqual(scraper_adapter.last_delta["unchanged"], 2)
+        # Unchanged data is not rewritten, so cached snapshots stay valid
+        self.assertEqual(os.stat(scraper_adapter.BACKEND_DATA).st_mtime_ns, mtime)
+        self.assertEqual(scraper_adapter.data_generation(), generation)
+
+        # A crawl that ended on an empty page saw the whole listing, so "a" is gone
+        self.scraped = [fund("b", one_year="12%")]
+        self.stats = {"stop_reason": "empty_page", "failed_shards": 0}
+        scraper_adapter.run_scraper(pages=0)
+        self.assertEqual(self.read(), [fund("b", one_year="12%")])
+
+        log = incremental.load_change_log(scraper_adapter.change_log_path())
+        self.assertEqual([e["seq"] for e in log], [1, 2])
+        self.assertEqual(log[1]["changed"], [fund("b")["url"]])
+        self.assertEqual(log[1]["removed"], [fund("a")["url"]])
+        self.assertEqual(incremental.load_change_log(scraper_adapter.change_log_path(), since=1), log[1:])
+
+    def test_streamed_rows_are_merged(self):
+        def streaming_scrape(sink=None, **kwargs):
+            sink([fund("a")])
+            sink([fund("b")])
+            return [], 0
+
+        scraper_adapter.scrape = streaming_scrape
+        scraper_adapter.run_scraper(pages=0)
+        self.assertEqual(self.read(), [fund("a"), fund("b")])
+        self.assertEqual(scraper_adapter.last_delta["added"], 2)
+
+    def test_partial_page_scrape_removes_nothing(self):
+        self.scraped = [fund(f"f{i}") for i in range(100)]
+        self.stats = {"stop_reason": "empty_page", "failed_shards": 0}
+        scraper_adapter.run_scraper(pages=0)
+
+        # The default one-page scrape sees only the first page of the listing
+        self.scraped = self.scraped[:20]
+        self.stats = {"stop_reason": "pages", "failed_shards": 0}
+        scraper_adapter.run_scraper()
+        self.assertEqual(scraper_adapter.last_delta["removed"], 0)
+        self.assertEqual(len(self.read()), 100)
+
+    def test_repeated_last_page_ends_a_full_walk(self):
+        self.scraped = [fund("a"), fund("b")]
+        scraper_adapter.run_scraper()
+        self.scraped = [fund("b")]
+        self.stats = {"stop_reason": "no_new_rows", "failed_shards": 0}
+        scraper_adapter.run_scraper(pages=0)
+        self.assertEqual(scraper_adapter.last_delta["removed"], 1)
+        self.assertEqual(self.read(), [fund("b")])
+
+    def test_failed_shard_removes_nothing(self):
+        self.scraped = [fund(f"f{i}") for i in range(100)]
+        self.stats = {"stop_reason": "empty_page", "failed_shards": 0}
+        scraper_adapter.run_scraper(pages=0)
+
+        # The walk reached the end, but a page it skipped after failing may hold the rest
+        self.scraped = self.scraped[:20]
+        self.stats = {"stop_reason": "empty_page", "failed_shards": 1}
+        scraper_adapter.run_scraper(pages=0)
+        self.assertEqual(scraper_adapter.last_delta["removed"], 0)
+        self.assertEqual(len(self.read()), 100)
+
+    def test_empty_scrape_keeps_existing_data(self):
+        self.scraped = [fund("a")]
+        scraper_adapter.run_scraper()
+        self.scraped = []
+        self.assertIsNone(scraper_adapter.run_scraper())
+        self.assertEqual(len(self.read()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
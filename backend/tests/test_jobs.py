@@ -0,0 +1,233 @@
+import os
+import sys
+import time
+import threading
+import unittest
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import admission  # noqa: E402
+import jobs  # noqa: E402
+import main  # noqa: E402
+import scraper_adapter  # noqa: E402
+from tests.support import DataDirTestCase  # noqa: E402
+
+
+class FakeScraper:
+    """Stands in for run_scraper; blocks until released so jobs stay in flight."""
+
+    def __init__(self, result='data.json'):
+        self.result = result
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, progress=None, **params):
+        self.calls.append(params)
+        progress(1, 2, 10)
+        self.started.set()
+        self.release.wait(5)
+        if isinstance(self.result, Exception):
+            raise self.result
+        progress(2, 2, 25)
+        scraper_adapter.last_delta.clear()
+        scraper_adapter.last_delta.update({"added": 25})
+        return self.result
+
+
+def _hang(conn, data_path, backend):
+    """Scraper process target that never answers."""
+    conn.recv()
+    time.sleep(60)
+
+
+class JobTestCase(DataDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.scraper = FakeScraper()
+        self.manager = jobs.JobManager(interval=0, run=self.scraper)
+
+    def tearDown(self):
+        self.scraper.release.set()
+        for job in self.manager.jobs():
+            job.done.wait(5)
+        self.manager.stop_scheduler()
+
+
+class TestJobManager(JobTestCase):
+    def test_concurrent_submits_share_one_run(self):
+        job, coalesced = self.manager.submit(pages=2)
+        self.assertFalse(coalesced)
+        self.scraper.started.wait(5)
+        again, coalesced = self.manager.submit(pages=5)
+        self.assertIs(again, job)
+        self.assertTrue(coalesced)
+
+        status = job.to_dict()
+        self.assertEqual(status["status"], jobs.RUNNING)
+        self.assertEqual((status["shards_done"], status["shards_total"], status["rows"]), (1, 2, 10))
+        self.assertIsNotNone(status["eta"])
+
+        self.scraper.release.set()
+        self.assertTrue(job.done.wait(5))
+        self.assertEqual(self.scraper.calls, [{"pages": 2}])
+        self.assertEqual(job.state, jobs.SUCCEEDED)
+        self.assertEqual(job.rows, 25)
+        self.assertEqual(job.delta, {"added": 25})
+        self.assertIsNone(job.eta())
+
+        # The next request starts a fresh job
+        self.scraper.release.clear()
+        next_job, coalesced = self.manager.submit()
+        self.assertFalse(coalesced)
+        self.assertIsNot(next_job, job)
+
+    def test_outcome_is_persisted(self):
+        self.scraper.result = None
+        self.scraper.release.set()
+        job, _ = self.manager.submit()
+        job.done.wait(5)
+        self.assertEqual(job.state, jobs.FAILED)
+
+        restarted = jobs.JobManager(interval=0)
+        last = restarted.status()["last_run"]
+        self.assertEqual(last["id"], job.id)
+        self.assertEqual(last["status"], jobs.FAILED)
+
+    def test_crash_is_reported(self):
+        self.scraper.result = RuntimeError("chrome died")
+        self.scraper.release.set()
+        job, _ = self.manager.submit()
+        job.done.wait(5)
+        self.assertEqual(job.state, jobs.FAILED)
+        self.assertEqual(job.error, "chrome died")
+        self.assertIsNone(self.manager.current())
+
+    @unittest.skipIf(jobs.fcntl is None, "file locking unavailable")
+    def test_skips_when_another_process_holds_the_lock(self):
+        holder = self.manager._acquire_process_lock()
+        try:
+            job, _ = self.manager.submit()
+            job.done.wait(5)
+        finally:
+            holder.close()
+        self.assertEqual(job.state, jobs.SKIPPED)
+        self.assertEqual(self.scraper.calls, [])
+        self.assertIsNone(self.manager.last_run())
+
+    def test_running_job_is_visible_to_other_processes(self):
+        job, _ = self.manager.submit(pages=2)
+        self.scraper.started.wait(5)
+        other = jobs.JobManager(interval=0)
+        self.assertEqual(other.status()["current"]["id"], job.id)
+        self.assertEqual(other.status()["current"]["rows"], 10)
+
+        self.scraper.release.set()
+        job.done.wait(5)
+        self.assertIsNone(other.status()["current"])
+        self.assertFalse(os.path.exists(jobs.current_job_path()))
+
+    def test_dead_publisher_is_ignored(self):
+        with open(jobs.current_job_path(), 'w', encoding='utf-8') as f:
+            f.write('{"id": "x", "pid": 999999999}')
+        self.assertIsNone(self.manager.status()["current"])
+
+    def test_scheduler_submits_periodically(self):
+        self.scraper.release.set()
+        self.manager.interval = 0.05
+        self.manager.start_scheduler(limit=0)
+        self.assertTrue(self.scraper.started.wait(5))
+        self.manager.stop_scheduler()
+        self.assertEqual(self.manager.jobs()[0].trigger, "schedule")
+        self.assertEqual(self.scraper.calls[0], {"limit": 0})
+
+    def test_startup_scrape_skipped_while_data_is_fresh(self):
+        self.assertTrue(self.manager.startup_scrape_needed("auto", 3600))
+        self.assertFalse(self.manager.startup_scrape_needed("never", 3600))
+
+        scraper_adapter.save_dataset([{"name": "A", "category": "Debt"}])
+        self.assertFalse(self.manager.startup_scrape_needed("auto", 3600))
+        self.assertTrue(self.manager.startup_scrape_needed("always", 3600))
+
+        # An old dataset counts as fresh again once a scrape confirmed it
+        os.utime(scraper_adapter.BACKEND_DATA, (0, 0))
+        self.assertTrue(self.manager.startup_scrape_needed("auto", 3600))
+        self.scraper.release.set()
+        job, _ = self.manager.submit()
+        job.done.wait(5)
+        self.assertFalse(self.manager.startup_scrape_needed("auto", 3600))
+
+
+class TestScraperProcess(unittest.TestCase):
+    def test_timed_out_scrape_is_killed(self):
+        scraper = jobs.ScraperProcess(target=_hang)
+        scraper._ensure_started()
+        child = scraper._proc
+        try:
+            with self.assertRaises(TimeoutError):
+                scraper.run({}, progress=None, timeout=0.5)
+            self.assertFalse(child.is_alive())
+            self.assertIsNone(scraper._proc)
+        finally:
+            scraper.close()
+
+
+class TestUpdateAPI(JobTestCase):
+    def setUp(self):
+        super().setUp()
+        self.swap(jobs, 'manager', self.manager)
+        # Every test client request comes from the same address
+        self.swap(admission.UPDATE, 'limiter', admission.ClientLimiter(rate=0, burst=100))
+        self.client = TestClient(main.app)
+
+    def test_update_coalesces_and_reports_status(self):
+        first = self.client.post('/api/update?pages=2').json()
+        self.assertEqual(first["status"], "update started")
+        self.scraper.started.wait(5)
+        second = self.client.post('/api/update').json()
+        self.assertEqual(second["status"], "already running")
+        self.assertEqual(second["job"]["id"], first["job"]["id"])
+
+        status = self.client.get('/api/update/status').json()
+        self.assertEqual(status["current"]["id"], first["job"]["id"])
+
+        self.scraper.release.set()
+        self.manager.get(first["job"]["id"]).done.wait(5)
+        job = self.client.get(f'/api/update/{first["job"]["id"]}').json()
+        self.assertEqual(job["status"], jobs.SUCCEEDED)
+        self.assertEqual(self.client.get('/api/update/status').json()["last_run"]["id"], job["id"])
+        # Reported from the persisted last run, so it also holds when another process scraped
+        scraper_adapter.last_delta.clear()
+        self.assertEqual(self.client.post('/api/update').json()["last_delta"], {"added": 25})
+
+    def test_update_wait(self):
+        self.scraper.release.set()
+        res = self.client.post('/api/update?wait=true').json()
+        self.assertEqual(res["status"], "updated")
+        self.assertEqual(res["delta"], {"added": 25})
+
+    def test_update_wait_answers_202_after_timeout(self):
+        self.swap(jobs, 'UPDATE_WAIT_TIMEOUT', 0.05)
+        res = self.client.post('/api/update?wait=true')
+        self.assertEqual(res.status_code, 202)
+        self.assertIn(res.json()["status"], (jobs.QUEUED, jobs.RUNNING))
+        job = self.manager.get(res.json()["job"]["id"])
+        self.scraper.release.set()
+        self.assertTrue(job.done.wait(5))
+        self.assertEqual(job.state, jobs.SUCCEEDED)
+
+    def test_external_mode_does_not_scrape(self):
+        self.manager.mode = jobs.EXTERNAL
+        self.assertEqual(self.client.post('/api/update').status_code, 409)
+        self.assertEqual(self.scraper.calls, [])
+        self.assertEqual(self.client.get('/api/update/status').status_code, 200)
+
+    def test_unknown_job(self):
+        self.assertEqual(self.client.get('/api/update/nope').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
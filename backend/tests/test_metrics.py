@@ -0,0 +1,136 @@
+import os
+import sys
+import shutil
+import tempfile
+import time
+import unittest
+import threading
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+import metrics  # noqa: E402
+import snapshot  # noqa: E402
+from test_api import APITestCase  # noqa: E402
+
+
+class TestRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = metrics.Registry()
+        self.hist = self.registry.histogram("work_seconds", "Work.", ("stage",), buckets=(0.1, 1))
+        self.counter = self.registry.counter("items_total", "Items.")
+
+    def test_prometheus_text(self):
+        for value in (0.05, 0.5, 0.5, 3):
+            self.hist.observe(value, "parse")
+        self.counter.inc(2)
+        text = self.registry.render()
+        self.assertIn('# TYPE work_seconds histogram', text)
+        self.assertIn('work_seconds_bucket{stage="parse",le="0.1"} 1', text)
+        self.assertIn('work_seconds_bucket{stage="parse",le="1"} 3', text)
+        self.assertIn('work_seconds_bucket{stage="parse",le="+Inf"} 4', text)
+        self.assertIn('work_seconds_sum{stage="parse"} 4.05', text)
+        self.assertIn('work_seconds_count{stage="parse"} 4', text)
+        self.assertIn('items_total 2', text)
+
+    def test_drain_and_merge_between_processes(self):
+        self.hist.observe(0.5, "extract")
+        self.counter.inc(3)
+        state = self.registry.drain()
+        self.assertEqual(self.hist.count("extract"), 0)
+
+        parent = metrics.Registry()
+        hist = parent.histogram("work_seconds", "Work.", ("stage",), buckets=(0.1, 1))
+        counter = parent.counter("items_total", "Items.")
+        parent.merge(state)
+        parent.merge(state)
+        self.assertEqual(hist.count("extract"), 2)
+        self.assertEqual(counter.value(), 6)
+
+    def test_observe_scrape(self):
+        before = metrics.SCRAPE_STAGE_SECONDS.count("page_load")
+        metrics.observe_scrape({"stages": {"page_load": [1.2, 0.8]}, "pages_visited": 2, "rows": 40})
+        self.assertEqual(metrics.SCRAPE_STAGE_SECONDS.count("page_load"), before + 2)
+
+
+class TestMetricsEndpoint(APITestCase):
+    def test_requests_and_stages_are_exposed(self):
+        self.client.get('/api/funds/top10', params={'category': 'Debt'})
+        self.client.get('/api/funds/Fund 1/peers')
+        self.client.get('/api/no/such/route')
+        res = self.client.get('/api/metrics')
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.headers['content-type'].startswith('text/plain; version=0.0.4'))
+        text = res.text
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="/api/funds/top10",status="200"}', text)
+        self.assertIn('route="/api/funds/{fund_id}/peers"', text)
+        self.assertIn('route="unmatched",status="404"', text)
+        for stage in ('load', 'parse', 'clean', 'index', 'score', 'serialize'):
+            self.assertIn(f'funds_stage_duration_seconds_count{{stage="{stage}"}}', text)
+
+    def test_snapshot_pool_ships_timings_back(self):
+        orig = snapshot.SNAPSHOT_PROCESSES
+        snapshot.SNAPSHOT_PROCESSES = 1
+        try:
+            before = metrics.STAGE_SECONDS.count("clean")
+            self.client.get('/api/funds')
+            self.assertEqual(metrics.STAGE_SECONDS.count("clean"), before + 1)
+        finally:
+            snapshot.shutdown_pool()
+            snapshot.SNAPSHOT_PROCESSES = orig
+
+
+class TestProfileHook(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        app = FastAPI()
+        app.router.route_class = main.ProfiledRoute
+
+        @app.get('/work')
+        def work():
+            # Long enough for the profiler to take a few samples
+            start, total = time.perf_counter(), 0
+            while time.perf_counter() - start < 0.1:
+                total += 1
+            return {"total": total}
+
+        self.enabled = metrics.MetricsMiddleware(app, profile_dir=lambda: self.tmp, profile=True)
+        self.disabled = metrics.MetricsMiddleware(app, profile_dir=lambda: self.tmp, profile=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_profile_written_for_flagged_request(self):
+        done = threading.Event()
+
+        def other_request():
+            while not done.is_set():
+                pass
+
+        other = threading.Thread(target=other_request)
+        other.start()
+        try:
+            res = TestClient(self.enabled).get('/work', headers={'X-Profile': '1'})
+        finally:
+            done.set()
+            other.join()
+        profile_id = res.headers['x-profile-id']
+        self.assertNotIn(os.sep, profile_id)
+        with open(os.path.join(self.tmp, profile_id + '.txt'), encoding='utf-8') as f:
+            stacks = f.read()
+        self.assertIn('work (test_metrics.py', stacks)
+        # Only the threads serving this request are sampled
+        self.assertNotIn('other_request', stacks)
+        self.assertNotIn('x-profile-id', TestClient(self.enabled).get('/work').headers)
+
+    def test_header_ignored_unless_enabled(self):
+        res = TestClient(self.disabled).get('/work', headers={'X-Profile': '1'})
+        self.assertNotIn('x-profile-id', res.headers)
+        self.assertEqual(os.listdir(self.tmp), [])
+
+if __name__ == '__main__':
+    unittest.main()
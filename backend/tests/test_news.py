@@ -0,0 +1,183 @@
+import os
+import sys
+import asyncio
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+import news  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+FEEDS = {
+    'bbc': 'http://feeds.test/bbc.xml',
+    'business': 'http://feeds.test/business.xml',
+}
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+class FixtureFeeds:
+    """Serves local feed fixtures with an ETag, answering If-None-Match with 304."""
+
+    def __init__(self):
+        self.bodies = {
+            '/bbc.xml': fixture('news_bbc.xml'),
+            '/business.xml': fixture('news_business.xml'),
+        }
+        self.requests = []
+        self.fail = False
+
+    def etag(self, path):
+        return '"%d"' % hash(self.bodies[path])
+
+    def __call__(self, request):
+        self.requests.append(request)
+        if self.fail:
+            return httpx.Response(503)
+        path = request.url.path
+        etag = self.etag(path)
+        if request.headers.get('if-none-match') == etag:
+            return httpx.Response(304, headers={'ETag': etag})
+        return httpx.Response(200, content=self.bodies[path], headers={'ETag': etag})
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestNewsService(unittest.TestCase):
+    def setUp(self):
+        self.feeds = FixtureFeeds()
+        self.clock = Clock()
+        self.service = news.NewsService(
+            feeds=FEEDS, ttl=60, max_stale=600,
+            transport=httpx.MockTransport(self.feeds), clock=self.clock)
+
+    def run_async(self, coro):
+        async def wrapper():
+            try:
+                return await coro
+            finally:
+                # let background refreshes finish before the loop closes
+                await asyncio.gather(*self.service._inflight.values(), return_exceptions=True)
+                await self.service.aclose()
+        return asyncio.run(wrapper())
+
+    def test_parses_fixture_entries(self):
+        entry = self.run_async(self.service.get('bbc'))
+        self.assertEqual(entry.entries[0], {"Title:": "Markets rally as inflation cools",
+                                            "Link:": "https://www.bbc.co.uk/news/business-1"})
+        self.assertEqual(len(entry.entries), 2)
+        self.assertIn(b'Central bank holds rates', entry.body.body)
+
+    def test_refresh_all_fetches_each_feed_once(self):
+        async def scenario():
+            await asyncio.gather(self.service.refresh_all(), self.service.get('bbc'), self.service.get('bbc'))
+            return await self.service.get('business')
+
+        entry = self.run_async(scenario())
+        self.assertEqual(len(self.feeds.requests), 2)
+        self.assertEqual(entry.entries[0]["Title:"], "Fund flows hit a record")
+
+    def test_fresh_entry_is_served_without_fetching(self):
+        async def scenario():
+            await self.service.get('bbc')
+            self.clock.now += 30
+            return await self.service.get('bbc')
+
+        self.run_async(scenario())
+        self.assertEqual(len(self.feeds.requests), 1)
+
+    def test_stale_entry_is_served_while_revalidating(self):
+        async def scenario():
+            first = await self.service.get('bbc')
+            self.clock.now += 120
+            self.feeds.bodies['/bbc.xml'] = fixture('news_business.xml')
+            stale = await self.service.get('bbc')
+            await asyncio.gather(*self.service._inflight.values())
+            return first, stale, await self.service.get('bbc')
+
+        first, stale, fresh = self.run_async(scenario())
+        self.assertIs(stale, first)
+        self.assertEqual(fresh.entries[0]["Title:"], "Fund flows hit a record")
+        self.assertEqual(len(self.feeds.requests), 2)
+
+    def test_unchanged_feed_revalidates_with_etag(self):
+        async def scenario():
+            first = await self.service.get('bbc')
+            self.clock.now += 10_000
+            return first, await self.service.get('bbc')
+
+        first, second = self.run_async(scenario())
+        self.assertIs(second, first)
+        self.assertEqual(second.fetched_at, self.clock.now)
+        self.assertEqual(self.feeds.requests[1].headers['if-none-match'], first.etag)
+
+    def test_expired_entry_survives_failed_refresh(self):
+        async def scenario():
+            first = await self.service.get('bbc')
+            self.clock.now += 10_000
+            self.feeds.fail = True
+            return first, await self.service.get('bbc')
+
+        first, second = self.run_async(scenario())
+        self.assertIs(second, first)
+
+    def test_failure_without_cache_raises(self):
+        self.feeds.fail = True
+        with self.assertRaises(httpx.HTTPStatusError):
+            self.run_async(self.service.get('bbc'))
+
+    def test_unknown_feed(self):
+        with self.assertRaises(KeyError):
+            self.run_async(self.service.get('nope'))
+
+    def test_configured_feeds_from_env(self):
+        with mock.patch.dict(os.environ, {"NEWS_FEEDS": "a=http://x/a.xml, b=http://x/b.xml,bad"}):
+            self.assertEqual(news.configured_feeds(), {'a': 'http://x/a.xml', 'b': 'http://x/b.xml'})
+        with mock.patch.dict(os.environ, {"NEWS_FEEDS": ""}):
+            self.assertEqual(news.configured_feeds(), news.DEFAULT_FEEDS)
+
+
+class TestNewsAPI(unittest.TestCase):
+    def setUp(self):
+        self.feeds = FixtureFeeds()
+        self._orig_service = news.service
+        news.service = news.NewsService(feeds=FEEDS, transport=httpx.MockTransport(self.feeds))
+        self.client = TestClient(main.app)
+
+    def tearDown(self):
+        news.service = self._orig_service
+
+    def test_news_endpoints_serve_cached_feed(self):
+        res = self.client.get('/api/news')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()[1]["Title:"], "Central bank holds rates")
+
+        again = self.client.get('/api/news', headers={'If-None-Match': res.headers['etag']})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(len(self.feeds.requests), 1)
+
+        self.assertEqual(self.client.get('/api/news/business').json()[0]["Title:"], "Fund flows hit a record")
+
+    def test_unconfigured_feed_is_404(self):
+        self.assertEqual(self.client.get('/api/latest_news').status_code, 404)
+        self.assertEqual(self.client.get('/api/news/unknown').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
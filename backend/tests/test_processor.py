@@ -0,0 +1,316 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+import processor  # noqa: E402
+from benchmarks.legacy import legacy_clean_df  # noqa: E402
+from benchmarks.synthetic import synthetic_funds  # noqa: E402
+
+
+class TestCleanDf(unittest.TestCase):
+    def assert_same(self, raw):
+        pd.testing.assert_frame_equal(
+            processor.clean_df(raw), legacy_clean_df(raw))
+
+    def test_matches_legacy_on_messy_values(self):
+        self.assert_same(synthetic_funds(2000))
+
+    def test_small_and_large_parse_paths_agree(self):
+        raw = synthetic_funds(2000)
+        saved = processor.VECTORIZE_MIN_UNIQUES
+        try:
+            for threshold in (0, 10 ** 9):
+                processor.VECTORIZE_MIN_UNIQUES = threshold
+                self.assert_same(raw)
+        finally:
+            processor.VECTORIZE_MIN_UNIQUES = saved
+
+    def test_matches_legacy_on_edge_inputs(self):
+        # Row-wise apply leaves the parsed columns of an empty frame as object
+        empty = processor.clean_df([])
+        self.assertEqual(list(empty.columns), list(legacy_clean_df([]).columns))
+        self.assertEqual(len(empty), 0)
+        self.assertEqual(empty['cagr_num'].dtype, float)
+        self.assert_same([{"name": "Only name"}])
+        self.assert_same([{"name": "x", "category": float('nan'), "one_year_return": True,
+                           "three_year_return": "1_000", "five_year_return": np.float64(4.5),
+                           "aum": "12,000"}])
+
+    def test_matches_legacy_on_100k_rows(self):
+        # Speed is compared by benchmarks.bench_processing, not here
+        self.assert_same(synthetic_funds(100_000))
+
+
+class TestFundScorer(unittest.TestCase):
+    def setUp(self):
+        self.df = processor.clean_df(synthetic_funds(5000, messy=False))
+        self.scorer = processor.FundScorer(self.df)
+
+    def reference_top(self, top_n, weights=processor.DEFAULT_WEIGHTS, mask=None):
+        scores = pd.Series(self.scorer.scores(weights), index=self.df.index)
+        if mask is not None:
+            scores = scores[mask]
+        return scores.sort_values(ascending=False, kind='stable').head(top_n)
+
+    def test_top_matches_full_sort(self):
+        ref = self.reference_top(25)
+        positions = self.scorer.top(25)
+        np.testing.assert_allclose(self.scorer.scores()[positions], ref.to_numpy())
+        self.assertEqual(list(self.df.index[positions]), list(ref.index))
+
+    def test_weights_and_filters(self):
+        weights = (0.0, 0.0, 1.0)
+        records = self.scorer.records(5, weights=weights, category='debt', risk='Low Risk')
+        self.assertEqual(len(records), 5)
+        self.assertTrue(all(r['category'] == 'Debt' and r['risk'] == 'Low Risk' for r in records))
+        ref = self.reference_top(5, weights, mask=(self.df['category'] == 'Debt').to_numpy())
+        self.assertEqual([r['name'] for r in records], list(self.df.loc[ref.index, 'name']))
+
+    def test_ranked_positions_are_cached(self):
+        first = self.scorer.top(10)
+        self.assertIs(self.scorer.top(5).base, first.base)
+        self.assertEqual(len(self.scorer.top(50)), 50)
+
+    def test_caches_keep_only_recent_queries(self):
+        for i in range(processor.MAX_CACHED * 3):
+            self.scorer.top(5, weights=(1.0, 0.0, i), category=f'category {i}')
+        self.assertEqual(len(self.scorer._scores), processor.MAX_CACHED)
+        self.assertEqual(len(self.scorer._ranked), processor.MAX_CACHED)
+        # An evicted ranking is recomputed the same
+        ref = self.reference_top(5)
+        self.scorer.top(5)
+        for i in range(processor.MAX_CACHED + 1):
+            self.scorer.top(5, weights=(i, 1.0, 0.0))
+        self.assertEqual(list(self.df.index[self.scorer.top(5)]), list(ref.index))
+
+    def test_rank_funds_records_are_json_safe(self):
+        df = processor.clean_df([{"name": "A", "category": "Debt", "one_year_return": "NA"}])
+        [record] = processor.rank_funds(df)
+        self.assertEqual(record['one_year_return'], 'NA')
+        self.assertIsNone(record['three_year_return'])
+        self.assertIsNone(record['expense_ratio'])
+        self.assertEqual(record['score'], 0.0)
+
+    def test_batch_matches_one_query_per_scenario(self):
+        rng = np.random.default_rng(3)
+        weights = rng.random((40, 3)).round(1).tolist() + [[1, 0, 0], [0, 0, 0]]
+        debt = self.scorer.candidates('Debt')
+        listed = np.array([3, 17, 250, 4000])
+        subsets = [None] * 14 + [debt] * 14 + [listed] * 14
+        for normalization, group_by in (('minmax', None), ('percentile', 'category')):
+            results = self.scorer.batch_top(weights, subsets, 10, normalization, group_by)
+            for w, subset, (positions, scores) in zip(weights, subsets, results):
+                if subset is listed:
+                    everyone = self.scorer.scores(w, normalization, group_by)
+                    expected = processor._top_positions(everyone, listed, 10)
+                else:
+                    expected = self.scorer.top(10, w, 'Debt' if subset is debt else None,
+                                               normalization=normalization, group_by=group_by)
+                self.assertEqual(list(positions), list(expected), (w, normalization))
+                # Same arithmetic as scores(), so ties break the same way
+                np.testing.assert_array_equal(scores, self.scorer.scores(w, normalization, group_by)[positions])
+        self.assertEqual(len(results[-1][0]), 4)
+        with self.assertRaises(ValueError):
+            self.scorer.batch_top([[1, 2]])
+
+
+class TestGroupedRanking(unittest.TestCase):
+    def setUp(self):
+        self.df = processor.clean_df(synthetic_funds(5000))
+        self.scorer = processor.FundScorer(self.df)
+
+    def test_normalizations_match_pandas_groupby(self):
+        values = self.scorer._values
+        groups = self.df['category'].to_numpy()
+        frame = pd.DataFrame(values).groupby(groups).transform(lambda c: c.fillna(c.min()))
+        expected = {
+            'minmax': frame.groupby(groups).transform(
+                lambda c: (c - c.min()) / (c.max() - c.min()) if c.max() > c.min() else c * 0),
+            'percentile': frame.groupby(groups).rank(pct=True),
+        }
+        codes = self.scorer.group_codes('category')[0]
+        for method, ref in expected.items():
+            np.testing.assert_allclose(processor.normalize_columns(values, codes, method),
+                                       ref.fillna(0).to_numpy(), err_msg=method)
+        robust = processor.normalize_columns(values, codes, 'robust_z')
+        self.assertLessEqual(np.abs(robust).max(), 3)
+        # Ungrouped minmax is the original global scoring
+        np.testing.assert_allclose(processor.normalize_columns(values), self.scorer.normalized)
+        with self.assertRaises(ValueError):
+            processor.normalize_columns(values, method='zscore')
+
+    def test_outlier_no_longer_hides_other_categories(self):
+        raw = [{"name": f"Debt {i}", "category": "Debt", "one_year_return": f"{7 + i * 0.1}%",
+                "three_year_return": f"{6 + i * 0.1}%", "five_year_return": f"{5 + i * 0.1}%"} for i in range(20)]
+        raw += [{"name": f"Equity {i}", "category": "Equity", "one_year_return": f"{15 + i}%",
+                 "three_year_return": f"{12 + i}%", "five_year_return": f"{10 + i}%"} for i in range(20)]
+        raw.append({"name": "Thematic", "category": "Sectoral", "one_year_return": "400%",
+                    "three_year_return": "90%", "five_year_return": "40%"})
+        df = processor.clean_df(raw)
+        self.assertFalse(any(r['category'] == 'Debt' for r in processor.rank_funds(df)))
+        grouped = processor.rank_funds(df, top_n=10, normalization='percentile', group_by='category')
+        self.assertEqual(grouped[0]['score'], 1.0)
+        self.assertIn('Debt 19', [r['name'] for r in grouped])
+
+    def test_top_by_group_matches_per_group_sort(self):
+        groups = self.scorer.top_by_group(4, group_by='risk', normalization='robust_z')
+        scores = self.scorer.scores(normalization='robust_z', group_by='risk')
+        self.assertEqual(sorted(groups), sorted(self.df['risk'].unique()))
+        for label, positions in groups.items():
+            members = np.flatnonzero(self.df['risk'].to_numpy() == label)
+            expected = members[np.lexsort((members, -scores[members]))][:4]
+            self.assertEqual(list(positions), list(expected), label)
+
+    def test_grouped_results_are_cached(self):
+        first = self.scorer.top_by_group(5)
+        self.assertIs(self.scorer.top_by_group(3)['Debt'].base, first['Debt'].base)
+        records = self.scorer.grouped_records(2, category='debt')
+        self.assertEqual(list(records), ['Debt'])
+        with self.assertRaises(ValueError):
+            self.scorer.top_by_group(group_by='name')
+
+
+class TestFundIndex(unittest.TestCase):
+    def setUp(self):
+        self.df = processor.clean_df(synthetic_funds(3000))
+        self.index = processor.FundIndex(self.df)
+
+    def walk(self, **query):
+        """Follow next offsets through every page of a query."""
+        names, offset = [], 0
+        while offset is not None:
+            records, offset, _ = self.index.page(offset=offset, limit=37, **query)
+            names += [r['name'] for r in records]
+        return names
+
+    def test_pages_match_pandas_filter_and_sort(self):
+        df = self.df
+        mask = (df['category'] == 'Equity') & (df['cagr_num'] >= 10)
+        expected = df[mask].sort_values('cagr_num', ascending=False, kind='stable')['name'].tolist()
+        self.assertEqual(
+            self.walk(category='equity', ranges={'cagr': (10, None)}, sort='cagr', descending=True),
+            expected)
+
+    def test_missing_values_sort_last_both_ways(self):
+        for descending in (False, True):
+            order = self.index.ordering(sort='one_year', descending=descending)
+            values = self.df['one_year_return_num'].to_numpy()[order]
+            present = ~np.isnan(values)
+            self.assertFalse(present[present.sum():].any())
+            step = np.diff(values[present])
+            self.assertTrue((step <= 0).all() if descending else (step >= 0).all())
+
+    def test_projection_total_and_errors(self):
+        records, next_offset, total = self.index.page(risk='low risk', limit=5, fields=['name', 'risk'])
+        self.assertEqual(total, int((self.df['risk'] == 'Low Risk').sum()))
+        self.assertEqual(next_offset, 5)
+        self.assertEqual(set(records[0]), {'name', 'risk'})
+        with self.assertRaises(ValueError):
+            self.index.page(fields=['nope'])
+        with self.assertRaises(ValueError):
+            self.index.page(sort='score')
+
+    def test_orderings_for_unknown_groups_are_not_kept(self):
+        for i in range(processor.MAX_CACHED * 3):
+            self.assertEqual(self.index.page(category=f'no such category {i}')[2], 0)
+        self.assertEqual(len(self.index._orders), processor.MAX_CACHED)
+
+
+class TestFundTable(unittest.TestCase):
+    def setUp(self):
+        self.df = processor.clean_df(synthetic_funds(3000))
+        self.table = processor.FundTable(self.df)
+
+    def test_records_match_df_records(self):
+        expected = processor.df_records(self.df)
+        records = self.table.records()
+        self.assertEqual(records, expected)
+        for got, want in zip(records, expected):
+            self.assertEqual({k: type(v) for k, v in got.items()}, {k: type(v) for k, v in want.items()})
+        positions = np.array([10, 3, len(self.df) - 1])
+        self.assertEqual(self.table.records(positions, ['name', 'aum']),
+                         [{'name': expected[p]['name'], 'aum': expected[p]['aum']} for p in positions])
+
+    def test_compact_storage(self):
+        self.assertEqual(self.table.numbers('cagr_num').dtype, np.float32)
+        self.assertIsInstance(self.table._categories['category'], pd.Categorical)
+        record = self.table[-1]
+        self.assertFalse(hasattr(record, '__dict__'))
+        self.assertEqual(dict(record), record.to_dict())
+        with self.assertRaises(KeyError):
+            record['nope']
+        with self.assertRaises(IndexError):
+            self.table[len(self.table)]
+
+    def test_values_float32_cannot_hold_stay_exact(self):
+        df = processor.clean_df([{"name": "Big", "aum": "123,456,789.12", "one_year_return": "10%"},
+                                 {"name": "Small", "aum": 12.5, "one_year_return": "12.50%"}])
+        table = processor.FundTable(df)
+        self.assertEqual(table.records(), processor.df_records(df))
+        self.assertEqual(table.exact('aum_num')[0], 123456789.12)
+
+
+class TestPeerIndex(unittest.TestCase):
+    def setUp(self):
+        self.df = processor.clean_df(synthetic_funds(3000))
+        self.index = processor.FundIndex(self.df)
+        self.peers = processor.PeerIndex(self.df, self.index.records)
+
+    def test_nearest_matches_brute_force_within_category(self):
+        category = self.df['category'].to_numpy()
+        for pos in (0, 17, 1234):
+            positions, dist = self.peers.nearest(pos, k=7)
+            self.assertNotIn(pos, positions)
+            self.assertTrue((category[positions] == category[pos]).all())
+            same = [p for p in range(len(self.df)) if category[p] == category[pos] and p != pos]
+            brute = sorted(same, key=lambda p: (self.peers.distance(pos, p), p))[:7]
+            self.assertEqual(list(positions), brute)
+            self.assertTrue((np.diff(dist) >= 0).all())
+
+    def test_percentiles_are_within_category(self):
+        debt = np.flatnonzero(self.df['category'].to_numpy() == 'Debt')
+        values = self.df['cagr_num'].to_numpy()[debt]
+        pct = self.peers.percentiles['cagr'][debt]
+        present = ~np.isnan(values)
+        self.assertTrue(np.isnan(pct[~present]).all())
+        # Ranks follow the values and reach 1 only within the category
+        order = np.argsort(values[present], kind='stable')
+        self.assertTrue((np.diff(pct[present][order]) >= 0).all())
+        self.assertAlmostEqual(pct[present].max(), 1 - (np.sum(values == np.nanmax(values)) - 1) / (2 * present.sum()))
+
+    def test_lookup_describe_and_small_categories(self):
+        pos = self.peers.find(self.df['name'].iloc[5].upper())
+        self.assertEqual(pos, 5)
+        self.assertIsNone(self.peers.find('no such fund'))
+        described = self.peers.describe(5)
+        self.assertEqual(described['id'], self.df['name'].iloc[5])
+        self.assertEqual(set(described['percentiles']), {'one_year', 'three_year', 'cagr'})
+
+        lone = processor.clean_df([{"name": "Only", "category": "Gold", "one_year_return": "5%"}])
+        peers = processor.PeerIndex(lone, processor.df_records(lone), ids=['only-fund'])
+        self.assertEqual(peers.find('only-fund'), 0)
+        self.assertEqual(peers.peers(0), [])
+        empty = processor.clean_df([])
+        self.assertEqual(processor.PeerIndex(empty, []).features.shape, (0, 6))
+
+    def test_peer_queries_on_10k_funds(self):
+        # Latency is measured by benchmarks.bench_processing, not here
+        df = processor.clean_df(synthetic_funds(10_000, messy=False))
+        peers = processor.PeerIndex(df, processor.df_records(df))
+        category = df['category'].to_numpy()
+        for pos in range(0, len(df), 500):
+            positions, dist = peers.nearest(pos, k=10)
+            self.assertEqual(len(positions), 10)
+            self.assertNotIn(pos, positions)
+            self.assertTrue((category[positions] == category[pos]).all())
+            self.assertTrue((np.diff(dist) >= 0).all())
+            np.testing.assert_allclose(dist, [peers.distance(pos, p) for p in positions], rtol=1e-6)
+
+if __name__ == '__main__':
+    unittest.main()
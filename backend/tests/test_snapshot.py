@@ -0,0 +1,105 @@
+import os
+import sys
+import json
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+import scraper_adapter  # noqa: E402
+import snapshot  # noqa: E402
+from tests.support import DataDirTestCase  # noqa: E402
+
+
+SAMPLE = [
+    {"name": "Alpha Small Cap Fund", "category": "Small Cap",
+     "one_year_return": "30.1%", "three_year_return": "25.0%", "five_year_return": "20.2%"},
+    {"name": "Beta Liquid Fund", "category": "Debt",
+     "one_year_return": "7.1%", "three_year_return": "6.0%", "five_year_return": "NA"},
+]
+
+
+class TestSnapshotCache(DataDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = scraper_adapter.BACKEND_DATA
+        self.cache = snapshot.SnapshotCache()
+
+    def write(self, data):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+    def test_missing_file_gives_empty_snapshot(self):
+        snap = self.cache.get()
+        self.assertIsNone(snap.raw)
+        self.assertEqual(json.loads(snap.funds.body), [])
+        self.assertEqual(json.loads(snap.top10.body), [])
+
+    def test_snapshot_reused_until_file_changes(self):
+        self.write(SAMPLE)
+        first = self.cache.get()
+        self.assertIs(self.cache.get(), first)
+        self.assertEqual(len(json.loads(first.funds.body)), 2)
+
+        self.write(SAMPLE[:1])
+        second = self.cache.get()
+        self.assertIsNot(second, first)
+        self.assertEqual(len(json.loads(second.funds.body)), 1)
+
+    def test_generation_bump_invalidates(self):
+        self.write(SAMPLE)
+        first = self.cache.get()
+        scraper_adapter.bump_generation()
+        self.assertIsNot(self.cache.get(), first)
+
+    def test_unreadable_file_keeps_previous_snapshot(self):
+        self.write(SAMPLE)
+        first = self.cache.get()
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write('[{"name": "trunc')
+        self.assertIs(self.cache.get(), first)
+
+    def test_concurrent_gets_share_one_build(self):
+        self.write(SAMPLE)
+        build = snapshot.build_snapshot
+        calls = []
+
+        def counted(key, version=None):
+            calls.append(key)
+            return build(key, version)
+
+        results = []
+        with mock.patch.object(snapshot, 'build_snapshot', counted):
+            threads = [threading.Thread(target=lambda: results.append(self.cache.get())) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join(5)
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(snap is results[0] for snap in results))
+
+
+class TestProcessPoolBuild(DataDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.swap(snapshot, 'SNAPSHOT_PROCESSES', 1)
+        with open(scraper_adapter.BACKEND_DATA, 'w', encoding='utf-8') as f:
+            json.dump(SAMPLE, f)
+
+    def tearDown(self):
+        snapshot.shutdown_pool()
+
+    def test_worker_builds_same_snapshot(self):
+        key = (0, scraper_adapter.data_fingerprint())
+        built = snapshot.build_snapshot(key)
+        inline = snapshot._build(key, None)
+        self.assertEqual(built.key, key)
+        self.assertEqual(built.funds.body, inline.funds.body)
+        self.assertEqual(built.top10.etag, inline.top10.etag)
+        self.assertEqual(len(built.index.records), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+import scraper_adapter  # noqa: E402
+import storage  # noqa: E402
+from tests.support import DataDirTestCase  # noqa: E402
+from tests.test_api import sample_funds  # noqa: E402
+
+
+class StoreContract:
+    """Behaviour every storage backend must share."""
+
+    backend = None
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self._keep = storage.KEEP_VERSIONS
+        storage.KEEP_VERSIONS = 3
+        self.store = storage.BACKENDS[self.backend][0](
+            os.path.join(self.tmp, storage.BACKENDS[self.backend][1]))
+
+    def tearDown(self):
+        storage.KEEP_VERSIONS = self._keep
+        shutil.rmtree(self.tmp)
+
+    def test_empty_store(self):
+        self.assertIsNone(self.store.fingerprint())
+        self.assertIsNone(self.store.load())
+        self.assertEqual(self.store.versions(), [])
+
+    def test_round_trip_keeps_records_exactly(self):
+        funds = sample_funds(5)
+        funds[0]["extra"] = {"nested": [1, 2]}
+        funds[1]["url"] = "https://groww.in/mutual-funds/fund-1"
+        self.assertEqual(self.store.save(funds), 1)
+        self.assertEqual(self.store.load(), funds)
+        self.assertIsNotNone(self.store.fingerprint())
+
+    def test_versions_rollback_and_fingerprint(self):
+        for n in range(1, 6):
+            self.assertEqual(self.store.save(sample_funds(n)), n)
+        self.assertEqual([v["version"] for v in self.store.versions()], [3, 4, 5])
+        self.assertEqual([v["rows"] for v in self.store.versions()], [3, 4, 5])
+        self.assertIsNone(self.store.load(version=1))
+
+        before = self.store.fingerprint()
+        self.assertTrue(self.store.rollback(3))
+        self.assertEqual(self.store.load(), sample_funds(3))
+        self.assertNotEqual(self.store.fingerprint(), before)
+        self.assertFalse(self.store.rollback(1))
+
+    def test_load_projects_columns(self):
+        funds = sample_funds(3)
+        funds[0]["extra"] = {"nested": [1, 2]}
+        self.store.save(funds)
+        self.store.save(sample_funds(2))
+        columns = ["category", "name"]
+        self.assertEqual(self.store.load(columns=columns),
+                         [{c: f[c] for c in columns} for f in sample_funds(2)])
+        self.assertEqual(self.store.load(version=1, columns=columns),
+                         [{c: f[c] for c in columns} for f in funds])
+        with self.assertRaises(ValueError):
+            self.store.load(columns=["extra"])
+
+
+class TestJsonStore(StoreContract, unittest.TestCase):
+    backend = 'json'
+
+
+class TestSqliteStore(StoreContract, unittest.TestCase):
+    backend = 'sqlite'
+
+    def test_plain_rows_are_stored_as_columns(self):
+        scraped = {"name": "Fund A", "category": "Debt", "one_year_return": "7.1%",
+                   "three_year_return": "NA", "five_year_return": "6.5%",
+                   "url": "https://groww.in/mutual-funds/fund-a"}
+        reordered = dict(reversed(list(scraped.items())))
+        funds = [scraped, {"name": "Fund B", "category": "Debt"}, reordered, dict(scraped, aum=120.5)]
+        self.store.save(funds)
+        conn = sqlite3.connect(self.store.path)
+        try:
+            records = [r[0] for r in conn.execute("SELECT record FROM funds ORDER BY pos")]
+        finally:
+            conn.close()
+        self.assertEqual([bool(r) for r in records], [False, False, True, True])
+
+        loaded = self.store.load()
+        self.assertEqual(loaded, funds)
+        # Key order survives too, so served JSON is unchanged
+        self.assertEqual([list(r) for r in loaded], [list(r) for r in funds])
+
+
+class TestStoreSettings(unittest.TestCase):
+    def test_base_store_is_abstract(self):
+        with self.assertRaises(TypeError):
+            storage.FundStore()
+
+    def test_kept_versions_include_the_published_one(self):
+        self.assertEqual(storage._keep_versions("1"), 1)
+        for value in ("0", "-2"):
+            with self.assertRaises(ValueError):
+                storage._keep_versions(value)
+
+
+class TestMigrationAndApi(DataDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.swap(scraper_adapter, 'STORAGE_BACKEND', scraper_adapter.STORAGE_BACKEND)
+
+    def test_migrate_json_to_sqlite(self):
+        source = storage.open_store('json', self.tmp)
+        source.save(sample_funds(2))
+        source.save(sample_funds(4))
+        storage.main(['migrate', '--from', 'json', '--to', 'sqlite', '--data-dir', self.tmp])
+
+        target = storage.open_store('sqlite', self.tmp)
+        self.assertEqual(target.load(), sample_funds(4))
+        self.assertEqual([v["rows"] for v in target.versions()], [2, 4])
+
+    def test_api_serves_sqlite_store(self):
+        scraper_adapter.STORAGE_BACKEND = 'sqlite'
+        scraper_adapter.save_dataset(sample_funds(6))
+        client = TestClient(main.app)
+        self.assertEqual(len(client.get('/api/funds').json()), 6)
+        self.assertFalse(os.path.exists(scraper_adapter.BACKEND_DATA))
+
+        scraper_adapter.save_dataset(sample_funds(3))
+        self.assertEqual(len(client.get('/api/funds').json()), 3)
+        self.assertEqual(len(client.get('/api/funds', params={'version': 1}).json()), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import sys
+import json
+import unittest
+
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+import scraper_adapter  # noqa: E402
+import storage  # noqa: E402
+from tests.support import DataDirTestCase  # noqa: E402
+
+
+def funds(n):
+    return [{"name": f"Fund {i}", "category": "Debt", "one_year_return": f"{i}%",
+             "three_year_return": "NA", "five_year_return": "NA"} for i in range(n)]
+
+
+class TestVersionedWrites(DataDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.swap(storage, 'KEEP_VERSIONS', 3)
+
+    def test_atomic_compact_write(self):
+        storage.write_json_atomic(scraper_adapter.BACKEND_DATA, funds(2))
+        with open(scraper_adapter.BACKEND_DATA, encoding='utf-8') as f:
+            text = f.read()
+        self.assertNotIn('\n', text)
+        self.assertEqual(json.loads(text), funds(2))
+        self.assertEqual(os.listdir(self.tmp), ['data.json'])
+
+    def test_keeps_last_n_versions(self):
+        for n in range(1, 6):
+            self.assertEqual(scraper_adapter.save_dataset(funds(n)), n)
+        versions = scraper_adapter.list_versions()
+        self.assertEqual([v["version"] for v in versions], [3, 4, 5])
+        self.assertEqual([v["rows"] for v in versions], [3, 4, 5])
+        files = set(os.listdir(scraper_adapter.versions_dir())) - {'manifest.json'}
+        self.assertEqual(files, {v["file"] for v in versions})
+
+    def test_pin_and_rollback(self):
+        scraper_adapter.save_dataset(funds(2))
+        scraper_adapter.save_dataset(funds(4))
+        self.assertEqual(len(scraper_adapter.load_latest_json()), 4)
+        self.assertEqual(len(scraper_adapter.load_latest_json(version=1)), 2)
+        self.assertIsNone(scraper_adapter.load_latest_json(version=99))
+
+        self.assertTrue(scraper_adapter.rollback(1))
+        self.assertEqual(len(scraper_adapter.load_latest_json()), 2)
+        self.assertFalse(scraper_adapter.rollback(99))
+
+    def test_api_reads_pinned_version(self):
+        scraper_adapter.save_dataset(funds(2))
+        scraper_adapter.save_dataset(funds(4))
+        client = TestClient(main.app)
+        self.assertEqual(len(client.get('/api/funds').json()), 4)
+        self.assertEqual(len(client.get('/api/funds', params={'version': 1}).json()), 2)
+        self.assertEqual(client.get('/api/funds', params={'version': 7}).status_code, 404)
+        self.assertEqual([v["version"] for v in client.get('/api/versions').json()], [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,12 @@ import re
 import json
 import logging
 import os
+import atexit
+import tempfile
+import threading
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, urljoin
 
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -12,12 +18,121 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
+import lxml.etree
+import lxml.html
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
+BASE_URL = "https://groww.in"
+FILTER_URL = BASE_URL + "/mutual-funds/filter"
+# Query parameter Groww uses for listing pagination
+PAGE_PARAM = "pageNo"
 
-def create_driver(headless=True):
-    """Create a new Chrome webdriver."""
+# Row lookups shared by the WebDriver and page-source extraction paths
+ROW_XPATH = "//a[contains(@class,'f22Link')]"
+NAME_XPATH = ".//div[contains(@class,'f22SchemeName')]//div[contains(@class,'contentPrimary')]"
+CHIP_XPATH = ".//span[contains(@class,'chipLabel')]"
+RETURN_CELL_XPATH = ".//td[contains(@class,'f22YearReturn')]"
+RETURN_VALUE_XPATH = ".//div/div[contains(@class,'contentPrimary')]"
+RETURN_LABEL_XPATH = ".//div/div[contains(@class,'contentSecondary')]"
+
+# Timings and WebDriver call counts of the most recent scrape() call
+last_run_stats = {}
+
+
+class PageTimeout(Exception):
+    """A listing page never showed fund rows within the timeout."""
+
+
+class StageTimings:
+    """Durations of scraper stages within one scrape() call, by stage name.
+
+    Stages: driver_startup (starting a browser), page_load (navigating until
+    the rows are present), extract (reading one page's rows) and extract_row
+    (a page's extract time divided by its rows).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.seconds = {}
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.seconds.setdefault(stage, []).append(round(seconds, 6))
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+
+def _timed(stages, stage):
+    return stages.time(stage) if stages is not None else nullcontext()
+
+# Explicit chromedriver binary; otherwise webdriver-manager resolves one and
+# the path is cached in DRIVER_PATH_CACHE for DRIVER_PATH_TTL seconds
+CHROMEDRIVER_PATH = os.environ.get("CHROMEDRIVER_PATH")
+DRIVER_PATH_CACHE = os.environ.get(
+    "CHROMEDRIVER_PATH_CACHE", os.path.join(tempfile.gettempdir(), "funds_at_tips_chromedriver.json"))
+DRIVER_PATH_TTL = float(os.environ.get("CHROMEDRIVER_PATH_TTL", str(24 * 3600)))
+# Skip images, fonts and stylesheets; rows are located by class names only
+BLOCK_RESOURCES = os.environ.get("SCRAPER_BLOCK_RESOURCES", "1") != "0"
+# Keep browsers open between scrapes, recycling each after this many pages
+# and quitting it once idle for SCRAPER_IDLE_TIMEOUT seconds
+WARM_BROWSERS = os.environ.get("SCRAPER_WARM_BROWSERS", "1") != "0"
+RECYCLE_PAGES = int(os.environ.get("SCRAPER_RECYCLE_PAGES", "50"))
+IDLE_TIMEOUT = float(os.environ.get("SCRAPER_IDLE_TIMEOUT", "900"))
+# Upper bound on result pages visited when walking the whole listing (pages=0)
+MAX_PAGES = int(os.environ.get("SCRAPER_MAX_PAGES", "200"))
+# Extra attempts for a page that errors or times out before it counts as failed
+PAGE_RETRIES = int(os.environ.get("SCRAPER_PAGE_RETRIES", "1"))
+# A listing walk gives up ("failed_page") after this many failed pages in a row
+MAX_FAILED_PAGES = int(os.environ.get("SCRAPER_MAX_FAILED_PAGES", "3"))
+
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.css",
+]
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+def driver_path():
+    """Path of the chromedriver binary, resolved at most once per DRIVER_PATH_TTL.
+
+    ChromeDriverManager().install() checks the installed Chrome version and
+    the driver download on every call, so its answer is cached in-process and
+    in DRIVER_PATH_CACHE (shared by spawned scraper processes).
+    """
+    global _driver_path
+    if CHROMEDRIVER_PATH:
+        return CHROMEDRIVER_PATH
+    with _driver_path_lock:
+        if _driver_path and os.path.isfile(_driver_path):
+            return _driver_path
+        try:
+            with open(DRIVER_PATH_CACHE, encoding="utf-8") as f:
+                cached = json.load(f)
+            if time.time() - cached["resolved_at"] < DRIVER_PATH_TTL and os.path.isfile(cached["path"]):
+                _driver_path = cached["path"]
+                return _driver_path
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        _driver_path = ChromeDriverManager().install()
+        try:
+            with open(DRIVER_PATH_CACHE, "w", encoding="utf-8") as f:
+                json.dump({"path": _driver_path, "resolved_at": time.time()}, f)
+        except OSError:
+            logging.warning("Could not cache chromedriver path in %s", DRIVER_PATH_CACHE)
+        return _driver_path
+
+
+def chrome_options(headless=True, block_resources=BLOCK_RESOURCES):
     options = Options()
     if headless:
         options.add_argument("--headless=new")
@@ -25,12 +140,137 @@ def create_driver(headless=True):
     # Required for Render/Debian
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--start-maximized")
+    options.add_argument("--window-size=1366,900")
+    # Rows are in the DOM before subresources finish loading
+    options.page_load_strategy = "eager"
+    if block_resources:
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.stylesheets": 2,
+            "profile.managed_default_content_settings.fonts": 2,
+        })
+    return options
+
+
+def create_driver(headless=True, block_resources=BLOCK_RESOURCES):
+    """Create a new Chrome webdriver."""
+    driver = webdriver.Chrome(service=Service(driver_path()), options=chrome_options(headless, block_resources))
+    if block_resources:
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        except Exception:
+            logging.warning("Could not block subresources via CDP", exc_info=True)
+    return driver
+
+
+class BrowserSession:
+    """A driver plus the bookkeeping used to decide when to recycle it."""
+
+    def __init__(self, driver, headless):
+        self.driver = driver
+        self.headless = headless
+        self.pages = 0
+        self.last_used = time.monotonic()
+
+    def healthy(self):
+        try:
+            self.driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
 
-    # Use webdriver-manager to automatically download and manage ChromeDriver
-    service = Service(ChromeDriverManager().install())
-        
-    return webdriver.Chrome(service=service, options=options)
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            logging.warning("Failed to quit webdriver", exc_info=True)
+
+
+class WarmBrowsers:
+    """Idle browser sessions kept between scrapes.
+
+    acquire() hands out a healthy idle session (or starts a new browser);
+    release() keeps it for the next scrape unless it has served max_pages.
+    Sessions idle for longer than idle_timeout are quit.
+    """
+
+    def __init__(self, enabled=WARM_BROWSERS, max_pages=RECYCLE_PAGES, idle_timeout=IDLE_TIMEOUT,
+                 factory=None):
+        self.enabled = enabled
+        self.max_pages = max_pages
+        self.idle_timeout = idle_timeout
+        # Injected in tests; defaults to create_driver at call time
+        self._factory = factory
+        self._idle = []
+        self._lock = threading.Lock()
+        self._reaper = None
+        self.started = 0
+
+    def acquire(self, headless=True, stages=None):
+        while True:
+            with self._lock:
+                session = next((s for s in reversed(self._idle) if s.headless == headless), None)
+                if session is not None:
+                    self._idle.remove(session)
+            if session is None:
+                break
+            if session.healthy():
+                logging.info("Reusing warm browser (%d pages served)", session.pages)
+                return session
+            logging.info("Discarding unresponsive warm browser")
+            session.quit()
+
+        self.started += 1
+        with _timed(stages, "driver_startup"):
+            driver = (self._factory or create_driver)(headless)
+        return BrowserSession(driver, headless)
+
+    def expired(self, session):
+        return bool(self.max_pages) and session.pages >= self.max_pages
+
+    def release(self, session):
+        if not self.enabled or self.expired(session):
+            session.quit()
+            return
+        session.last_used = time.monotonic()
+        with self._lock:
+            self._idle.append(session)
+            if self._reaper is None and self.idle_timeout > 0:
+                self._reaper = threading.Timer(self.idle_timeout, self._reap)
+                self._reaper.daemon = True
+                self._reaper.start()
+
+    def _reap(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            stale = [s for s in self._idle if s.last_used <= cutoff]
+            self._idle = [s for s in self._idle if s.last_used > cutoff]
+            self._reaper = None
+            if self._idle:
+                wait = self._idle[0].last_used + self.idle_timeout - time.monotonic()
+                self._reaper = threading.Timer(max(wait, 1.0), self._reap)
+                self._reaper.daemon = True
+                self._reaper.start()
+        for session in stale:
+            session.quit()
+
+    def idle_count(self):
+        return len(self._idle)
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+            if self._reaper is not None:
+                self._reaper.cancel()
+                self._reaper = None
+        for session in idle:
+            session.quit()
+
+
+browsers = WarmBrowsers()
+atexit.register(browsers.close_all)
 
 
 def extract_text_safe(el):
@@ -40,104 +280,521 @@ def extract_text_safe(el):
         return ""
 
 
-def scrape(headless=True, limit=0, url="https://groww.in/mutual-funds/filter", timeout=20):
-    driver = create_driver(headless)
-    logging.info("🌱 Groww Scraper Started")
+def _scheme_url(href):
+    """Absolute scheme page URL from a row's href attribute (None if missing)."""
+    return urljoin(BASE_URL, href) if href else None
 
-    all_funds = []
 
-    try:
-        driver.get(url)
-        wait = WebDriverWait(driver, timeout)
+def _extract_rows(rows, limit=0):
+    """Read fund records out of f22Link row elements. Returns (funds, skipped)."""
+    funds = []
+    skipped = 0
 
-        # ⏳ Wait for the table to appear
+    if limit:
+        rows = rows[:limit]
+
+    for idx, row in enumerate(rows):
+
+        # ----------- FUND NAME ----------
         try:
-            rows = wait.until(
-                EC.presence_of_all_elements_located(
-                    (By.XPATH, "//a[contains(@class,'f22Link')]")
-                )
-            )
-        except TimeoutException:
-            logging.error("❌ Could not find fund rows")
-            return [], 0
+            fund_name = row.find_element(By.XPATH, NAME_XPATH).text.strip()
+        except:
+            fund_name = ""
 
-        logging.info(f"Detected {len(rows)} rows")
+        if not fund_name:
+            skipped += 1
+            continue
 
-        if limit:
-            rows = rows[:limit]
+        # ----------- CATEGORY (NEW Groww Layout) ----------
+        try:
+            # Groww category pills look like:
+            # <span class="chipLabel">Small Cap</span>
+            cat_els = row.find_elements(By.XPATH, CHIP_XPATH)
+
+            if cat_els:
+                # First chip is always the category
+                category = cat_els[0].text.strip()
+            else:
+                category = "Unknown"
 
-        for idx, row in enumerate(rows):
+        except:
+            category = "Unknown"
 
-            # ----------- FUND NAME ----------
-            try:
-                fund_name = row.find_element(
-                    By.XPATH,
-                    ".//div[contains(@class,'f22SchemeName')]//div[contains(@class,'contentPrimary')]"
-                ).text.strip()
-            except:
-                fund_name = ""
+        # ----------- RETURNS (1Y 3Y 5Y) ----------
+        cells = row.find_elements(By.XPATH, RETURN_CELL_XPATH)
 
-            if not fund_name:
-                continue
+        one_year = three_year = five_year = "NA"
 
-            # ----------- CATEGORY (NEW Groww Layout) ----------
+        for c in cells:
             try:
-                # Groww category pills look like:
-                # <span class="chipLabel">Small Cap</span>
-                cat_els = row.find_elements(
-                    By.XPATH,
-                    ".//span[contains(@class,'chipLabel')]"
-                )
+                value = extract_text_safe(c.find_element(By.XPATH, RETURN_VALUE_XPATH))
+                label = extract_text_safe(c.find_element(By.XPATH, RETURN_LABEL_XPATH))
 
-                if cat_els:
-                    # First chip is always the category
-                    category = cat_els[0].text.strip()
-                else:
-                    category = "Unknown"
+                if label == "1Y":
+                    one_year = value
+                elif label == "3Y":
+                    three_year = value
+                elif label == "5Y":
+                    five_year = value
 
             except:
-                category = "Unknown"
-
-            # ----------- RETURNS (1Y 3Y 5Y) ----------
-            cells = row.find_elements(
-                By.XPATH, ".//td[contains(@class,'f22YearReturn')]")
-
-            one_year = three_year = five_year = "NA"
-
-            for c in cells:
-                try:
-                    value = extract_text_safe(
-                        c.find_element(
-                            By.XPATH, ".//div/div[contains(@class,'contentPrimary')]")
-                    )
-                    label = extract_text_safe(
-                        c.find_element(
-                            By.XPATH, ".//div/div[contains(@class,'contentSecondary')]")
-                    )
-
-                    if label == "1Y":
-                        one_year = value
-                    elif label == "3Y":
-                        three_year = value
-                    elif label == "5Y":
-                        five_year = value
-
-                except:
-                    continue
+                continue
 
-            all_funds.append({
-                "name": fund_name,
-                "category": category,
-                "one_year_return": one_year,
-                "three_year_return": three_year,
-                "five_year_return": five_year
-            })
+        try:
+            href = row.get_dom_attribute("href")
+        except:
+            href = None
+
+        funds.append({
+            "name": fund_name,
+            "category": category,
+            "one_year_return": one_year,
+            "three_year_return": three_year,
+            "five_year_return": five_year,
+            "url": _scheme_url(href)
+        })
+
+    return funds, skipped
+
+
+def _node_text(el):
+    """Element text with whitespace collapsed, like WebElement.text for inline content."""
+    return " ".join(el.text_content().split())
+
+
+# Compiled once for parse_listing_html
+_XPATHS = {
+    xpath: lxml.etree.XPath(xpath)
+    for xpath in (ROW_XPATH, NAME_XPATH, CHIP_XPATH, RETURN_CELL_XPATH, RETURN_VALUE_XPATH, RETURN_LABEL_XPATH)
+}
+
+
+def _first_text(el, xpath):
+    found = _XPATHS[xpath](el)
+    return _node_text(found[0]) if found else None
+
+
+def parse_listing_html(html, limit=0):
+    """Extract fund records from a listing page's HTML. Returns (funds, skipped).
+
+    Runs the same XPath lookups as _extract_rows with lxml, so a page_source
+    fetched in one WebDriver call yields the same records as walking the
+    live DOM element by element.
+    """
+    if not html.strip():
+        return [], 0
+    rows = _XPATHS[ROW_XPATH](lxml.html.fromstring(html))
+    funds = []
+    skipped = 0
+
+    if limit:
+        rows = rows[:limit]
+
+    for row in rows:
+        fund_name = _first_text(row, NAME_XPATH)
+        if not fund_name:
+            skipped += 1
+            continue
+
+        category = _first_text(row, CHIP_XPATH)
+        if category is None:
+            category = "Unknown"
+
+        returns = {"1Y": "NA", "3Y": "NA", "5Y": "NA"}
+        for cell in _XPATHS[RETURN_CELL_XPATH](row):
+            value = _first_text(cell, RETURN_VALUE_XPATH)
+            label = _first_text(cell, RETURN_LABEL_XPATH)
+            if value is None or label is None:
+                continue
+            if label in returns:
+                returns[label] = value
+
+        funds.append({
+            "name": fund_name,
+            "category": category,
+            "one_year_return": returns["1Y"],
+            "three_year_return": returns["3Y"],
+            "five_year_return": returns["5Y"],
+            "url": _scheme_url(row.get("href"))
+        })
+
+    return funds, skipped
+
+
+# Rebuilds a captured <body> from a [tag, attrs, children] tree with DOM calls,
+# the way the live site's scripts do, so nesting the HTML parser would
+# "fix" (e.g. <td> cells inside <a> rows) is preserved.
+_BUILD_DOM_JS = """
+const build = (node) => {
+  if (typeof node === 'string') return document.createTextNode(node);
+  const el = document.createElement(node[0]);
+  for (const [k, v] of Object.entries(node[1])) el.setAttribute(k, v);
+  for (const child of node[2]) el.appendChild(build(child));
+  return el;
+};
+document.body.replaceWith(build(arguments[0]));
+"""
+
+
+def _dom_tree(el):
+    children = [el.text] if el.text else []
+    for child in el:
+        # Skip comments/processing instructions and scripts, keep their tail text
+        if isinstance(child.tag, str) and child.tag not in ("script", "style"):
+            children.append(_dom_tree(child))
+        if child.tail:
+            children.append(child.tail)
+    return [el.tag, dict(el.attrib), children]
+
+
+def render_captured_page(driver, html):
+    """Load captured page HTML into the browser without re-running its scripts."""
+    body = lxml.html.fromstring(html).body
+    driver.get("about:blank")
+    driver.execute_script(_BUILD_DOM_JS, _dom_tree(body))
+
+
+def _extract_timed(extract, stages):
+    """Run a page's row extraction, recording extract and per-row times."""
+    start = time.perf_counter()
+    funds, skipped = extract()
+    if stages is not None:
+        elapsed = time.perf_counter() - start
+        stages.add("extract", elapsed)
+        if funds:
+            stages.add("extract_row", elapsed / len(funds))
+    return funds, skipped
+
+
+def scrape_page(driver, url, limit=0, timeout=20, extraction="html", html=None, stages=None):
+    """Scrape one listing page with an existing driver. Returns (funds, skipped).
+
+    extraction="html" fetches page_source once and parses it locally;
+    extraction="legacy" reads every field through WebDriver element calls.
+    If html is given it is a captured page, rendered into the browser
+    instead of loading url. Stage durations are added to stages if given.
+    Raises PageTimeout if no fund rows appear within timeout seconds.
+    """
+    with _timed(stages, "page_load"):
+        if html is None:
+            driver.get(url)
+        else:
+            render_captured_page(driver, html)
+        wait = WebDriverWait(driver, timeout)
 
+        # ⏳ Wait for the table to appear
+        try:
+            rows = wait.until(
+                EC.presence_of_all_elements_located(
+                    (By.XPATH, ROW_XPATH)
+                )
+            )
+        except TimeoutException:
+            raise PageTimeout(f"Could not find fund rows on {url}") from None
+
+    logging.info(f"Detected {len(rows)} rows on {url}")
+    if extraction == "legacy":
+        return _extract_timed(lambda: _extract_rows(rows, limit), stages)
+    return _extract_timed(lambda: parse_listing_html(driver.page_source, limit), stages)
+
+
+def page_url(url, page):
+    """Listing URL of result page `page` (pageNo is 0-based)."""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != PAGE_PARAM]
+    return urlunsplit(parts._replace(query=urlencode(query + [(PAGE_PARAM, str(page))])))
+
+
+def shard_urls(url, pages=1):
+    """Listing URLs for the first `pages` result pages."""
+    if pages <= 1:
+        return [url]
+    return [page_url(url, page) for page in range(pages)]
+
+
+def replay_pages(path):
+    """Captured listing pages to replay: a single HTML file or every *.html in a directory."""
+    if os.path.isdir(path):
+        pages = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.endswith((".html", ".htm"))
+        )
+        if not pages:
+            raise ValueError(f"No .html pages in {path}")
+        return pages
+    if not os.path.isfile(path):
+        raise FileNotFoundError(path)
+    return [path]
+
+
+class RowCollector:
+    """Merges shard rows in shard order, keeping the first row per fund name.
+
+    Rows go to sink(rows) as each shard is added when a sink is given, and
+    are kept in .rows otherwise. Only fund names are retained for
+    de-duplication, so a sink sees every row exactly once without the whole
+    scrape being held in memory.
+    """
+
+    def __init__(self, limit=0, sink=None):
+        self.limit = limit
+        self.sink = sink
+        self.rows = []
+        self.count = 0
+        self._seen = set()
+
+    @property
+    def full(self):
+        return bool(self.limit) and self.count >= self.limit
+
+    def add(self, funds):
+        """Add one shard's rows; returns how many were new."""
+        new = []
+        for fund in funds:
+            if self.limit and self.count + len(new) >= self.limit:
+                break
+            if fund["name"] in self._seen:
+                continue
+            self._seen.add(fund["name"])
+            new.append(fund)
+        self.count += len(new)
+        if new:
+            if self.sink is not None:
+                self.sink(new)
+            else:
+                self.rows.extend(new)
+        return len(new)
+
+
+def merge_shards(shard_results, limit=0):
+    """Concatenate shard results in shard order, keeping the first row per fund name."""
+    collector = RowCollector(limit)
+    for funds in shard_results:
+        collector.add(funds)
+        if collector.full:
+            break
+    return collector.rows
+
+
+class DriverPool:
+    """Borrows one browser session per worker thread from `browsers` and returns them on close.
+
+    Each get() counts as one page on the thread's session; a session that
+    reaches the recycle limit mid-scrape is returned (and quit) and replaced.
+    """
+
+    def __init__(self, headless=True, browsers=None, stages=None):
+        self.headless = headless
+        self._browsers = browsers
+        self.stages = stages
+        self._local = threading.local()
+        self._sessions = []
+        self._lock = threading.Lock()
+        # WebDriver protocol commands issued through pooled drivers
+        self.calls = 0
+
+    @property
+    def browsers(self):
+        return self._browsers or browsers
+
+    def get(self):
+        session = getattr(self._local, "session", None)
+        if session is not None and self.browsers.expired(session):
+            self._return(session)
+            session = None
+        if session is None:
+            session = self.browsers.acquire(self.headless, self.stages)
+            self._count_calls(session.driver)
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        session.pages += 1
+        return session.driver
+
+    def _count_calls(self, driver):
+        execute = driver.execute
+
+        def counting_execute(*args, **kwargs):
+            with self._lock:
+                self.calls += 1
+            return execute(*args, **kwargs)
+
+        driver.execute = counting_execute
+
+    def _return(self, session):
+        # Drop the counting wrapper so a reused driver is not wrapped twice
+        session.driver.__dict__.pop("execute", None)
+        with self._lock:
+            if session in self._sessions:
+                self._sessions.remove(session)
+        self.browsers.release(session)
+
+    def close(self):
+        with self._lock:
+            sessions = list(self._sessions)
+        for session in sessions:
+            self._return(session)
+
+
+def scrape(headless=True, limit=0, url=FILTER_URL, timeout=20, workers=1, pages=1, shards=None,
+           extraction="html", replay=None, browser=True, progress=None, sink=None, max_pages=MAX_PAGES):
+    """Scrape the Groww filter listing.
+
+    The listing is split into shards (`shards` URLs, or the first `pages`
+    result pages of `url`) that are scraped concurrently by up to `workers`
+    drivers. Results are merged in shard order and de-duplicated by name, so
+    the output does not depend on which shard finishes first.
+
+    pages=0 walks the whole listing instead: result pages are fetched
+    `workers` at a time until a page loads with no rows ("empty_page"), a
+    page adds no new funds ("no_new_rows"; past the last page the site
+    repeats it), `limit` funds were collected, `max_pages` pages were
+    visited or MAX_FAILED_PAGES pages in a row failed ("failed_page").
+
+    A page that errors or times out is retried PAGE_RETRIES times; if it
+    still fails it is skipped, counted in failed_shards, and the walk goes on.
+
+    extraction selects how rows are read from each page (see scrape_page).
+
+    replay is a captured HTML page or a directory of them; each page becomes
+    a shard and is rendered into the browser instead of fetching groww.in.
+    With browser=False (html extraction only) replayed pages are parsed
+    directly, without starting Chrome at all.
+
+    progress, if given, is called as progress(shards_done, shards_total,
+    rows) after each shard finishes (from the worker thread); shards_total
+    is None while walking the whole listing.
+
+    sink, if given, receives each shard's new rows in shard order as soon as
+    they are available, and the returned fund list is empty. Returns
+    (funds, skipped); see last_run_stats for pages visited, the stop reason
+    and failed_shards (shards that still failed after their retries).
+    """
+    if not browser and not (replay and extraction == "html"):
+        raise ValueError("browser=False requires replay pages and html extraction")
+
+    crawl = not replay and not shards and pages <= 0
+    if replay:
+        urls = replay_pages(replay)
+    elif crawl:
+        urls = None
+    else:
+        urls = list(shards) if shards else shard_urls(url, pages)
+    total = None if crawl else len(urls)
+    workers = max(1, workers if crawl else min(workers, len(urls)))
+    stages = StageTimings()
+    pool = DriverPool(headless, stages=stages)
+    logging.info("🌱 Groww Scraper Started (%s shards, %d workers)", total or "all", workers)
+    done = {"shards": 0, "rows": 0}
+    done_lock = threading.Lock()
+
+    def fetch(shard_url):
+        if replay:
+            with open(shard_url, "r", encoding="utf-8") as f:
+                html = f.read()
+            if browser:
+                return scrape_page(pool.get(), shard_url, limit=limit, timeout=timeout,
+                                   extraction=extraction, html=html, stages=stages)
+            return _extract_timed(lambda: parse_listing_html(html, limit), stages)
+        return scrape_page(pool.get(), shard_url, limit=limit, timeout=timeout,
+                           extraction=extraction, stages=stages)
+
+    def run_shard(shard_url):
+        start = time.perf_counter()
+        failed = False
+        for attempt in range(PAGE_RETRIES + 1):
+            try:
+                funds, skipped = fetch(shard_url)
+                break
+            except PageTimeout as e:
+                logging.error("❌ %s (attempt %d)", e, attempt + 1)
+            except Exception:
+                logging.exception("❌ Shard failed: %s (attempt %d)", shard_url, attempt + 1)
+        else:
+            funds, skipped, failed = [], 0, True
+        elapsed = time.perf_counter() - start
+        logging.info("Shard %s: %d funds in %.2fs", shard_url, len(funds), elapsed)
+        if progress is not None:
+            with done_lock:
+                done["shards"] += 1
+                done["rows"] += len(funds)
+                shards_done, rows = done["shards"], done["rows"]
+            progress(shards_done, total, rows)
+        timing = {"url": shard_url, "rows": len(funds), "seconds": round(elapsed, 3)}
+        if attempt:
+            timing["attempts"] = attempt + 1
+        if failed:
+            timing["failed"] = True
+        return funds, skipped, timing
+
+    def windows():
+        """Batches of shard URLs; each batch is scraped concurrently."""
+        if not crawl:
+            yield urls
+            return
+        page = 0
+        while page < max_pages:
+            batch = range(page, min(page + workers, max_pages))
+            yield [page_url(url, p) for p in batch]
+            page = batch.stop
+
+    collector = RowCollector(limit, sink)
+    skipped = 0
+    timings = []
+    stop_reason = None
+    failed_in_a_row = 0
+    started = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for batch in windows():
+            results = executor.map(run_shard, batch) if executor else map(run_shard, batch)
+            for funds, shard_skipped, timing in results:
+                # executor.map yields in shard order, so rows stream out in order
+                skipped += shard_skipped
+                timings.append(timing)
+                if timing.get("failed"):
+                    # Skip past the page; only a page that loaded empty ends the listing
+                    failed_in_a_row += 1
+                    if crawl and failed_in_a_row >= MAX_FAILED_PAGES:
+                        stop_reason = "failed_page"
+                    continue
+                failed_in_a_row = 0
+                if crawl and not funds:
+                    stop_reason = "empty_page"
+                elif not collector.add(funds) and crawl:
+                    stop_reason = "no_new_rows"
+                if collector.full:
+                    stop_reason = "limit"
+                if stop_reason:
+                    break
+            if stop_reason:
+                break
+        stop_reason = stop_reason or ("max_pages" if crawl else "pages")
+        webdriver_calls = pool.calls
     finally:
-        driver.quit()
-
-    logging.info(f"✔ Scraped {len(all_funds)} funds")
-    return all_funds, 0
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        pool.close()
+    elapsed = time.perf_counter() - started
+
+    rows = collector.count
+    last_run_stats.clear()
+    last_run_stats.update({
+        "rows": rows,
+        "skipped": skipped,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed, 1) if elapsed else None,
+        "pages_visited": len(timings),
+        "stop_reason": stop_reason,
+        "failed_shards": sum(1 for t in timings if t.get("failed")),
+        "webdriver_calls": webdriver_calls,
+        "calls_per_row": round(webdriver_calls / rows, 2) if rows else None,
+        "shards": timings,
+        "stages": stages.seconds,
+    })
+
+    logging.info("✔ Scraped %d funds from %d pages (stopped: %s)", rows, len(timings), stop_reason)
+    return collector.rows, skipped
 
 
 def save_json(data, filename="groww_mutual_fund_data.json"):
@@ -0,0 +1,176 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from backend.webscrapper import grow
+
+
+class FakeDriver:
+    def __init__(self):
+        self.alive = True
+        self.quit_calls = 0
+
+    def execute(self, *args, **kwargs):
+        return {"value": None}
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise RuntimeError("browser is gone")
+        return 1
+
+    def quit(self):
+        self.quit_calls += 1
+
+
+class TestWarmBrowsers(unittest.TestCase):
+    def setUp(self):
+        self.created = []
+
+        def factory(headless):
+            driver = FakeDriver()
+            self.created.append(driver)
+            return driver
+
+        self.browsers = grow.WarmBrowsers(enabled=True, max_pages=3, idle_timeout=0, factory=factory)
+
+    def tearDown(self):
+        self.browsers.close_all()
+
+    def test_browser_is_reused_across_scrapes(self):
+        for _ in range(2):
+            pool = grow.DriverPool(browsers=self.browsers)
+            pool.get()
+            pool.close()
+        self.assertEqual(len(self.created), 1)
+        self.assertEqual(self.browsers.idle_count(), 1)
+        # The call-counting wrapper is removed before the driver is kept
+        self.assertNotIn("execute", vars(self.created[0]))
+
+    def test_driver_startup_is_timed_for_new_browsers_only(self):
+        runs = []
+        for _ in range(2):
+            stages = grow.StageTimings()
+            pool = grow.DriverPool(browsers=self.browsers, stages=stages)
+            pool.get()
+            pool.close()
+            runs.append(stages.seconds)
+        self.assertEqual(len(runs[0]['driver_startup']), 1)
+        # The second scrape reused the warm browser
+        self.assertEqual(runs[1], {})
+
+    def test_recycled_after_max_pages(self):
+        pool = grow.DriverPool(browsers=self.browsers)
+        for _ in range(4):
+            pool.get()
+        pool.close()
+        self.assertEqual(len(self.created), 2)
+        self.assertEqual(self.created[0].quit_calls, 1)
+        self.assertEqual(self.browsers.idle_count(), 1)
+
+    def test_unhealthy_browser_is_replaced(self):
+        pool = grow.DriverPool(browsers=self.browsers)
+        pool.get()
+        pool.close()
+        self.created[0].alive = False
+        pool = grow.DriverPool(browsers=self.browsers)
+        self.assertIs(pool.get(), self.created[1])
+        pool.close()
+        self.assertEqual(self.created[0].quit_calls, 1)
+
+    def test_headless_and_headed_sessions_are_separate(self):
+        pool = grow.DriverPool(headless=True, browsers=self.browsers)
+        pool.get()
+        pool.close()
+        pool = grow.DriverPool(headless=False, browsers=self.browsers)
+        pool.get()
+        pool.close()
+        self.assertEqual(len(self.created), 2)
+
+    def test_disabled_quits_on_release(self):
+        self.browsers.enabled = False
+        pool = grow.DriverPool(browsers=self.browsers)
+        pool.get()
+        pool.close()
+        self.assertEqual(self.created[0].quit_calls, 1)
+        self.assertEqual(self.browsers.idle_count(), 0)
+
+    def test_idle_sessions_are_reaped(self):
+        pool = grow.DriverPool(browsers=self.browsers)
+        pool.get()
+        pool.close()
+        self.browsers.idle_timeout = 60
+        self.browsers._idle[0].last_used -= 120
+        self.browsers._reap()
+        self.assertEqual(self.browsers.idle_count(), 0)
+        self.assertEqual(self.created[0].quit_calls, 1)
+
+
+class TestDriverPath(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.binary = os.path.join(self.tmp, 'chromedriver')
+        open(self.binary, 'w').close()
+        self.cache = os.path.join(self.tmp, 'driver.json')
+        self.patches = [
+            mock.patch.object(grow, 'DRIVER_PATH_CACHE', self.cache),
+            mock.patch.object(grow, 'CHROMEDRIVER_PATH', None),
+            mock.patch.object(grow, '_driver_path', None),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        shutil.rmtree(self.tmp)
+
+    def test_resolved_once_and_cached_on_disk(self):
+        with mock.patch.object(grow, 'ChromeDriverManager') as manager:
+            manager.return_value.install.return_value = self.binary
+            self.assertEqual(grow.driver_path(), self.binary)
+            self.assertEqual(grow.driver_path(), self.binary)
+            self.assertEqual(manager.return_value.install.call_count, 1)
+
+        # A new process (no in-memory value) reads the cache file instead
+        grow._driver_path = None
+        with mock.patch.object(grow, 'ChromeDriverManager') as manager:
+            self.assertEqual(grow.driver_path(), self.binary)
+            manager.return_value.install.assert_not_called()
+        with open(self.cache, encoding='utf-8') as f:
+            self.assertEqual(json.load(f)["path"], self.binary)
+
+    def test_expired_cache_is_re_resolved(self):
+        with open(self.cache, 'w', encoding='utf-8') as f:
+            json.dump({"path": self.binary, "resolved_at": 0}, f)
+        with mock.patch.object(grow, 'ChromeDriverManager') as manager:
+            manager.return_value.install.return_value = self.binary
+            grow.driver_path()
+            self.assertEqual(manager.return_value.install.call_count, 1)
+
+    def test_explicit_path_skips_resolution(self):
+        with mock.patch.object(grow, 'CHROMEDRIVER_PATH', '/opt/chromedriver'), \
+                mock.patch.object(grow, 'ChromeDriverManager') as manager:
+            self.assertEqual(grow.driver_path(), '/opt/chromedriver')
+            manager.assert_not_called()
+
+
+class TestChromeOptions(unittest.TestCase):
+    def test_blocks_heavy_resources(self):
+        options = grow.chrome_options(headless=True, block_resources=True)
+        self.assertIn("--headless=new", options.arguments)
+        self.assertNotIn("--start-maximized", options.arguments)
+        self.assertEqual(options.page_load_strategy, "eager")
+        prefs = options.experimental_options["prefs"]
+        self.assertEqual(prefs["profile.managed_default_content_settings.images"], 2)
+
+    def test_resources_can_stay_enabled(self):
+        options = grow.chrome_options(headless=False, block_resources=False)
+        self.assertNotIn("prefs", options.experimental_options)
+        self.assertNotIn("--headless=new", options.arguments)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from selenium.webdriver.common.by import By
+
+from backend.webscrapper import grow
+from backend.benchmarks.synthetic import clean_funds, write_listing_pages
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+PAGE = os.path.join(FIXTURES, 'groww_filter_page.html')
+
+
+def load_expected():
+    with open(os.path.join(FIXTURES, 'groww_filter_page.expected.json'), encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+def read_page():
+    with open(PAGE, encoding='utf-8') as fh:
+        return fh.read()
+
+
+class TestParseListingHtml(unittest.TestCase):
+    def test_fixture_matches_expected_records(self):
+        funds, skipped = grow.parse_listing_html(read_page())
+        self.assertEqual(funds, load_expected())
+        # The placeholder row has no scheme name
+        self.assertEqual(skipped, 1)
+
+    def test_limit_applies_to_rows(self):
+        funds, _ = grow.parse_listing_html(read_page(), limit=2)
+        self.assertEqual(funds, load_expected()[:2])
+
+
+class TestReplay(unittest.TestCase):
+    def test_replay_single_page_without_browser(self):
+        funds, skipped = grow.scrape(replay=PAGE, browser=False)
+        self.assertEqual(funds, load_expected())
+        self.assertEqual(skipped, 1)
+        self.assertEqual(grow.last_run_stats['rows'], 4)
+        self.assertEqual(grow.last_run_stats['webdriver_calls'], 0)
+
+    def test_replay_directory_of_pages(self):
+        funds = clean_funds(250)
+        with tempfile.TemporaryDirectory() as tmp:
+            pages = write_listing_pages(funds, tmp, rows_per_page=100)
+            scraped, _ = grow.scrape(replay=tmp, browser=False, workers=2)
+        self.assertEqual(len(pages), 3)
+        unique = list({f['name']: f for f in reversed(funds)}.values())
+        self.assertEqual(len(scraped), len(unique))
+        self.assertEqual(scraped[0]['name'], funds[0]['name'])
+        self.assertEqual(len(grow.last_run_stats['shards']), 3)
+        stages = grow.last_run_stats['stages']
+        self.assertEqual(len(stages['extract']), 3)
+        self.assertEqual(len(stages['extract_row']), 3)
+        self.assertNotIn('page_load', stages)
+
+    def test_browserless_mode_requires_replay(self):
+        with self.assertRaises(ValueError):
+            grow.scrape(browser=False)
+
+
+@unittest.skipUnless(shutil.which('google-chrome') or shutil.which('chromium'),
+                     'Chrome is not installed')
+class TestHtmlMatchesLegacy(unittest.TestCase):
+    def test_both_extraction_modes_agree(self):
+        driver = grow.create_driver(headless=True)
+        try:
+            grow.render_captured_page(driver, read_page())
+            rows = driver.find_elements(By.XPATH, "//a[contains(@class,'f22Link')]")
+            legacy = grow._extract_rows(rows)
+            html = grow.parse_listing_html(driver.page_source)
+        finally:
+            driver.quit()
+        self.assertEqual(html, legacy)
+        self.assertEqual(html[0], load_expected())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import unittest
+from urllib.parse import urlsplit, parse_qs
+
+from backend.webscrapper import grow
+
+
+class TestShardUrls(unittest.TestCase):
+    def test_single_page_keeps_url(self):
+        self.assertEqual(grow.shard_urls(grow.FILTER_URL), [grow.FILTER_URL])
+
+    def test_pages_get_page_param(self):
+        urls = grow.shard_urls(grow.FILTER_URL + "?q=&pageNo=7", pages=3)
+        self.assertEqual(len(urls), 3)
+        for page, url in enumerate(urls):
+            query = parse_qs(urlsplit(url).query, keep_blank_values=True)
+            self.assertEqual(query[grow.PAGE_PARAM], [str(page)])
+            self.assertIn("q", query)
+
+
+class TestMergeShards(unittest.TestCase):
+    def test_merge_is_ordered_and_deduplicated(self):
+        shards = [
+            [{"name": "A"}, {"name": "B"}],
+            [{"name": "B", "dup": True}, {"name": "C"}],
+        ]
+        merged = grow.merge_shards(shards)
+        self.assertEqual([f["name"] for f in merged], ["A", "B", "C"])
+        self.assertNotIn("dup", merged[1])
+
+    def test_merge_respects_limit(self):
+        shards = [[{"name": "A"}], [{"name": "B"}, {"name": "C"}]]
+        self.assertEqual(len(grow.merge_shards(shards, limit=2)), 2)
+
+
+class FakeDriverPool(grow.DriverPool):
+    created = 0
+
+    def get(self):
+        driver = getattr(self._local, "driver", None)
+        if driver is None:
+            FakeDriverPool.created += 1
+            self._local.driver = driver = object()
+        return driver
+
+
+class TestParallelScrape(unittest.TestCase):
+    def setUp(self):
+        self._pool, self._scrape_page = grow.DriverPool, grow.scrape_page
+        grow.DriverPool = FakeDriverPool
+        FakeDriverPool.created = 0
+
+        def fake_scrape_page(driver, url, limit=0, timeout=20, extraction="html", stages=None):
+            page = int(parse_qs(urlsplit(url).query)[grow.PAGE_PARAM][0])
+            # Pages overlap by one fund, like a listing that shifted mid-scrape
+            return [{"name": f"Fund {i}"} for i in range(page * 10, page * 10 + 11)], 0
+
+        grow.scrape_page = fake_scrape_page
+
+    def tearDown(self):
+        grow.DriverPool, grow.scrape_page = self._pool, self._scrape_page
+
+    def test_workers_give_same_result_as_sequential(self):
+        sequential, _ = grow.scrape(pages=5, workers=1)
+        self.assertEqual(FakeDriverPool.created, 1)
+
+        FakeDriverPool.created = 0
+        parallel, _ = grow.scrape(pages=5, workers=3)
+        self.assertLessEqual(FakeDriverPool.created, 3)
+        self.assertEqual(parallel, sequential)
+        self.assertEqual(len(parallel), 51)
+        self.assertEqual(len(grow.last_run_stats['shards']), 5)
+
+    def test_crawl_stops_at_empty_page(self):
+        grow.scrape_page = self.listing(last_page=6)
+        streamed = []
+        funds, _ = grow.scrape(pages=0, workers=3, sink=streamed.append)
+        self.assertEqual(funds, [])
+        self.assertEqual([f["name"] for batch in streamed for f in batch],
+                         [f"Fund {i}" for i in range(70)])
+        self.assertEqual(grow.last_run_stats["stop_reason"], "empty_page")
+        self.assertEqual(grow.last_run_stats["rows"], 70)
+        # Pages are fetched three at a time, so the empty page 7 ends the run after page 8
+        self.assertEqual(grow.last_run_stats["pages_visited"], 8)
+
+    def failing(self, listing, fails):
+        """Wrap a fake listing so page p raises PageTimeout on its first fails(p) attempts."""
+        attempts = {}
+
+        def scrape_page(driver, url, **kwargs):
+            page = int(parse_qs(urlsplit(url).query)[grow.PAGE_PARAM][0])
+            attempts[page] = attempts.get(page, 0) + 1
+            if attempts[page] <= fails(page):
+                raise grow.PageTimeout(url)
+            return listing(driver, url, **kwargs)
+        return scrape_page
+
+    def test_timed_out_page_is_retried(self):
+        grow.scrape_page = self.failing(self.listing(last_page=6), lambda p: p == 3)
+        funds, _ = grow.scrape(pages=0, workers=1)
+        self.assertEqual(len(funds), 70)
+        self.assertEqual(grow.last_run_stats["stop_reason"], "empty_page")
+        self.assertEqual(grow.last_run_stats["failed_shards"], 0)
+        self.assertEqual(grow.last_run_stats["shards"][3]["attempts"], 2)
+
+    def test_failed_page_is_skipped_not_taken_as_the_end(self):
+        grow.scrape_page = self.failing(self.listing(last_page=6), lambda p: 100 if p == 3 else 0)
+        funds, _ = grow.scrape(pages=0, workers=2)
+        self.assertEqual(len(funds), 60)
+        self.assertNotIn("Fund 30", [f["name"] for f in funds])
+        self.assertIn("Fund 69", [f["name"] for f in funds])
+        self.assertEqual(grow.last_run_stats["stop_reason"], "empty_page")
+        self.assertEqual(grow.last_run_stats["failed_shards"], 1)
+        self.assertTrue(grow.last_run_stats["shards"][3]["failed"])
+
+    def test_walk_gives_up_after_failed_pages_in_a_row(self):
+        grow.scrape_page = self.failing(self.listing(last_page=50), lambda p: 100 if p >= 2 else 0)
+        funds, _ = grow.scrape(pages=0, workers=1)
+        self.assertEqual(len(funds), 20)
+        self.assertEqual(grow.last_run_stats["stop_reason"], "failed_page")
+        self.assertEqual(grow.last_run_stats["failed_shards"], grow.MAX_FAILED_PAGES)
+
+    def test_crawl_stops_when_pages_repeat(self):
+        grow.scrape_page = self.listing(last_page=3, repeat_last=True)
+        funds, _ = grow.scrape(pages=0, workers=2)
+        self.assertEqual(len(funds), 40)
+        self.assertEqual(grow.last_run_stats["stop_reason"], "no_new_rows")
+
+    def test_crawl_stops_at_limit_and_max_pages(self):
+        grow.scrape_page = self.listing(last_page=50)
+        funds, _ = grow.scrape(pages=0, workers=2, limit=25)
+        self.assertEqual(len(funds), 25)
+        self.assertEqual(grow.last_run_stats["stop_reason"], "limit")
+
+        funds, _ = grow.scrape(pages=0, workers=2, max_pages=5)
+        self.assertEqual(len(funds), 50)
+        self.assertEqual(grow.last_run_stats["stop_reason"], "max_pages")
+        self.assertEqual(grow.last_run_stats["pages_visited"], 5)
+
+    @staticmethod
+    def listing(last_page, repeat_last=False):
+        def scrape_page(driver, url, limit=0, timeout=20, extraction="html", stages=None):
+            page = int(parse_qs(urlsplit(url).query)[grow.PAGE_PARAM][0])
+            if page > last_page:
+                if not repeat_last:
+                    return [], 0
+                page = last_page
+            return [{"name": f"Fund {i}"} for i in range(page * 10, page * 10 + 10)], 0
+        return scrape_page
+
+    def test_progress_reports_each_shard(self):
+        reports = []
+        grow.scrape(pages=4, workers=2, progress=lambda *args: reports.append(args))
+        self.assertEqual(sorted(done for done, _, _ in reports), [1, 2, 3, 4])
+        self.assertEqual(max(reports), (4, 4, 44))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,15 @@
 const API_BASE = (import.meta.env.VITE_API_BASE_URL || "http://localhost:8000") + "/api";
 
+// Fund endpoints send an ETag; "no-cache" makes the browser revalidate with
+// If-None-Match and reuse its cached copy on a 304 instead of re-downloading.
+const REVALIDATE = { cache: "no-cache" };
+
 // =======================
 // FUNDS API
 // =======================
 
 export async function fetchTop10() {
-  const res = await fetch(`${API_BASE}/funds/top10`);
+  const res = await fetch(`${API_BASE}/funds/top10`, REVALIDATE);
   if (!res.ok) throw new Error("Failed to fetch top10");
   return res.json();
 }
@@ -15,11 +19,38 @@ export function downloadTop10CSV() {
 }
 
 export async function fetchAllFunds() {
-  const res = await fetch(`${API_BASE}/funds`);
+  const res = await fetch(`${API_BASE}/funds`, REVALIDATE);
   if (!res.ok) throw new Error("Failed to fetch all funds");
   return res.json();
 }
 
+// Server-side page of funds: { items, next_cursor, total }.
+// params: limit, cursor, category, risk, sort (e.g. "-cagr"), fields, min_cagr, ...
+export async function fetchFunds(params = {}) {
+  const query = new URLSearchParams(
+    Object.entries(params).filter(([, v]) => v !== undefined && v !== null && v !== "")
+  );
+  const res = await fetch(`${API_BASE}/funds?${query}`, REVALIDATE);
+  if (!res.ok) throw new Error("Failed to fetch funds");
+  return res.json();
+}
+
+// Funds side by side: { funds: [...record, id, percentiles], distances }.
+// ids are URL slugs or fund names.
+export async function fetchCompare(ids) {
+  const query = new URLSearchParams({ ids: ids.join(",") });
+  const res = await fetch(`${API_BASE}/compare?${query}`, REVALIDATE);
+  if (!res.ok) throw new Error("Failed to compare funds");
+  return res.json();
+}
+
+// Closest funds in the same category: { fund, peers: [...record, id, distance] }
+export async function fetchPeers(id, k = 5) {
+  const res = await fetch(`${API_BASE}/funds/${encodeURIComponent(id)}/peers?k=${k}`, REVALIDATE);
+  if (!res.ok) throw new Error("Failed to fetch peers");
+  return res.json();
+}
+
 // ❗ FIXED UPDATE ENDPOINT (previously wrong)
 /*
 Old:  /api/funds/update  ❌ (404)
@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from 'react'
-import { fetchAllFunds } from '../api.js'
+import { fetchFunds, fetchCompare, fetchPeers } from '../api.js'
 import { Line } from 'react-chartjs-2'
 import {
   Chart as ChartJS,
@@ -13,50 +13,68 @@ import {
 
 ChartJS.register(CategoryScale, LinearScale, PointElement, LineElement, Tooltip, Legend)
 
+// Fields the compare view needs from each fund
+const COMPARE_FIELDS = [
+  'name', 'category', 'one_year_return', 'three_year_return', 'five_year_return',
+  'expense_ratio', 'aum', 'one_year_return_num', 'three_year_return_num', 'cagr_num'
+].join(',')
+
+const SORT_BY_PERIOD = {
+  '1Y': '-one_year',
+  '3Y': '-three_year',
+  '5Y': '-cagr'
+}
+
+// Percentile key returned by /api/compare for each period
+const PERCENTILE_BY_PERIOD = {
+  '1Y': 'one_year',
+  '3Y': 'three_year',
+  '5Y': 'cagr'
+}
+
+const formatPercentile = (p) => (p === null || p === undefined ? 'NA' : `${Math.round(p * 100)}`)
+
 const Compare = () => {
-  const [funds, setFunds] = useState([])
-  const [selected, setSelected] = useState([]) 
+  const [top20, setTop20] = useState([])
+  const [selectedFunds, setSelectedFunds] = useState([])
   const [error, setError] = useState(null)
   const [period, setPeriod] = useState('1Y')
 
+  // The server filters, sorts and trims to 20 funds for the chosen period
   useEffect(() => {
-    fetchAllFunds()
-      .then(data => setFunds(data))
+    fetchFunds({ sort: SORT_BY_PERIOD[period] || '-one_year', limit: 20, fields: COMPARE_FIELDS })
+      .then(page => setTop20(page.items))
       .catch(err => setError(err.message || String(err)))
-  }, [])
+  }, [period])
 
-  const top20 = React.useMemo(() => {
-    if (!Array.isArray(funds) || funds.length === 0) return []
+  const selected = selectedFunds.map(f => f.name)
 
-    const fieldMap = {
-      '1Y': 'one_year_return_num',
-      '3Y': 'three_year_return_num',
-      '5Y': 'cagr_num'
-    }
+  // Category percentiles come from the server; peers are for the last pick
+  const [percentiles, setPercentiles] = useState({})
+  const [peers, setPeers] = useState([])
 
-    const field = fieldMap[period] || 'one_year_return_num'
+  useEffect(() => {
+    if (selected.length === 0) {
+      setPercentiles({})
+      setPeers([])
+      return
+    }
+    fetchCompare(selected)
+      .then(res => setPercentiles(Object.fromEntries(res.funds.map(f => [f.name, f.percentiles]))))
+      .catch(err => setError(err.message || String(err)))
+    fetchPeers(selected[selected.length - 1], 5)
+      .then(res => setPeers(res.peers))
+      .catch(err => setError(err.message || String(err)))
+  }, [selected.join('|')])
 
-    const list = funds.map(f => ({ ...f, _v: f[field] }))
-    list.sort((a, b) => {
-      const an = Number.isFinite(a._v) ? a._v : -Infinity
-      const bn = Number.isFinite(b._v) ? b._v : -Infinity
-      return bn - an
-    })
-    return list.slice(0, 20)
-  }, [funds, period])
-
-  const toggleSelect = (name) => {
-    setSelected(prev => {
-      if (prev.includes(name)) return prev.filter(x => x !== name)
-      if (prev.length >= 3) return prev 
-      return [...prev, name]
+  const toggleSelect = (fund) => {
+    setSelectedFunds(prev => {
+      if (prev.some(f => f.name === fund.name)) return prev.filter(f => f.name !== fund.name)
+      if (prev.length >= 3) return prev
+      return [...prev, fund]
     })
   }
 
-  const selectedFunds = selected
-    .map(name => funds.find(f => f.name === name))
-    .filter(Boolean)
-
   const lineData = {
     labels: ['1Y', '3Y', '5Y'],
     datasets: selectedFunds.map((f, i) => {
@@ -119,7 +137,7 @@ const Compare = () => {
                 <input
                   type="checkbox"
                   checked={selected.includes(f.name)}
-                  onChange={() => toggleSelect(f.name)}
+                  onChange={() => toggleSelect(f)}
                 />
                 <div>
                   <div className="font-medium">{f.name}</div>
@@ -164,6 +182,7 @@ const Compare = () => {
                     <th className="px-2 py-1">5Y</th>
                     <th className="px-2 py-1">Expense Ratio</th>
                     <th className="px-2 py-1">AUM</th>
+                    <th className="px-2 py-1">Category %ile ({period})</th>
                   </tr>
                 </thead>
                 <tbody>
@@ -175,6 +194,9 @@ const Compare = () => {
                       <td className="px-2 py-2">{f.five_year_return || 'NA'}</td>
                       <td className="px-2 py-2">{f.expense_ratio || 'NA'}</td>
                       <td className="px-2 py-2">{f.aum || 'NA'}</td>
+                      <td className="px-2 py-2">
+                        {formatPercentile(percentiles[f.name]?.[PERCENTILE_BY_PERIOD[period]])}
+                      </td>
                     </tr>
                   ))}
                 </tbody>
@@ -182,6 +204,25 @@ const Compare = () => {
             )}
           </div>
 
+          {/* PEERS */}
+          {peers.length > 0 && (
+            <div className="bg-white dark:bg-gray-800 p-4 rounded-xl shadow">
+              <p className="font-semibold mb-2">
+                Similar to {selected[selected.length - 1]}
+              </p>
+              <ul className="text-sm">
+                {peers.map(p => (
+                  <li key={p.id} className="flex justify-between py-1 border-b last:border-b-0">
+                    <span>{p.name}</span>
+                    <span className="text-gray-500">
+                      {p.one_year_return || 'NA'} / {p.three_year_return || 'NA'} / {p.five_year_return || 'NA'}
+                    </span>
+                  </li>
+                ))}
+              </ul>
+            </div>
+          )}
+
         </div>
       </div>
     </section>